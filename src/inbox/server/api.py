@@ -6,10 +6,13 @@ from bson import json_util
 
 import zerorpc
 
+from sqlalchemy import func
+
 from . import postel
 from .config import config
 from .models import session_scope
 from .models.tables import Message, SharedFolder, User, ImapAccount, Thread
+from .models.tables import FolderCounter
 from .models.namespace import threads_for_folder
 
 from .log import get_logger
@@ -64,30 +67,32 @@ class API(object):
 
     @jsonify
     def sync_status(self):
-        """ Returns data representing the status of all syncing users, like:
+        """ Returns data representing the status of all syncing accounts,
+            like:
 
-            user_id: {
-                state: 'initial sync',
-                stored_data: '12127227',
-                stored_messages: '50000',
-                status: '56%',
-            }
-            user_id: {
-                state: 'poll',
-                stored_data: '1000000000',
-                stored_messages: '200000',
-                status: '2013-06-08 14:00',
+            account_id: {
+                folder_name: (state, progress),
+                stored_data: 12127227,
+                stored_messages: 50000,
             }
+
+            Stored totals come from the accounts' folder counters, so a
+            message in several folders counts once in each.
         """
         if not self._sync:
             self._sync = zerorpc.Client(os.environ.get('CRISPIN_SERVER_LOC', None))
         status = self._sync.status()
-        user_ids = status.keys()
+        if not status:
+            return status
         with session_scope() as db_session:
-            users = db_session.query(User).filter(User.id.in_(user_ids))
-            for user in users:
-                status[user.id]['stored_data'] = user.total_stored_data()
-                status[user.id]['stored_messages'] = user.total_stored_messages()
+            totals = db_session.query(FolderCounter.imapaccount_id,
+                    func.sum(FolderCounter.total),
+                    func.sum(FolderCounter.bytes)).filter(
+                            FolderCounter.imapaccount_id.in_(status.keys())) \
+                    .group_by(FolderCounter.imapaccount_id)
+            for account_id, messages, data in totals:
+                status[account_id]['stored_data'] = int(data or 0)
+                status[account_id]['stored_messages'] = int(messages or 0)
             return status
 
     @namespace_auth
@@ -114,6 +119,19 @@ class API(object):
             return [t.cereal() for t in threads_for_folder(self.namespace.id,
                         db_session, folder_name)]
 
+    @namespace_auth
+    @jsonify
+    def thread_summaries_for_folder(self, folder_name, limit=None, offset=0):
+        """ Like threads_for_folder, but just each thread's summary (message
+            and unread counts, participants, latest snippet, attachments and
+            labels) instead of all its messages, most recent first.
+        """
+        with session_scope() as db_session:
+            threads = threads_for_folder(self.namespace.id, db_session,
+                    folder_name).order_by(Thread.recentdate.desc()) \
+                            .offset(offset).limit(limit)
+            return [t.summary() for t in threads]
+
     @namespace_auth
     def send_mail(self, recipients, subject, body):
         """ Sends a message with the given objects """
@@ -0,0 +1,175 @@
+""" Working with IMAP BODYSTRUCTURE responses (RFC 3501 section 7.4.2).
+
+When lazy attachment download is on, crispin fetches a message's
+BODYSTRUCTURE and header first, then only the parts we want up front (text
+and small parts). Everything else is stored as a placeholder Block and
+fetched by section number the first time someone asks for its data.
+"""
+import quopri
+import base64
+
+from itertools import takewhile
+
+class MessagePart(object):
+    """ One leaf of a message's MIME tree, described by BODYSTRUCTURE.
+
+        section is the IMAP part specifier ('1', '2.1', ...), suitable for
+        BODY[section]. walk_index matches the index flanker's walk() would
+        give the same part, so Blocks get the same walk_index no matter
+        which way the message was downloaded.
+
+        data holds the raw (still transfer-encoded) part once fetched.
+    """
+    def __init__(self, section, walk_index, content_type, params, content_id,
+            encoding, size, disposition=None, disposition_params=None):
+        self.section = section
+        self.walk_index = walk_index
+        self.content_type = content_type
+        self.params = params
+        self.content_id = content_id
+        self.encoding = encoding
+        self.size = size
+        self.disposition = disposition
+        self.disposition_params = disposition_params or dict()
+        self.data = None
+
+    @property
+    def filename(self):
+        if self.disposition == 'attachment' and \
+                'filename' in self.disposition_params:
+            return self.disposition_params['filename']
+        return self.params.get('name')
+
+    @property
+    def decoded_size(self):
+        """ BODYSTRUCTURE sizes are transfer-encoded; guess the real size. """
+        if self.encoding == 'base64':
+            return self.size * 3 // 4
+        return self.size
+
+    def is_lazy(self, threshold):
+        """ Text parts are always fetched up front since we need them to
+            build the message body and snippet.
+        """
+        maintype = self.content_type.split('/')[0]
+        return maintype not in ('text', 'message') and self.size >= threshold
+
+    def headers(self):
+        """ Headers equivalent to what we would have parsed out of the part,
+            for Block.misc_keyval.
+        """
+        content_type = '; '.join([self.content_type] + \
+                ['{0}="{1}"'.format(k, v) for k, v in self.params.iteritems()])
+        headers = [('Content-Type', content_type)]
+        if self.encoding:
+            headers.append(('Content-Transfer-Encoding', self.encoding))
+        if self.content_id:
+            headers.append(('Content-Id', self.content_id))
+        if self.disposition:
+            headers.append(('Content-Disposition', '; '.join(
+                [self.disposition] + ['{0}="{1}"'.format(k, v) for k, v in \
+                        self.disposition_params.iteritems()])))
+        return headers
+
+class PartialMessage(object):
+    """ Stands in for BODY[] in raw messages when attachments are lazy, or
+        during a header-first sync, in which case parts is None.
+
+        len() is the number of bytes actually downloaded, so download
+        statistics stay honest.
+    """
+    def __init__(self, headers, parts, size):
+        self.headers = headers
+        self.parts = parts
+        # RFC822.SIZE of the full message on the server
+        self.size = size
+
+    def __len__(self):
+        return len(self.headers) + sum(len(p.data) for p in \
+                self.parts or [] if p.data is not None)
+
+def _params(values):
+    """ ('CHARSET', 'utf-8', 'NAME', 'x') -> {'charset': 'utf-8', 'name': 'x'}
+    """
+    if not values:
+        return dict()
+    return dict((k.lower(), v) for k, v in zip(values[::2], values[1::2]))
+
+def _is_multipart(structure):
+    return isinstance(structure[0], (list, tuple))
+
+def _children(structure):
+    # newer imapclients nest the sub-parts in a list, older ones don't
+    if isinstance(structure[0], list):
+        return structure[0]
+    return list(takewhile(lambda part: isinstance(part, tuple), structure))
+
+def _leaf(structure, section, walk_index):
+    maintype, subtype = structure[0].lower(), structure[1].lower()
+    params = _params(structure[2])
+    encoding = structure[5].lower() if structure[5] else None
+    size = int(structure[6] or 0)
+    # extension data comes after the type-specific fields
+    if maintype == 'text':
+        ext = structure[8:]
+    elif (maintype, subtype) == ('message', 'rfc822'):
+        ext = structure[10:]
+    else:
+        ext = structure[7:]
+    disposition = disposition_params = None
+    # ext is (md5, disposition, ...)
+    if len(ext) > 1 and ext[1]:
+        disposition = ext[1][0].lower()
+        disposition_params = _params(ext[1][1])
+    return MessagePart(section, walk_index,
+            '{0}/{1}'.format(maintype, subtype), params, structure[3],
+            encoding, size, disposition, disposition_params)
+
+def _is_attached_message(structure):
+    return (structure[0].lower(), structure[1].lower()) == \
+            ('message', 'rfc822')
+
+def walk(structure):
+    """ Flatten a BODYSTRUCTURE into a list of leaf MessageParts, in the
+        same order flanker walks a parsed message.
+
+        Multipart containers aren't returned but do use up a walk_index,
+        just like in create_message(). Like flanker, we descend into
+        attached (message/rfc822) messages: the attached message's part
+        comes first, with no data of its own, followed by its contents.
+    """
+    parts = []
+    counter = [0]
+
+    def visit(structure, section):
+        counter[0] += 1
+        if _is_multipart(structure):
+            descend(structure, section)
+            return
+        part = _leaf(structure, section, counter[0])
+        parts.append(part)
+        if _is_attached_message(structure):
+            # flanker gives it an empty body; its parts are all we need
+            part.data = ''
+            body = structure[8]
+            # the body of a single-part attached message is section n.1
+            visit(body, section if _is_multipart(body) else \
+                    '{0}.1'.format(section))
+
+    def descend(structure, prefix):
+        for i, child in enumerate(_children(structure), 1):
+            visit(child, '{0}.{1}'.format(prefix, i) if prefix else str(i))
+
+    if _is_multipart(structure):
+        descend(structure, '')
+    else:
+        visit(structure, '1')
+    return parts
+
+def decode_part(data, encoding):
+    """ Undo Content-Transfer-Encoding. """
+    if encoding == 'base64':
+        return base64.b64decode(data)
+    elif encoding == 'quoted-printable':
+        return quopri.decodestring(data)
+    return data
@@ -4,15 +4,31 @@ Unfortunately, due IMAP's statefulness, to implement connection pooling we
 have to shunt off dealing with the connection pool to the caller or we'll end
 up trying to execute calls with the wrong folder selected some amount of the
 time. That's why functions take a connection argument.
+
+The same goes for pipelined downloads (pipelined_uids): they run against the
+folder the caller selected, and tie up the connection until they finish.
 """
 import os
 import time
 
+from collections import deque
+from contextlib import contextmanager, closing
+
+from imapclient.response_parser import parse_fetch_response
+
 from .log import get_logger
-from .pool import get_connection_pool
+from .config import config
+from .pool import get_connection_pool, discard_connection
+from .mailsync.scheduler import get_scheduler
+from . import bodystructure
+from .bodystructure import PartialMessage
 
 from ..util.misc import or_none
 from ..util.cache import get_cache, set_cache
+from ..util.batch import AdaptiveBatcher
+from ..util.itert import chunk
+from ..util.file import Spool, SpooledData
+from ..util.uidset import UIDSet
 
 __all__ = ['CrispinClient', 'DummyCrispinClient']
 
@@ -47,6 +63,24 @@ class CrispinClientBase(object):
     SELECT a folder until the connection is closed or another folder is
     selected.
     """
+    # how many messages to download at a time
+    CHUNK_SIZE = 1
+
+    # Adaptive batching mode: plan FETCH batches by RFC822.SIZE against a
+    # byte budget that grows and shrinks with observed throughput, instead
+    # of CHUNK_SIZE messages per round trip. Needs uids() to be implemented.
+    ADAPTIVE_BATCHING = False
+    BATCH_INITIAL_BYTES = 1024*1024
+    BATCH_MAX_BYTES = 32*1024*1024
+    BATCH_MAX_MESSAGES = 500
+    # RFC822.SIZE responses are tiny, so we can ask for lots at once
+    SIZE_CHUNK_SIZE = 10000
+    # messages per batch when backfilling bodies after a header-first sync
+    BACKFILL_BATCH_SIZE = 100
+    # connections (beyond the sync's own) that download in parallel during
+    # a bulk sync; see mailsync.pipeline
+    extra_downloaders = 0
+
     def __init__(self, account_id, cache=False):
         self.log = get_logger(account_id)
         self.account_id = account_id
@@ -54,6 +88,8 @@ class CrispinClientBase(object):
         self.selected_folder = None
         self._folder_names = None
         self.cache = cache
+        # { folder_name: AdaptiveBatcher }
+        self._fetch_batchers = dict()
 
     def set_cache(self, data, *keys):
         key = os.path.join('account.{0}'.format(self.account_id),
@@ -112,10 +148,10 @@ class CrispinClientBase(object):
 
     def all_uids(self, c):
         """ Get all UIDs associated with the currently selected folder as
-            a list of integers sorted in ascending order.
+            a UIDSet.
         """
         data = self._fetch_all_uids(c)
-        return sorted([long(s) for s in data])
+        return UIDSet(long(s) for s in data)
 
     def _fetch_all_uids(self, c):
         raise NotImplementedError
@@ -126,6 +162,54 @@ class CrispinClientBase(object):
     def _fetch_new_and_updated_uids(self, modseq, c):
         raise NotImplementedError
 
+    @property
+    def fetch_batcher(self):
+        """ Adaptive FETCH batch sizing for the currently selected folder.
+
+            Kept on the client rather than the sync greenlet so that what we
+            learned survives @retry restarts (e.g. after a MemoryError).
+        """
+        folder = self.selected_folder_name
+        if folder not in self._fetch_batchers:
+            self._fetch_batchers[folder] = AdaptiveBatcher(
+                    initial_bytes=self.BATCH_INITIAL_BYTES,
+                    max_bytes=self.BATCH_MAX_BYTES,
+                    max_count=self.BATCH_MAX_MESSAGES)
+        return self._fetch_batchers[folder]
+
+    def sizes(self, uids, c):
+        """ Get RFC822.SIZE for the given UIDs as a dict of uid -> bytes.
+
+            This is cheap compared to downloading bodies, so we use it to
+            plan byte-budgeted FETCH batches.
+        """
+        sizes = dict()
+        for uid_chunk in chunk(uids, self.SIZE_CHUNK_SIZE):
+            sizes.update((long(uid), msg['RFC822.SIZE']) for uid, msg in \
+                    self._fetch_sizes(uid_chunk, c).iteritems())
+        return sizes
+
+    def _fetch_sizes(self, uids, c):
+        raise NotImplementedError
+
+    def idle_supported(self, c):
+        return False
+
+    def qresync_supported(self, c):
+        return False
+
+    def stop_idle(self):
+        pass
+
+    def pipelined_uids(self, uid_batches, c):
+        """ Download several batches of UIDs, yielding (uids, messages) for
+            each batch in order, where messages is what uids() returns.
+
+            Clients that can't pipeline just download one batch at a time.
+        """
+        for uids in uid_batches:
+            yield uids, self.uids(uids, c)
+
 class DummyCrispinClient(CrispinClientBase):
     """ A crispin client that doesn't actually use IMAP at all. Instead, it
         retrieves cached data from disk and allows one to "replay" previously
@@ -206,6 +290,11 @@ class DummyCrispinClient(CrispinClientBase):
 
         return cached_data
 
+    def _fetch_sizes(self, uids, c):
+        # derive sizes from the cached bodies rather than caching them too
+        return dict((uid, {'RFC822.SIZE': len(msg['BODY[]'])}) \
+                for uid, msg in self._fetch_uids(uids, c).iteritems())
+
     def _fetch_folder_list(self, c):
         cached_data = self.get_cache('folders')
 
@@ -228,13 +317,136 @@ class CrispinClient(CrispinClientBase):
         Pool connections have to be managed by the crispin caller because
         of IMAP's stateful sessions.
     """
-    # how many messages to download at a time
-    CHUNK_SIZE = 1
+    # How many UID FETCH commands to keep in flight on one connection when
+    # downloading with pipelined_uids(). 1 disables pipelining.
+    PIPELINE_DEPTH = 1
+
+    # Servers may drop a client that has been IDLE for 30 minutes (RFC 2177;
+    # Gmail cuts it off at 29), so we re-IDLE well before that.
+    IDLE_TIMEOUT = 25*60
+    # untagged responses that mean the folder changed
+    IDLE_CHANGES = ('EXISTS', 'EXPUNGE', 'FETCH')
+
+    # what we ask for when we want to know about flag changes
+    FLAGS_DATA = ['FLAGS']
 
     def __init__(self, account_id, cache=False):
         self.pool = get_connection_pool(account_id)
+        # Literals (i.e. message bodies) larger than this are streamed to a
+        # spool file as they come off the wire rather than read into memory.
+        self.spool_threshold = int(config.get('SPOOL_THRESHOLD', 1024*1024))
+        self._spool = None
+        # Don't download non-text parts bigger than this during sync;
+        # they're fetched the first time someone reads them.
+        self.lazy_attachments = config.get('LAZY_ATTACHMENTS', False)
+        self.lazy_attachment_size = int(config.get('LAZY_ATTACHMENT_SIZE',
+            100*1024))
+        # see fetching_headers_only()
+        self.headers_only = False
+        self.extra_downloaders = max(
+                int(config.get('PIPELINE_DOWNLOADERS', 1)) - 1, 0)
+        # dedicated connection for IDLE, outside the pool, and the
+        # scheduler slot it holds while it's open
+        self._idle_conn = None
+        self._idle_folder = None
+        self._idle_slot = None
         CrispinClientBase.__init__(self, account_id, cache)
 
+    @contextmanager
+    def fetching_headers_only(self):
+        """ While active, uids() and pipelined_uids() fetch just the header
+            of each message; BODY[] comes back as a PartialMessage with no
+            parts.
+        """
+        self.headers_only = True
+        try:
+            yield
+        finally:
+            self.headers_only = False
+
+    @property
+    def spool(self):
+        if self._spool is None:
+            self._spool = Spool(
+                    os.path.join(config.get('SPOOL_DIR',
+                        os.path.join('cache', 'spool')),
+                        str(self.account_id)),
+                    buffer_size=int(config.get('SPOOL_BUFFER_SIZE',
+                        64*1024)))
+        return self._spool
+
+    @contextmanager
+    def _spooling_literals(self, c):
+        """ While active, literals bigger than spool_threshold read from c are
+            written to the spool a buffer at a time, and show up in parsed
+            responses as SpooledData instead of strings.
+
+            imaplib reads each literal with a single read(size) call, so
+            that's what we hook.
+        """
+        imap = c._imap
+        read = imap.read
+        spool = self.spool
+        def spooling_read(size):
+            if size <= self.spool_threshold:
+                return read(size)
+            return spool.write_from(read, size)
+        imap.read = spooling_read
+        try:
+            yield
+        finally:
+            imap.read = read
+
+    def _literal(self, data):
+        """ Undo imapclient's latin-1 decoding of literals (see
+            GmailCrispinClient._process_fetched_uids).
+        """
+        if isinstance(data, SpooledData):
+            return data.read()
+        return data.encode('latin-1')
+
+    @timed
+    def _fetch_partial(self, uids, metadata, c):
+        """ Fetch messages without their large attachments.
+
+            First gets BODYSTRUCTURE plus `metadata` for every message, then
+            the header and the parts we want up front, with one FETCH per
+            distinct set of part sections (most messages in a batch share
+            one). BODY[] in the returned data is a PartialMessage.
+        """
+        data = c.fetch(uids, ['BODYSTRUCTURE RFC822.SIZE'] + metadata)
+        by_sections = dict()
+        for uid, msg in data.iteritems():
+            parts = bodystructure.walk(msg.pop('BODYSTRUCTURE'))
+            msg['BODY[]'] = PartialMessage(None, parts,
+                    msg.pop('RFC822.SIZE'))
+            sections = tuple(part.section for part in parts \
+                    if part.data is None and \
+                            not part.is_lazy(self.lazy_attachment_size))
+            by_sections.setdefault(sections, []).append(uid)
+
+        with self._spooling_literals(c):
+            for sections, section_uids in by_sections.iteritems():
+                items = ['BODY.PEEK[HEADER]'] + \
+                        ['BODY.PEEK[{0}]'.format(s) for s in sections]
+                for uid, resp in c.fetch(section_uids, items).iteritems():
+                    message = data[uid]['BODY[]']
+                    message.headers = self._literal(resp['BODY[HEADER]'])
+                    for part in message.parts:
+                        key = 'BODY[{0}]'.format(part.section)
+                        if key in resp:
+                            part.data = self._literal(resp[key])
+        return data
+
+    def fetch_part(self, uid, section, c):
+        """ Download a single MIME part of a message in the selected folder,
+            still transfer-encoded.
+        """
+        key = 'BODY[{0}]'.format(section)
+        with self._spooling_literals(c):
+            data = c.fetch([uid], ['BODY.PEEK[{0}]'.format(section)])
+        return self._literal(data[uid][key])
+
     @timed
     def _do_select_folder(self, folder, c):
         # XXX: Remove readonly before implementing mutate commands!
@@ -277,6 +489,181 @@ class CrispinClient(CrispinClientBase):
     def _fetch_uids(self, uids, c):
         raise NotImplementedError
 
+    def _fetch_sizes(self, uids, c):
+        return c.fetch(uids, ['RFC822.SIZE'])
+
+    def idle_supported(self, c):
+        return c.has_capability('IDLE')
+
+    def qresync_supported(self, c):
+        """ The pool ENABLEs QRESYNC on new connections when it can. """
+        return getattr(c, 'qresync_enabled', False)
+
+    def _flags_from_fetch(self, data):
+        return dict((uid, dict(flags=msg['FLAGS'], labels=None)) \
+                for uid, msg in data.iteritems())
+
+    @timed
+    def changed_since(self, modseq, c):
+        """ Find out what changed in the selected folder since `modseq` in a
+            single exchange, without listing every UID (RFC 5162 QRESYNC).
+
+            Returns (flags, vanished): flags for every message that is new or
+            changed, in the same format as flags(), and a UIDSet of the UIDs
+            that have been expunged.
+        """
+        assert self.qresync_supported(c), "QRESYNC isn't enabled"
+        imap = c._imap
+        tag = imap._command('UID', 'FETCH', '1:*',
+                '({0})'.format(' '.join(self.FLAGS_DATA)),
+                '(CHANGEDSINCE {0} VANISHED)'.format(modseq))
+        typ, resp = imap._command_complete('FETCH', tag)
+        c._checkok('fetch', typ, resp)
+        _, vanished_resp = imap._untagged_response(typ, resp, 'VANISHED')
+        typ, resp = imap._untagged_response(typ, resp, 'FETCH')
+
+        changed = dict()
+        if resp != [None]:
+            changed = self._flags_from_fetch(parse_fetch_response(resp,
+                c.normalise_times, c.use_uid))
+        vanished = UIDSet()
+        if vanished_resp != [None]:
+            for line in vanished_resp:
+                # * VANISHED (EARLIER) 41,43:116,118
+                vanished = vanished | UIDSet.from_sequence_set(
+                    line.replace('(EARLIER)', '').strip())
+        return changed, vanished
+
+    def idle(self, folder, timeout):
+        """ Block until the server reports that `folder` changed (new,
+            expunged or re-flagged messages) or until `timeout` seconds have
+            passed. Returns the untagged responses that woke us up, or []
+            on timeout.
+
+            This doesn't use a connection from the pool: it keeps a dedicated
+            connection that sits in IDLE on `folder` between calls. Since
+            nobody else uses that connection, it's the one place where
+            crispin selects a folder on its own, and it doesn't change
+            selected_folder. The connection holds a 'poll' slot with the
+            sync scheduler until stop_idle(), so it counts towards
+            SYNC_MAX_CONNECTIONS.
+        """
+        conn = self._get_idle_connection(folder)
+        deadline = time.time() + timeout
+        changes = []
+        try:
+            conn.idle()
+            try:
+                while not changes and time.time() < deadline:
+                    changes = [r for r in conn.idle_check(
+                        timeout=max(0, deadline - time.time())) \
+                                if len(r) > 1 and r[1] in self.IDLE_CHANGES]
+            finally:
+                conn.idle_done()
+        except Exception:
+            # don't try to reuse a connection in an unknown state
+            self.stop_idle()
+            raise
+        return changes
+
+    def _get_idle_connection(self, folder):
+        if self._idle_conn is not None and self._idle_folder != folder:
+            self.stop_idle()
+        if self._idle_conn is None:
+            # held for as long as the connection is open, not just one block
+            slot = get_scheduler().admitted(self.account_id, 'poll')
+            slot.__enter__()
+            try:
+                conn = self.pool._new_connection()
+                conn.select_folder(folder, readonly=True)
+            except BaseException:
+                slot.__exit__(None, None, None)
+                raise
+            self._idle_conn, self._idle_folder, self._idle_slot = \
+                    conn, folder, slot
+        return self._idle_conn
+
+    def stop_idle(self):
+        if self._idle_conn is not None:
+            conn, self._idle_conn, self._idle_folder = \
+                    self._idle_conn, None, None
+            slot, self._idle_slot = self._idle_slot, None
+            try:
+                conn.logout()
+            except Exception:
+                pass
+            finally:
+                slot.__exit__(None, None, None)
+
+    def pipelined_uids(self, uid_batches, c):
+        # partial fetches take two round trips per batch already
+        if self.PIPELINE_DEPTH <= 1 or \
+                (self.lazy_attachments and not self.headers_only):
+            return CrispinClientBase.pipelined_uids(self, uid_batches, c)
+        return self._pipelined_uids(uid_batches, c)
+
+    def _pipelined_uids(self, uid_batches, c):
+        raise NotImplementedError
+
+    def _pipelined_fetch(self, uid_batches, data, c):
+        """ Issue a UID FETCH of `data` for each batch of UIDs, keeping up to
+            PIPELINE_DEPTH commands in flight at once, and yield
+            (uids, { uid: response }) as each command completes, in order.
+
+            imapclient only knows how to wait for one tagged response at a
+            time, so we drive imaplib directly here. Untagged FETCH responses
+            all land in the same bucket; we demultiplex them by UID, which
+            also copes with servers that interleave responses.
+
+            Like every other crispin call, this operates on the currently
+            selected folder, which the caller owns. The caller must not send
+            anything else over c until the generator is exhausted, or the
+            responses will get mixed up. If it stops early (or a FETCH
+            fails) with commands still in flight, c is discarded.
+        """
+        assert self.selected_folder is not None, \
+                "must select a folder before fetching"
+        imap = c._imap
+        items = '({0})'.format(' '.join(item.upper() for item in data))
+        batches = iter(uid_batches)
+        in_flight = deque()
+        # responses we've read off the wire but whose batch isn't done yet
+        pending = dict()
+
+        def send_next():
+            for uids in batches:
+                if not uids:
+                    continue
+                tag = imap._command('UID', 'FETCH',
+                        ','.join(str(uid) for uid in uids), items)
+                in_flight.append((tag, uids))
+                return
+
+        try:
+            for _ in xrange(self.PIPELINE_DEPTH):
+                send_next()
+            while in_flight:
+                tag, uids = in_flight[0]
+                typ, resp = imap._command_complete('FETCH', tag)
+                in_flight.popleft()
+                c._checkok('fetch', typ, resp)
+                typ, resp = imap._untagged_response(typ, resp, 'FETCH')
+                # keep the pipe full before we spend any time parsing
+                send_next()
+                if resp != [None]:
+                    pending.update(parse_fetch_response(resp,
+                        c.normalise_times, c.use_uid))
+                yield uids, dict((uid, pending.pop(uid)) for uid in uids \
+                        if uid in pending)
+        finally:
+            if in_flight:
+                # The server is still answering FETCHes we'll never read, so
+                # nobody else can use this connection. Draining them could
+                # mean downloading megabytes for nothing.
+                self.log.warning("Discarding connection with {0} FETCHes in "
+                        "flight".format(len(in_flight)))
+                discard_connection(c)
+
     def _fetch_folder_list(self, c):
         """ NOTE: XLIST is deprecated, so we just use LIST.
 
@@ -303,8 +690,29 @@ class CrispinClient(CrispinClientBase):
         return folders
 
 class GmailCrispinClient(CrispinClient):
+    ADAPTIVE_BATCHING = True
+    # Gmail is a long way away from most of our users
+    PIPELINE_DEPTH = 4
+
+    UID_FETCH_DATA = ['BODY.PEEK[] INTERNALDATE FLAGS', 'X-GM-THRID',
+            'X-GM-MSGID', 'X-GM-LABELS']
+    FLAGS_DATA = ['FLAGS X-GM-LABELS']
+    # UID_FETCH_DATA without the body, for lazy attachment download
+    PARTIAL_FETCH_DATA = ['INTERNALDATE FLAGS', 'X-GM-THRID', 'X-GM-MSGID',
+            'X-GM-LABELS']
+    # for header-first initial sync
+    HEADER_FETCH_DATA = ['BODY.PEEK[HEADER] RFC822.SIZE'] + PARTIAL_FETCH_DATA
+    # X-GM-THRIDs per SEARCH when expanding threads. We aim for responses of
+    # around EXPAND_TARGET_UIDS UIDs, going by how big threads have been so
+    # far; EXPAND_MAX_THREADS keeps the OR chain to a sane length.
+    EXPAND_INITIAL_THREADS = 100
+    EXPAND_MAX_THREADS = 500
+    EXPAND_TARGET_UIDS = 2000
+
     def __init__(self, account_id, cache=False):
         CrispinClient.__init__(self, account_id, cache=False)
+        # kept across @retry restarts, like the fetch batchers
+        self.expand_threads_per_search = self.EXPAND_INITIAL_THREADS
 
     def sync_folders(self, c):
         """ In Gmail, every message is a subset of All Mail, so we only sync
@@ -316,11 +724,14 @@ class GmailCrispinClient(CrispinClient):
 
     def flags(self, uids, c):
         """ Flags includes labels on Gmail because Gmail doesn't use \\Draft."""
+        return self._flags_from_fetch(self._fetch_flags(uids, c))
+
+    def _flags_from_fetch(self, data):
         return dict([(uid, dict(flags=msg['FLAGS'], labels=msg['X-GM-LABELS']))
-            for uid, msg in self._fetch_flags(uids, c).iteritems()])
+            for uid, msg in data.iteritems()])
 
     def _fetch_flags(self, uids, c):
-        data = c.fetch(uids, ['FLAGS X-GM-LABELS'])
+        data = c.fetch(uids, self.FLAGS_DATA)
 
         if self.cache:
             # account.{{account_id}}/{{folder}}/{{uidvalidity}}/{{highestmodseq}}/{{uid}}/flags
@@ -370,7 +781,9 @@ class GmailCrispinClient(CrispinClient):
         return self._folder_names
 
     def uids(self, uids, c):
-        raw_messages = self._fetch_uids(uids, c)
+        return self._raw_messages(self._fetch_uids(uids, c))
+
+    def _raw_messages(self, raw_messages):
         messages = []
         for uid in sorted(raw_messages.iterkeys(), key=int):
             msg = raw_messages[uid]
@@ -380,10 +793,34 @@ class GmailCrispinClient(CrispinClient):
         return messages
 
     def _fetch_uids(self, uids, c):
-        data = c.fetch(uids,
-                ['BODY.PEEK[] INTERNALDATE FLAGS', 'X-GM-THRID',
-                 'X-GM-MSGID', 'X-GM-LABELS'])
+        if self.headers_only:
+            data = c.fetch(uids, self.HEADER_FETCH_DATA)
+        elif self.lazy_attachments:
+            data = self._fetch_partial(uids, self.PARTIAL_FETCH_DATA, c)
+        else:
+            with self._spooling_literals(c):
+                data = c.fetch(uids, self.UID_FETCH_DATA)
+        return self._process_fetched_uids(uids, data)
+
+    def _pipelined_uids(self, uid_batches, c):
+        fetches = self._pipelined_fetch(uid_batches,
+                self.HEADER_FETCH_DATA if self.headers_only else \
+                        self.UID_FETCH_DATA, c)
+        with self._spooling_literals(c), closing(fetches):
+            for uids, data in fetches:
+                yield uids, self._raw_messages(
+                        self._process_fetched_uids(uids, data))
+
+    def _process_fetched_uids(self, uids, data):
         for uid, msg in data.iteritems():
+            if 'BODY[HEADER]' in msg:
+                msg['BODY[]'] = PartialMessage(
+                        self._literal(msg.pop('BODY[HEADER]')), None,
+                        msg.pop('RFC822.SIZE'))
+                continue
+            if isinstance(msg['BODY[]'], (SpooledData, PartialMessage)):
+                # straight off the wire, never decoded, or already fixed up
+                continue
             # NOTE: flanker needs encoded bytestrings as its input, since to
             # deal properly with MIME-encoded email you need to do part
             # decoding based on message / MIME part headers anyway. imapclient
@@ -419,6 +856,11 @@ class GmailCrispinClient(CrispinClient):
             thrid=str(ret['X-GM-THRID']))) \
                 for uid, ret in self._fetch_g_metadata(uids, c).iteritems()])
 
+    def g_msgids(self, uids, c):
+        """ Just the X-GM-MSGIDs for the given UIDs, as {uid: g_msgid}. """
+        return dict((long(uid), str(ret['X-GM-MSGID'])) for uid, ret in \
+                c.fetch(uids, ['X-GM-MSGID']).iteritems())
+
     def _fetch_g_metadata(self, uids, c):
         data = c.fetch(uids, ['X-GM-MSGID', 'X-GM-THRID'])
 
@@ -440,6 +882,26 @@ class GmailCrispinClient(CrispinClient):
         # UIDs ascend over time; return in order most-recent first
         return sorted(self._expand_threads(thread_ids, c), reverse=True)
 
+    def expand_thread_batches(self, thread_ids, c):
+        """ Expand thread_ids a SEARCH at a time, yielding (thread_ids,
+            uids) for each search in order, with uids as expand_threads()
+            returns them.
+
+            The number of threads per search follows the size of the
+            responses: lots of long threads means fewer per search, and
+            lots of one-message threads means more.
+        """
+        i = 0
+        while i < len(thread_ids):
+            batch = thread_ids[i:i + self.expand_threads_per_search]
+            uids = self.expand_threads(batch, c)
+            uids_per_thread = max(len(uids), 1) / float(len(batch))
+            self.expand_threads_per_search = max(1, min(
+                self.EXPAND_MAX_THREADS,
+                int(self.EXPAND_TARGET_UIDS / uids_per_thread)))
+            i += len(batch)
+            yield batch, uids
+
     def _expand_threads(self, thread_ids, c):
         # The boolean IMAP queries use prefix notation for query params.
         # imaplib automatically adds parens.
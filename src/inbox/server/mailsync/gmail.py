@@ -25,29 +25,93 @@ import os
 from geventconnpool import retry
 
 from .imap import uidvalidity_callback, new_or_updated, remove_deleted_uids
-from .imap import chunked_uid_download, update_metadata, resync_uids_from
+from .imap import chunked_uid_download, update_metadata
 from .imap import base_initial_sync, base_poll, safe_download, commit_uids
+from .imap import safe_pipelined_download
+from .imap import parse_raw_messages, save_message_parts
 from .imap import create_db_objects, ImapSyncMonitor
+from .scheduler import get_scheduler
 
 from ..models import imapaccount as account
-from ..models.tables import ImapAccount, Namespace, ImapUid, Message
+from ..models import bulk
+from ..models.tables import ImapAccount, Namespace, ImapUid
 
 from inbox.util.itert import chunk, partition
-from inbox.util.cache import set_cache, get_cache, rm_cache
+from inbox.util.cache import cache_path
+from inbox.util import gmetadata
+from inbox.util.uidset import UIDSet
 
 class GmailSyncMonitor(ImapSyncMonitor):
     def __init__(self, account_id, email_address, provider, status_cb,
-            heartbeat=1, poll_frequency=30):
+            heartbeat=1, poll_frequency=30, use_idle=True,
+            full_sweep_frequency=3600, headers_first=False):
         self.folder_state_handlers = {
                     'initial': initial_sync,
-                    'initial uidinvalid': resync_uids_from('initial'),
+                    'initial uidinvalid': gmail_resync_uids_from('initial'),
                     'poll': poll,
-                    'poll uidinvalid': resync_uids_from('poll'),
+                    'poll uidinvalid': gmail_resync_uids_from('poll'),
                     'finish': lambda c, s, l, f, st: 'finish',
                 }
 
         ImapSyncMonitor.__init__(self, account_id, email_address, provider,
-                status_cb, heartbeat=1, poll_frequency=30)
+                status_cb, heartbeat=1, poll_frequency=30, use_idle=use_idle,
+                full_sweep_frequency=full_sweep_frequency,
+                headers_first=headers_first)
+# X-GM-MSGIDs are small, so fetch lots at once when remapping UIDs
+G_MSGID_CHUNK_SIZE = 10000
+# UIDs per X-GM-MSGID/X-GM-THRID FETCH, and per append to the on-disk copy,
+# at the start of an initial sync
+G_METADATA_CHUNK_SIZE = 10000
+# UIDs per database lookup when deduplicating downloads by X-GM-MSGID
+DEDUPLICATE_CHUNK_SIZE = 10000
+
+def gmail_resync_uids_from(previous_state):
+    @retry
+    def resync_uids(crispin_client, db_session, log, folder_name, shared_state):
+        """ Call this when UIDVALIDITY is invalid to fix up the database.
+
+        X-GM-MSGIDs don't change when UIDs do, so we fetch the X-GM-MSGID of
+        every UID in the folder a chunk at a time, and rewrite the UIDs of
+        the messages we have with one UPDATE per chunk. No messages are
+        re-downloaded. UIDs we had that aren't on the server any more are
+        dropped, and new UIDs are left for the next sync to download.
+
+        We keep the old HIGHESTMODSEQ, so the next poll asks for changes
+        since then.
+        """
+        log.info("UIDVALIDITY for {0} has changed; resyncing UIDs".format(folder_name))
+        account_id = crispin_client.account_id
+        with get_scheduler().admitted(account_id, 'initial'), \
+                crispin_client.pool.get() as c:
+            # don't check UIDVALIDITY; we know it's changed
+            crispin_client.select_folder(folder_name,
+                    lambda folder, select_info: select_info, c)
+            remote_uids = crispin_client.all_uids(c)
+            log.info("Remapping {0} UIDs in {1}".format(len(remote_uids),
+                folder_name))
+
+            account.negate_uids(account_id, db_session, folder_name)
+            num_remapped = 0
+            for uids in chunk(remote_uids, G_MSGID_CHUNK_SIZE):
+                new_uids = dict((g_msgid, uid) for uid, g_msgid in \
+                        crispin_client.g_msgids(uids, c).iteritems())
+                num_remapped += account.remap_uids(account_id, db_session,
+                        folder_name, new_uids)
+            num_removed = account.remove_unmapped_uids(account_id, db_session,
+                    folder_name)
+
+            saved_validity = account.get_uidvalidity(account_id, db_session,
+                    folder_name)
+            account.update_uidvalidity(account_id, db_session, folder_name,
+                    crispin_client.selected_uidvalidity,
+                    saved_validity.highestmodseq)
+            db_session.commit()
+        log.info("Remapped {0} UIDs in {1} to UIDVALIDITY {2}; {3} were "
+                "gone".format(num_remapped, folder_name,
+                    crispin_client.selected_uidvalidity, num_removed))
+        return previous_state
+    return resync_uids
+
 @retry
 def initial_sync(crispin_client, db_session, log, folder_name, shared_state):
     return base_initial_sync(crispin_client, db_session, log, folder_name,
@@ -57,17 +121,28 @@ def gmail_initial_sync(crispin_client, db_session, log, folder_name,
         shared_state, local_uids, c):
     remote_g_metadata = get_g_metadata(crispin_client, db_session, log,
             folder_name, local_uids, c)
-    remote_uids = sorted(remote_g_metadata.keys(), key=int)
+    try:
+        gmail_download_folder(crispin_client, db_session, log, folder_name,
+                shared_state, local_uids, remote_g_metadata, c)
+    finally:
+        remote_g_metadata.close()
+
+    # Complete X-GM-MSGID mapping is no longer needed after initial sync.
+    gmetadata.remove(remote_g_metadata_cache_file(crispin_client.account_id,
+        folder_name))
+
+def gmail_download_folder(crispin_client, db_session, log, folder_name,
+        shared_state, local_uids, remote_g_metadata, c):
+    remote_uids = remote_g_metadata.uids()
     log.info("Found {0} UIDs for folder {1}".format(len(remote_uids),
         folder_name))
     if folder_name == crispin_client.folder_names(c)['All']:
         log.info("Already have {0} UIDs".format(len(local_uids)))
 
-    local_uids = set(local_uids).difference(
-            remove_deleted_uids(crispin_client.account_id,
-                db_session, log, folder_name, local_uids, remote_uids, c))
+    local_uids = local_uids - remove_deleted_uids(crispin_client.account_id,
+            db_session, log, folder_name, local_uids, remote_uids, c)
 
-    unknown_uids = set(remote_uids).difference(set(local_uids))
+    unknown_uids = remote_uids - local_uids
 
     if folder_name != crispin_client.folder_names(c)['All']:
         chunked_thread_download(crispin_client, db_session, log, folder_name,
@@ -79,12 +154,9 @@ def gmail_initial_sync(crispin_client, db_session, log, folder_name,
         chunked_uid_download(crispin_client, db_session, log, folder_name,
                 full_download, len(local_uids), len(remote_uids),
                 shared_state['status_cb'], shared_state['syncmanager_lock'],
-                gmail_download_and_commit_uids,
+                gmail_commit_raw_messages,
                 account.create_gmail_message, c)
 
-    # Complete X-GM-MSGID mapping is no longer needed after initial sync.
-    rm_cache(remote_g_metadata_cache_file(crispin_client.account_id, folder_name))
-
 @retry
 def poll(crispin_client, db_session, log, folder_name, shared_state):
     return base_poll(crispin_client, db_session, log, folder_name,
@@ -92,8 +164,8 @@ def poll(crispin_client, db_session, log, folder_name, shared_state):
 
 def gmail_highestmodseq_update(crispin_client, db_session, log, folder_name,
         uids, local_uids, status_cb, syncmanager_lock, c):
-    local_g_metadata = account.g_metadata(crispin_client.account_id,
-            db_session, folder_name)
+    local_g_metadata = gmetadata.GMetadataDict(account.g_metadata(
+        crispin_client.account_id, db_session, folder_name))
     local_g_metadata.update(crispin_client.g_metadata(uids, c))
 
     if folder_name != crispin_client.folder_names(c)['All']:
@@ -101,7 +173,8 @@ def gmail_highestmodseq_update(crispin_client, db_session, log, folder_name,
                 local_g_metadata, local_uids, status_cb, syncmanager_lock, c)
 
 def remote_g_metadata_cache_file(account_id, folder_name):
-    return os.path.join(str(account_id), folder_name, "remote_g_metadata")
+    return cache_path(os.path.join(str(account_id), folder_name,
+        "remote_g_metadata"))
 
 def get_g_metadata(crispin_client, db_session, log, folder_name, uids, c):
     account_id = crispin_client.account_id
@@ -114,10 +187,8 @@ def get_g_metadata(crispin_client, db_session, log, folder_name, uids, c):
                 db_session, log, folder_name, uids, saved_validity, c)
 
     if remote_g_metadata is None:
-        remote_g_metadata = crispin_client.g_metadata(
-                crispin_client.all_uids(c), c)
-        set_cache(remote_g_metadata_cache_file(account_id, folder_name),
-                remote_g_metadata)
+        remote_g_metadata = fetch_g_metadata(crispin_client, log, folder_name,
+                c)
         # Save highestmodseq that corresponds to the saved g_metadata.
         account.update_uidvalidity(account_id, db_session, folder_name,
                 crispin_client.selected_uidvalidity,
@@ -126,19 +197,77 @@ def get_g_metadata(crispin_client, db_session, log, folder_name, uids, c):
 
     return remote_g_metadata
 
+def fetch_g_metadata(crispin_client, log, folder_name, c):
+    """ Fetch X-GM-MSGID and X-GM-THRID for the whole folder,
+        G_METADATA_CHUNK_SIZE UIDs at a time, appending each chunk to the
+        cache file as it arrives. If an earlier attempt was cut short we
+        carry on after the last chunk it saved.
+    """
+    path = remote_g_metadata_cache_file(crispin_client.account_id,
+            folder_name)
+    writer = gmetadata.GMetadataWriter(path,
+            crispin_client.selected_uidvalidity)
+    remote_uids = crispin_client.all_uids(c)
+    if writer.count:
+        log.info("Resuming X-GM-MSGID download for {0} after UID {1} "
+                "({2} saved)".format(folder_name, writer.last_uid,
+                    writer.count))
+        remote_uids = remote_uids - UIDSet.from_ranges([(0, writer.last_uid)])
+    try:
+        for uids in chunk(remote_uids, G_METADATA_CHUNK_SIZE):
+            writer.append(crispin_client.g_metadata(uids, c))
+    except:
+        writer.close()
+        raise
+    writer.finish()
+    return gmetadata.load(path)
+
 def gmail_download_and_commit_uids(crispin_client, db_session, log, folder_name,
-        uids, msg_create_fn, syncmanager_lock, c):
-    raw_messages = safe_download(crispin_client, log, uids, c)
+        uids, msg_create_fn, syncmanager_lock, c, raw_messages=None):
+    if raw_messages is None:
+        raw_messages = safe_download(crispin_client, log, uids, c)
+    raw_messages = parse_raw_messages(crispin_client.account_id, log,
+            folder_name, raw_messages)
+    return gmail_commit_raw_messages(crispin_client, db_session, log,
+            folder_name, raw_messages, msg_create_fn, syncmanager_lock)
+
+def gmail_commit_raw_messages(crispin_client, db_session, log, folder_name,
+        raw_messages, msg_create_fn, syncmanager_lock):
     with syncmanager_lock:
         # there is the possibility that another green thread has already
         # downloaded some message(s) from this batch... check within the lock
         raw_messages = deduplicate_message_object_creation(
                 crispin_client.account_id, db_session, log, raw_messages)
+        if msg_create_fn is account.create_gmail_message and \
+                bulk.bulk_insert_supported(db_session):
+            return bulk_commit_raw_messages(crispin_client, db_session, log,
+                    folder_name, raw_messages)
+        if msg_create_fn is account.create_gmail_message and raw_messages:
+            # one query for the batch's threads instead of one per message
+            namespace_id = db_session.query(Namespace.id).filter_by(
+                    imapaccount_id=crispin_client.account_id).scalar()
+            account.thread_cache(db_session).prewarm(db_session,
+                    namespace_id, [msg[4] for msg in raw_messages])
         new_imapuids = create_db_objects(crispin_client.account_id, db_session,
                 log, folder_name, raw_messages, msg_create_fn)
         commit_uids(db_session, log, new_imapuids)
         return len(new_imapuids)
 
+def bulk_commit_raw_messages(crispin_client, db_session, log, folder_name,
+        raw_messages):
+    """ gmail_commit_raw_messages, with one multi-row INSERT per table
+        instead of the ORM's one per object. See models/bulk.py.
+    """
+    acc = db_session.query(ImapAccount).join(Namespace).filter_by(
+            id=crispin_client.account_id).one()
+    created = bulk.create_gmail_messages(db_session, log, acc, folder_name,
+            raw_messages)
+    save_message_parts(log, [imapuid.message for imapuid, _ in created])
+    num_new = bulk.insert_gmail_messages(db_session, acc, folder_name,
+            created)
+    db_session.commit()
+    return num_new
+
 def chunked_thread_download(crispin_client, db_session, log, folder_name,
         g_metadata, uids, status_cb, syncmanager_lock, c):
     """ UIDs and g_metadata passed in are for the _folder that threads are
@@ -153,11 +282,13 @@ def chunked_thread_download(crispin_client, db_session, log, folder_name,
         folders is expensive and we don't want to assume what the caller
         needs to do next.
     """
+    all_g_thrids = set()
+    folder_g_msgids = set()
+    for _, g_msgid, g_thrid in g_metadata.items_for(UIDSet(uids)):
+        all_g_thrids.add(g_thrid)
+        folder_g_msgids.add(g_msgid)
     # X-GM-THRID is roughly ascending over time, so sort most-recent first
-    all_g_thrids = sorted(set([msg['thrid'] for uid, msg in \
-            g_metadata.iteritems() if uid in uids]), reverse=True)
-    folder_g_msgids = set([msg['msgid'] for uid, msg in \
-            g_metadata.items() if uid in uids])
+    all_g_thrids = sorted(all_g_thrids, key=long, reverse=True)
     log.info("{0} threads found".format(len(all_g_thrids)))
 
     flags = crispin_client.flags(uids, c)
@@ -176,11 +307,12 @@ def chunked_thread_download(crispin_client, db_session, log, folder_name,
     num_total_threads = len(all_g_thrids)
     acc = db_session.query(ImapAccount).join(Namespace).filter_by(
             id=crispin_client.account_id).one()
-    for g_thrids in chunk(all_g_thrids, 100):
+    for g_thrids, thread_uids in crispin_client.expand_thread_batches(
+            all_g_thrids, c):
         num_downloaded_threads = download_threads(crispin_client, db_session,
-                log, acc, folder_name, g_thrids, flags, folder_g_msgids,
-                num_downloaded_threads, num_total_threads, status_cb,
-                syncmanager_lock, c)
+                log, acc, folder_name, g_thrids, thread_uids, flags,
+                folder_g_msgids, num_downloaded_threads, num_total_threads,
+                status_cb, syncmanager_lock, c)
 
 def group_uids_by_thread(uids, thread_g_metadata):
     uids_for = dict()
@@ -203,79 +335,104 @@ def create_original_folder_imapuids(acc, folder_name, imapuids,
     return original_imapuids
 
 def download_threads(crispin_client, db_session, log, acc, folder_name,
-        g_thrids, flags, folder_g_msgids, num_downloaded_threads,
+        g_thrids, thread_uids, flags, folder_g_msgids, num_downloaded_threads,
         num_total_threads, status_cb, syncmanager_lock, c):
-    thread_uids = crispin_client.expand_threads(g_thrids, c)
+    """ thread_uids are the All Mail UIDs of every message in g_thrids. """
     # need X-GM-MSGID in order to dedupe download and X-GM-THRID to sort
-    thread_g_metadata = crispin_client.g_metadata(thread_uids, c)
+    thread_g_metadata = gmetadata.GMetadataDict(
+            crispin_client.g_metadata(thread_uids, c))
     to_download = deduplicate_message_download(crispin_client, db_session, log,
             thread_g_metadata, thread_uids, c)
     log.info("need to get {0} deduplicated messages".format(len(to_download)))
     uids_for = group_uids_by_thread(to_download, thread_g_metadata)
     log.info("{0} threads after deduplication".format(len(uids_for)))
     num_downloaded_threads += (len(g_thrids) - len(uids_for))
-    # download one thread at a time, most recent thread first
-    # XXX we may want to chunk this download for large threads...
-    for g_thrid in sorted(uids_for.keys(), reverse=True):
+
+    # Most recent thread first, newest to oldest in each thread, but packed
+    # into byte-budgeted batches that span threads, so a run of small
+    # threads doesn't cost a round trip each.
+    uids = []
+    # { uid: number of threads done once it's downloaded }
+    threads_done_at = dict()
+    for g_thrid in sorted(uids_for, key=long, reverse=True):
+        uids.extend(sorted(uids_for[g_thrid], reverse=True))
+        threads_done_at[uids[-1]] = len(threads_done_at) + 1
+    # header-only fetches are tiny; the message count cap applies
+    sizes = dict() if getattr(crispin_client, 'headers_only', False) \
+            else crispin_client.sizes(uids, c)
+    batches = crispin_client.fetch_batcher.batches(uids, sizes)
+    threads_done = 0
+    for batch, raw_messages in safe_pipelined_download(crispin_client, log,
+            batches, c):
+        gmail_download_and_commit_uids(crispin_client, db_session, log,
+                crispin_client.selected_folder_name, batch,
+                account.create_gmail_message, syncmanager_lock, c,
+                raw_messages=raw_messages)
+        now_done = max([threads_done] + [threads_done_at[uid] for uid in \
+                batch if uid in threads_done_at])
+        num_downloaded_threads += now_done - threads_done
+        threads_done = now_done
+
         percent_done = (num_downloaded_threads / num_total_threads) * 100
         status_cb(crispin_client.account_id, 'initial',
                 (folder_name, percent_done))
         log.info("Syncing %s -- %.2f%% (%i/%i)" % (
             folder_name, percent_done,
             num_downloaded_threads, num_total_threads))
-        uids = uids_for[g_thrid]
-        log.info("downloading thread {0} with {1} messages" \
-                .format(g_thrid, len(uids)))
-        gmail_download_and_commit_uids(crispin_client, db_session, log,
-                crispin_client.selected_folder_name, sorted(uids, reverse=True),
-                account.create_gmail_message, syncmanager_lock, c)
-        num_downloaded_threads += 1
     return num_downloaded_threads
 
 def deduplicate_message_object_creation(account_id, db_session, log,
         raw_messages):
-    new_g_msgids = set([msg[5] for msg in raw_messages])
-    existing_g_msgids = set(account.g_msgids(account_id, db_session,
-        in_=new_g_msgids))
-    return [msg for msg in raw_messages if msg[5] not in existing_g_msgids]
+    new_g_msgids = account.new_g_msgids(account_id, db_session,
+            [msg[5] for msg in raw_messages])
+    return [msg for msg in raw_messages if msg[5] in new_g_msgids]
 
 def deduplicate_message_download(crispin_client, db_session, log,
         remote_g_metadata, uids, c):
-    """ Deduplicate message download using X-GM-MSGID. """
-    local_g_msgids = set(account.g_msgids(crispin_client.account_id,
-        db_session, in_=[remote_g_metadata[uid]['msgid'] for uid in uids]))
-    full_download, imapuid_only = partition(
-            lambda uid: remote_g_metadata[uid]['msgid'] in local_g_msgids,
-            sorted(uids, key=int))
-    log.info("Skipping {0} uids already downloaded".format(len(imapuid_only)))
-    if len(imapuid_only) > 0:
-        add_new_imapuid(crispin_client, db_session, remote_g_metadata,
-                imapuid_only, c)
+    """ Deduplicate message download using X-GM-MSGID.
+
+        remote_g_metadata is a GMetadata or GMetadataDict; we go through it
+        DEDUPLICATE_CHUNK_SIZE UIDs at a time.
+    """
+    full_download = []
+    num_skipped = 0
+    for items in chunk(remote_g_metadata.items_for(UIDSet(uids)),
+            DEDUPLICATE_CHUNK_SIZE):
+        g_msgid_for = dict((uid, g_msgid) for uid, g_msgid, _ in items)
+        local_g_msgids = account.existing_g_msgids(crispin_client.account_id,
+                db_session, g_msgid_for.values())
+        to_download, imapuid_only = partition(
+                lambda uid: g_msgid_for[uid] in local_g_msgids,
+                sorted(g_msgid_for))
+        if imapuid_only:
+            add_new_imapuid(crispin_client, db_session, g_msgid_for,
+                    imapuid_only, c)
+        full_download.extend(to_download)
+        num_skipped += len(imapuid_only)
+    log.info("Skipping {0} uids already downloaded".format(num_skipped))
 
     return full_download
 
-def add_new_imapuid(crispin_client, db_session, remote_g_metadata, uids, c):
+def add_new_imapuid(crispin_client, db_session, g_msgid_for, uids, c):
     """ Since we deduplicate messages on Gmail, sometimes we need to just add
-        new ImapUid entries.
+        new ImapUid entries. g_msgid_for maps (at least) uids to their
+        X-GM-MSGIDs.
     """
     flags = crispin_client.flags(uids, c)
 
     # Since we prioritize download for messages in certain threads, we may
     # already have ImapUid entries despite calling this method.
-    local_folder_uids = set([uid for uid, in \
-            db_session.query(ImapUid.msg_uid).filter(
-                ImapUid.folder_name==crispin_client.selected_folder_name,
-                ImapUid.msg_uid.in_(uids))])
+    local_folder_uids = account.existing_uids(crispin_client.account_id,
+            db_session, crispin_client.selected_folder_name, uids)
     uids = [uid for uid in uids if uid not in local_folder_uids]
 
     if uids:
         # collate message objects to relate the new imapuids
-        imapuid_uid_for = dict([(metadata['msgid'], uid) for \
-                (uid, metadata) in remote_g_metadata.items() if uid in uids])
-        imapuid_g_msgids = [remote_g_metadata[uid]['msgid'] for uid in uids]
-        message_for = dict([(imapuid_uid_for[mm.g_msgid], mm) for \
-                mm in db_session.query(Message).filter( \
-                    Message.g_msgid.in_(imapuid_g_msgids))])
+        message_for_g_msgid = account.messages_for_g_msgids(
+                crispin_client.account_id, db_session,
+                [g_msgid_for[uid] for uid in uids])
+        message_for = dict((uid, message_for_g_msgid[g_msgid_for[uid]]) \
+                for uid in uids)
 
         acc = db_session.query(ImapAccount).join(Namespace).filter_by(
                 id=crispin_client.account_id).one()
@@ -286,19 +443,22 @@ def add_new_imapuid(crispin_client, db_session, remote_g_metadata, uids, c):
             item.update_flags(flags[item.msg_uid]['flags'],
                     flags[item.msg_uid]['labels'])
         db_session.add_all(new_imapuids)
+        account.count_new_uids(crispin_client.account_id, db_session,
+                crispin_client.selected_folder_name, new_imapuids)
         db_session.commit()
 
 def retrieve_saved_g_metadata(crispin_client, db_session, log, folder_name,
         local_uids, saved_validity, c):
     log.info('Attempting to retrieve remote_g_metadata from cache')
-    remote_g_metadata = get_cache(remote_g_metadata_cache_file(
+    remote_g_metadata = gmetadata.load(remote_g_metadata_cache_file(
         crispin_client.account_id, folder_name))
     if remote_g_metadata is not None:
         log.info("Successfully retrieved remote_g_metadata cache")
         if crispin_client.selected_highestmodseq > \
                 saved_validity.highestmodseq:
-            update_saved_g_metadata(crispin_client, db_session, log,
-                    folder_name, remote_g_metadata, local_uids, c)
+            remote_g_metadata = update_saved_g_metadata(crispin_client,
+                    db_session, log, folder_name, remote_g_metadata,
+                    local_uids, c)
     else:
         log.info("No cached data found")
     return remote_g_metadata
@@ -319,17 +479,17 @@ def update_saved_g_metadata(crispin_client, db_session, log, folder_name,
             crispin_client.selected_highestmodseq, c)
     new, updated = new_or_updated(modified, local_uids)
     log.info("{0} new and {1} updated UIDs".format(len(new), len(updated)))
-    # for new, query metadata and update cache
-    remote_g_metadata.update(crispin_client.g_metadata(new, c))
-    # filter out messages that have disappeared
-    all_uids = set(crispin_client.all_uids(c))
-    remote_g_metadata = dict((uid, md) for uid, md in \
-            remote_g_metadata.iteritems() if uid in all_uids)
-    set_cache(remote_g_metadata_cache_file(crispin_client.account_id,
-        folder_name), remote_g_metadata)
+    # for new, query metadata and update cache, filtering out messages that
+    # have disappeared
+    path = remote_g_metadata_cache_file(crispin_client.account_id,
+            folder_name)
+    remote_g_metadata.close()
+    gmetadata.update(path, crispin_client.g_metadata(new, c),
+            keep=crispin_client.all_uids(c))
     log.info("Updated cache with new messages")
     # for updated, it's easier to just update them now
     # bigger chunk because the data being fetched here is very small
     for uids in chunk(updated, 5*crispin_client.CHUNK_SIZE):
         update_metadata(crispin_client, db_session, log, folder_name, uids, c)
     log.info("Updated metadata for modified messages")
+    return gmetadata.load(path)
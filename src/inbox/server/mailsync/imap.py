@@ -56,7 +56,11 @@ for that.
 """
 from __future__ import division
 
+import time
+import socket
+
 from datetime import datetime
+from contextlib import closing
 from gc import collect as garbage_collect
 
 from geventconnpool import retry
@@ -64,15 +68,22 @@ from gevent import Greenlet, sleep
 from gevent.coros import RLock
 
 from inbox.util.itert import chunk, partition
+from inbox.util.uidset import UIDSet
+from inbox.sqlalchemy.revision import coarse_revisions
 
 from ..log import get_logger
+from ..config import config
 from ..crispin import new_crispin
 from ..models import session_scope
 from ..models import imapaccount as account
-from ..models.tables import ImapAccount, Namespace, FolderSync
+from ..models.tables import ImapAccount, Namespace, FolderSync, ImapUid
+from ..bodystructure import PartialMessage
+from ..mimeparse import parse_many
 
 from .exc import UIDInvalid
 from .base import gevent_check_join, verify_db, BaseMailSyncMonitor
+from .pipeline import SyncPipeline
+from .scheduler import get_scheduler
 
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -80,14 +91,24 @@ class ImapSyncMonitor(BaseMailSyncMonitor):
     """ Top-level controller for an account's mail sync. Spawns individual
         FolderSync greenlets for each folder.
 
-        poll_frequency and heartbeat are in seconds.
+        poll_frequency, full_sweep_frequency and heartbeat are in seconds.
     """
     def __init__(self, account_id, email_address, provider, status_cb,
-            heartbeat=1, poll_frequency=30):
+            heartbeat=1, poll_frequency=30, use_idle=True,
+            full_sweep_frequency=3600, headers_first=False):
 
         self.shared_state = {
                 # IMAP folders are kept up-to-date via polling
                 'poll_frequency': poll_frequency,
+                # ...except the Inbox, which we IDLE on if we can
+                'use_idle': use_idle,
+                # with QRESYNC we only list every UID in a folder this often
+                'full_sweep_frequency': full_sweep_frequency,
+                # folder_name -> time of the last full UID listing
+                'last_full_sweep': dict(),
+                # initial sync downloads headers for everything first and
+                # backfills bodies while polling
+                'headers_first': headers_first,
                 'syncmanager_lock': RLock(),
                 }
 
@@ -113,7 +134,8 @@ class ImapSyncMonitor(BaseMailSyncMonitor):
                     for saved_state in db_session.query(FolderSync).filter_by(
                     imapaccount_id=self.account_id))
         crispin_client = new_crispin(self.account_id, self.provider)
-        with crispin_client.pool.get() as c:
+        with get_scheduler().admitted(self.account_id, 'poll'), \
+                crispin_client.pool.get() as c:
             sync_folders = crispin_client.sync_folders(c)
         for folder in sync_folders:
             if saved_states.get(folder) != 'finish':
@@ -168,32 +190,51 @@ class ImapFolderSyncMonitor(Greenlet):
             # NOTE: The parent ImapSyncMonitor handler could kill us at any
             # time if it receives a shutdown command. The shutdown command is
             # equivalent to ctrl-c.
-            while True:
-                try:
-                    self.state = foldersync.state = \
-                            self.state_handlers[foldersync.state](
-                                    self.crispin_client, db_session, self.log,
-                                    self.folder_name, self.shared_state)
-                except UIDInvalid:
-                    self.state = foldersync.state = self.state + ' uidinvalid'
-                # State handlers are idempotent, so it's okay if we're killed
-                # between the end of the handler and the commit.
-                db_session.commit()
-                if self.state == 'finish':
-                    return
+            try:
+                while True:
+                    try:
+                        self.state = foldersync.state = \
+                                self.state_handlers[foldersync.state](
+                                        self.crispin_client, db_session,
+                                        self.log, self.folder_name,
+                                        self.shared_state)
+                    except UIDInvalid:
+                        self.state = foldersync.state = \
+                                self.state + ' uidinvalid'
+                    # State handlers are idempotent, so it's okay if we're
+                    # killed between the end of the handler and the commit.
+                    db_session.commit()
+                    if self.state == 'finish':
+                        return
+            finally:
+                # hang up the dedicated IDLE connection, if any
+                self.crispin_client.stop_idle()
 
 def resync_uids_from(previous_state):
     @retry
-    def resync_uids(crispin_client, log, db_session, folder_name, shared_state):
+    def resync_uids(crispin_client, db_session, log, folder_name, shared_state):
         """ Call this when UIDVALIDITY is invalid to fix up the database.
 
-        What happens here is we fetch new UIDs from the IMAP server and
-        match them with X-GM-MSGIDs and sub in the new UIDs for the old. No
-        messages are re-downloaded.
+        Plain IMAP gives us no way to tell which new UID is which message we
+        already have, so we forget the folder's UIDs and download it again.
+        (Gmail can do better; see gmail.gmail_resync_uids_from.)
         """
         log.info("UIDVALIDITY for {0} has changed; resyncing UIDs".format(folder_name))
-        raise NotImplementedError
-        return previous_state
+        account_id = crispin_client.account_id
+        with get_scheduler().admitted(account_id, 'poll'), \
+                crispin_client.pool.get() as c:
+            # don't check UIDVALIDITY; we know it's changed
+            crispin_client.select_folder(folder_name,
+                    lambda folder, select_info: select_info, c)
+        num_forgotten = account.forget_uids(account_id, db_session,
+                folder_name)
+        account.update_uidvalidity(account_id, db_session, folder_name,
+                crispin_client.selected_uidvalidity,
+                crispin_client.selected_highestmodseq)
+        db_session.commit()
+        log.info("Forgot {0} UIDs in {1}; downloading it again".format(
+            num_forgotten, folder_name))
+        return 'initial'
     return resync_uids
 
 @retry
@@ -208,18 +249,41 @@ def base_initial_sync(crispin_client, db_session, log, folder_name,
     This method may be retried as many times as you like; it will pick up where
     it left off, delete removed messages if things disappear between restarts,
     and only complete once we have all the UIDs in the given folder locally.
+
+    With headers_first set, only message headers are downloaded here, so
+    the mailbox is usable quickly; the FolderSync substate then moves on to
+    'bodies' and base_poll backfills message bodies newest-first.
     """
     log.info('Starting initial sync for {0}'.format(folder_name))
+    account_id = crispin_client.account_id
 
-    local_uids = account.all_uids(crispin_client.account_id,
-            db_session, folder_name)
+    local_uids = account.all_uids(account_id, db_session, folder_name)
+    substate = account.get_sync_substate(account_id, db_session, folder_name)
 
-    with crispin_client.pool.get() as c:
+    with get_scheduler().admitted(account_id, 'initial',
+            1 + crispin_client.extra_downloaders), \
+            crispin_client.pool.get() as c:
         crispin_client.select_folder(folder_name,
-                uidvalidity_callback(db_session, crispin_client.account_id), c)
+                uidvalidity_callback(db_session, account_id), c)
+
+        # clients catch up on an initial sync wholesale, so they don't
+        # need a revision for every row
+        with coarse_revisions(db_session,
+                config.get('COARSE_SYNC_REVISIONS', False)):
+            if shared_state.get('headers_first'):
+                account.set_sync_substate(account_id, db_session,
+                        folder_name, 'headers')
+                db_session.commit()
+                with crispin_client.fetching_headers_only():
+                    initial_sync_fn(crispin_client, db_session, log,
+                            folder_name, shared_state, local_uids, c)
+            else:
+                initial_sync_fn(crispin_client, db_session, log, folder_name,
+                        shared_state, local_uids, c)
 
-        initial_sync_fn(crispin_client, db_session, log, folder_name,
-                shared_state, local_uids, c)
+    if shared_state.get('headers_first') or substate is not None:
+        account.set_sync_substate(account_id, db_session, folder_name,
+                'bodies')
 
     verify_db(crispin_client, db_session)
 
@@ -235,62 +299,167 @@ def base_poll(crispin_client, db_session, log, folder_name, shared_state,
     """ It checks for changed message metadata and new messages using
         CONDSTORE / HIGHESTMODSEQ and also checks for deleted messages.
 
+        If the server supports QRESYNC, changes and expunges since the last
+        HIGHESTMODSEQ come back in a single UID FETCH, so we only list every
+        UID in the folder every full_sweep_frequency seconds as a safety net.
+
+        Between polls we IDLE on the Inbox if the server supports it, so new
+        mail shows up right away; other folders (and servers without IDLE)
+        are polled every poll_frequency seconds.
+
         We may wish to frob update frequencies based on which folder
         a user has visible in the UI as well, and whether or not a user
         is actually logged in on any devices.
     """
     log.info("polling {0}".format(folder_name))
 
-    with crispin_client.pool.get() as c:
+    last_sweeps = shared_state['last_full_sweep']
+    full_sweep = time.time() - last_sweeps.get(folder_name, 0) >= \
+            shared_state['full_sweep_frequency']
+
+    with get_scheduler().admitted(crispin_client.account_id, 'poll'), \
+            crispin_client.pool.get() as c:
         saved_validity = account.get_uidvalidity(crispin_client.account_id,
                 db_session, folder_name)
         # we use status instead of select here because it's way faster and
         # we're not sure we want to commit to an IMAP session yet
         status = crispin_client.folder_status(folder_name, c)
-        if status['HIGHESTMODSEQ'] > saved_validity.highestmodseq:
+        if status['HIGHESTMODSEQ'] > saved_validity.highestmodseq or \
+                (full_sweep and crispin_client.qresync_supported(c)):
             crispin_client.select_folder(folder_name,
                     uidvalidity_callback(db_session,
                         crispin_client.account_id), c)
             highestmodseq_update(crispin_client, db_session, log, folder_name,
                     saved_validity.highestmodseq,
                     shared_state['status_cb'], highestmodseq_fn,
-                    shared_state['syncmanager_lock'], c)
+                    shared_state['syncmanager_lock'], c,
+                    full_sweep=full_sweep)
+            if full_sweep:
+                last_sweeps[folder_name] = time.time()
 
         shared_state['status_cb'](
             crispin_client.account_id, 'poll',
             (folder_name, datetime.utcnow().isoformat()))
+        use_idle = shared_state.get('use_idle') and \
+                folder_name.upper() == 'INBOX' and \
+                crispin_client.idle_supported(c)
+
+    # backfill is lower priority than everyone's polls, so it queues
+    # separately
+    backfilling = False
+    if account.get_sync_substate(crispin_client.account_id, db_session,
+            folder_name) == 'bodies':
+        with get_scheduler().admitted(crispin_client.account_id,
+                'backfill'), crispin_client.pool.get() as c:
+            backfilling = backfill_bodies(crispin_client, db_session, log,
+                    folder_name, shared_state, c)
+
+    # don't hog a pool connection while we wait, and come straight back if
+    # we're making progress on backfilling bodies
+    if backfilling:
+        return 'poll'
+    if use_idle:
+        changes = crispin_client.idle(folder_name,
+                crispin_client.IDLE_TIMEOUT)
+        if changes:
+            log.info("IDLE woke up on {0}: {1}".format(folder_name, changes))
+    else:
         sleep(shared_state['poll_frequency'])
 
     return 'poll'
 
+def backfill_bodies(crispin_client, db_session, log, folder_name,
+        shared_state, c):
+    """ Download bodies for one batch of messages created by a header-first
+        initial sync, most recent first. Returns whether it filled any in;
+        once there are none left it clears the FolderSync substate.
+    """
+    account_id = crispin_client.account_id
+    uids = account.headers_only_uids(account_id, db_session, folder_name,
+            limit=crispin_client.BACKFILL_BATCH_SIZE)
+    if not uids:
+        log.info("Finished backfilling message bodies for {0}".format(
+            folder_name))
+        account.set_sync_substate(account_id, db_session, folder_name, None)
+        db_session.commit()
+        return False
+
+    crispin_client.select_folder(folder_name,
+            uidvalidity_callback(db_session, account_id), c)
+    raw_messages = safe_download(crispin_client, log, uids, c)
+    with shared_state['syncmanager_lock']:
+        imapuid_for = dict((item.msg_uid, item) for item in \
+                db_session.query(ImapUid).filter(
+                    ImapUid.imapaccount_id==account_id,
+                    ImapUid.folder_name==folder_name,
+                    ImapUid.msg_uid.in_(uids)))
+        # uid and body are the first and fourth elements for both IMAP and
+        # Gmail raw messages
+        filled = [imapuid_for[msg[0]] for msg in raw_messages \
+                if msg[0] in imapuid_for and account.fill_message_body(
+                    db_session, log, imapuid_for[msg[0]], msg[3])]
+        commit_uids(db_session, log, filled)
+        # otherwise we'd keep asking for messages that aren't there
+        remove_uids(account_id, db_session, log, folder_name,
+                UIDSet(uids) - [msg[0] for msg in raw_messages])
+    log.info("Backfilled {0} message bodies in {1}".format(len(filled),
+        folder_name))
+    return bool(filled)
+
 def highestmodseq_update(crispin_client, db_session, log, folder_name,
-        last_highestmodseq, status_cb, highestmodseq_fn, syncmanager_lock, c):
+        last_highestmodseq, status_cb, highestmodseq_fn, syncmanager_lock, c,
+        full_sweep=True):
+    """ Without QRESYNC (or when full_sweep is set) we list every UID in the
+        folder to find deleted messages. With QRESYNC the server tells us
+        which UIDs vanished and sends the new flags along with the changed
+        UIDs, so the cost is proportional to what changed.
+    """
     account_id = crispin_client.account_id
     new_highestmodseq = crispin_client.selected_highestmodseq
     new_uidvalidity = crispin_client.selected_uidvalidity
     log.info("Starting highestmodseq update on {0} (current HIGHESTMODSEQ: {1})".format(folder_name, new_highestmodseq))
     local_uids = account.all_uids(account_id, db_session, folder_name)
-    changed_uids = crispin_client.new_and_updated_uids(last_highestmodseq, c)
-    remote_uids = crispin_client.all_uids(c)
+
+    if not full_sweep and crispin_client.qresync_supported(c):
+        changed_flags, vanished = crispin_client.changed_since(
+                last_highestmodseq, c)
+        changed_uids = changed_flags.keys()
+        log.info("QRESYNC: {0} changed and {1} vanished UIDs".format(
+            len(changed_uids), len(vanished)))
+        local_uids = local_uids - remove_uids(account_id, db_session, log,
+                folder_name, local_uids & vanished)
+        remote_uids = None
+    else:
+        changed_uids = crispin_client.new_and_updated_uids(
+                last_highestmodseq, c)
+        changed_flags = None
+        remote_uids = crispin_client.all_uids(c)
 
     if changed_uids:
         new, updated = new_or_updated(changed_uids, local_uids)
         log.info("{0} new and {1} updated UIDs".format(len(new), len(updated)))
-        local_uids += new
-        local_uids = set(local_uids).difference(
-                remove_deleted_uids(account_id, db_session, log, folder_name,
-                    local_uids, remote_uids, c))
-
-        update_metadata(crispin_client, db_session, log, folder_name,
-                updated, c)
+        local_uids = local_uids | new
+        if remote_uids is not None:
+            local_uids = local_uids - remove_deleted_uids(account_id,
+                    db_session, log, folder_name, local_uids, remote_uids, c)
+
+        if changed_flags is None:
+            update_metadata(crispin_client, db_session, log, folder_name,
+                    updated, c)
+        elif updated:
+            # we already have the flags; no need to ask again
+            account.update_metadata(account_id, db_session, folder_name,
+                    updated, dict((uid, changed_flags[uid]) for uid in updated))
+            db_session.commit()
 
         highestmodseq_fn(crispin_client, db_session, log, folder_name,
                 changed_uids, local_uids, status_cb, syncmanager_lock, c)
     else:
         log.info("No new or updated messages")
 
-    remove_deleted_uids(crispin_client.account_id, db_session, log,
-            folder_name, local_uids, remote_uids, c)
+    if remote_uids is not None:
+        remove_deleted_uids(crispin_client.account_id, db_session, log,
+                folder_name, local_uids, remote_uids, c)
     account.update_uidvalidity(account_id, db_session, folder_name,
             new_uidvalidity, new_highestmodseq)
     db_session.commit()
@@ -298,8 +467,8 @@ def highestmodseq_update(crispin_client, db_session, log, folder_name,
 def imap_highestmodseq_update(crispin_client, db_session, log, folder_name,
         uids, local_uids, status_cb, syncmanager_lock, c):
     chunked_uid_download(crispin_client, db_session, log, folder_name, uids, 0,
-            len(uids), status_cb, download_and_commit_uids,
-            account.create_message, syncmanager_lock, c)
+            len(uids), status_cb, syncmanager_lock, commit_raw_messages,
+            account.create_message, c)
 
 def uidvalidity_callback(db_session, account_id):
     def fn(folder, select_info):
@@ -325,21 +494,20 @@ def imap_initial_sync(crispin_client, db_session, log, folder_name,
         shared_state, local_uids, c):
     check_flags(crispin_client, db_session, folder_name, local_uids, c)
 
-    remote_uids = crispin_client.all_uids()
+    remote_uids = crispin_client.all_uids(c)
     log.info("Found {0} UIDs for folder {1}".format(len(remote_uids),
         folder_name))
     log.info("Already have {0} UIDs".format(len(local_uids)))
 
-    local_uids = set(local_uids).difference(
-            remove_deleted_uids(crispin_client.account_id, db_session, log,
-                folder_name, local_uids, remote_uids, c))
+    local_uids = local_uids - remove_deleted_uids(crispin_client.account_id,
+            db_session, log, folder_name, local_uids, remote_uids, c)
 
-    unknown_uids = set(remote_uids).difference(set(local_uids))
+    unknown_uids = remote_uids - local_uids
 
     chunked_uid_download(crispin_client, db_session, log, folder_name,
             unknown_uids, len(local_uids), len(remote_uids),
-            shared_state['status_cb'], download_and_commit_uids,
-            account.create_message, c)
+            shared_state['status_cb'], shared_state['syncmanager_lock'],
+            commit_raw_messages, account.create_message, c)
 
 def check_flags(crispin_client, db_session, folder_name, local_uids, c):
     """
@@ -358,35 +526,149 @@ def check_flags(crispin_client, db_session, folder_name, local_uids, c):
 
 def chunked_uid_download(crispin_client, db_session, log,
         folder_name, uids, num_local_messages, num_total_messages, status_cb,
-        syncmanager_lock, download_commit_fn, msg_create_fn, c):
+        syncmanager_lock, commit_fn, msg_create_fn, c):
+    """ commit_fn(crispin_client, db_session, log, folder_name, raw_messages,
+        msg_create_fn, syncmanager_lock) creates and commits objects for a
+        list of parsed raw messages, returning how many were new.
+    """
     log.info("{0} uids left to fetch".format(len(uids)))
 
     if uids:
-        chunk_size = crispin_client.CHUNK_SIZE
-        log.info("Starting sync for {0} with chunks of size {1}"\
-                .format(folder_name, chunk_size))
         # we prioritize message download by reverse-UID order, which
         # generally puts more recent messages first
-        for uids in chunk(reversed(uids), chunk_size):
-            num_local_messages += download_commit_fn(crispin_client,
-                    db_session, log, folder_name, uids, msg_create_fn,
-                    syncmanager_lock, c)
+        uids = sorted(uids, reverse=True)
+        if crispin_client.ADAPTIVE_BATCHING:
+            batcher = crispin_client.fetch_batcher
+            log.info("Starting sync for {0} with adaptive batches of up to "
+                    "{1} bytes / {2} messages".format(folder_name,
+                        batcher.budget, batcher.max_count))
+            # header-only fetches are tiny; the message count cap applies
+            sizes = dict() if getattr(crispin_client, 'headers_only', False) \
+                    else crispin_client.sizes(uids, c)
+            batches = batcher.batches(uids, sizes)
+        else:
+            chunk_size = crispin_client.CHUNK_SIZE
+            log.info("Starting sync for {0} with chunks of size {1}"\
+                    .format(folder_name, chunk_size))
+            batches = chunk(uids, chunk_size)
+        # Download, parse and commit run as separate pipeline stages, so
+        # the connection keeps fetching while we parse and commit.
+        batches = iter(batches)
+        downloads = [safe_pipelined_download(crispin_client, log, batches, c)]
+        downloads.extend(extra_download(crispin_client, log, batches) \
+                for _ in xrange(crispin_client.extra_downloaders))
+        sync_pipeline = SyncPipeline((crispin_client.account_id, folder_name),
+                downloads,
+                lambda raw_messages: parse_raw_messages(
+                    crispin_client.account_id, log, folder_name,
+                    raw_messages),
+                lambda raw_messages: commit_fn(crispin_client, db_session,
+                    log, folder_name, raw_messages, msg_create_fn,
+                    syncmanager_lock))
+        for num_new in sync_pipeline.run():
+            num_local_messages += num_new
 
             percent_done = (num_local_messages / num_total_messages) * 100
             status_cb(crispin_client.account_id,
                     'initial', (folder_name, percent_done))
             log.info("Syncing %s -- %.2f%% (%i/%i)" % (folder_name,
                 percent_done, num_local_messages, num_total_messages))
+        if crispin_client.ADAPTIVE_BATCHING:
+            log_fetch_stats(crispin_client, log)
+        log_pipeline_stats(log, folder_name, sync_pipeline)
         log.info("Saved all messages and metadata on {0} to UIDVALIDITY {1} / HIGHESTMODSEQ {2}".format(folder_name, crispin_client.selected_uidvalidity, crispin_client.selected_highestmodseq))
 
+def log_pipeline_stats(log, folder_name, sync_pipeline):
+    for stage, stats in sorted(sync_pipeline.stats()['stages'].iteritems()):
+        log.info("{0} {1} stage: {2} messages in {3} batches, {4}s busy "
+                "({5} msgs/sec) across {6} workers".format(folder_name, stage,
+                    stats['messages'], stats['batches'], stats['seconds'],
+                    stats['messages_per_sec'], stats['workers']))
+
+def log_fetch_stats(crispin_client, log):
+    stats = crispin_client.fetch_batcher.summary()
+    log.info("Fetched {0} batches from {1}: {2}-{3} messages per batch "
+            "(mean {4:.1f}), {5} bytes in {6:.1f}s ({7:.0f} bytes/sec), "
+            "{8} failures, current budget {9} bytes".format(
+                stats['batches'], crispin_client.selected_folder_name,
+                stats['min_batch'], stats['max_batch'], stats['mean_batch'],
+                stats['bytes'], stats['seconds'], stats['bytes_per_sec'],
+                stats['failures'], stats['budget']))
+
 def safe_download(crispin_client, log, uids, c):
+    """ Download the given UIDs, feeding throughput (or failure) back into
+        the selected folder's adaptive batcher.
+
+        Failures are re-raised so @retry hands us a fresh connection; the
+        smaller budget sticks around on the crispin client.
+    """
+    _, raw_messages = _tracked_download(crispin_client, log,
+            "UIDs {0}".format(uids), lambda: (uids, crispin_client.uids(uids, c)))
+    return raw_messages
+
+def safe_pipelined_download(crispin_client, log, uid_batches, c):
+    """ Like safe_download, but for a sequence of batches downloaded with
+        crispin_client.pipelined_uids(). Yields (uids, raw_messages).
+
+        Nothing else may be sent over c until this generator is exhausted.
+        Closing it early discards c if there are FETCHes still in flight.
+    """
+    downloads = crispin_client.pipelined_uids(uid_batches, c)
     try:
-        raw_messages = crispin_client.uids(uids, c)
+        while True:
+            try:
+                uids, raw_messages = _tracked_download(crispin_client, log,
+                        "pipelined batch", downloads.next)
+            except StopIteration:
+                return
+            yield uids, raw_messages
+    finally:
+        downloads.close()
+
+def extra_download(crispin_client, log, uid_batches):
+    """ Like safe_pipelined_download, but over a connection of its own, so
+        several can share one iterator of batches.
+
+        Holds on to a connection from the account's pool until done. If
+        it's killed or closed partway through, the connection is discarded
+        rather than going back to the pool with FETCHes still in flight.
+    """
+    folder_name = crispin_client.selected_folder_name
+    with crispin_client.pool.get() as c:
+        # don't clobber the selected folder info everyone else is using
+        select_info = crispin_client._do_select_folder(folder_name, c)
+        if select_info['UIDVALIDITY'] != crispin_client.selected_uidvalidity:
+            raise UIDInvalid("folder: {0}, remote uidvalidity: {1}, "
+                    "expected uidvalidity: {2}".format(folder_name,
+                        select_info['UIDVALIDITY'],
+                        crispin_client.selected_uidvalidity))
+        downloads = safe_pipelined_download(crispin_client, log,
+                uid_batches, c)
+        # close before the pool gets c back, not whenever it's collected
+        with closing(downloads):
+            for uids, raw_messages in downloads:
+                yield uids, raw_messages
+
+def _tracked_download(crispin_client, log, description, download):
+    batcher = crispin_client.fetch_batcher
+    start = time.time()
+    try:
+        uids, raw_messages = download()
     except MemoryError, e:
-        log.error("Ran out of memory while fetching UIDs %s" % uids)
+        log.error("Ran out of memory while fetching {0}".format(description))
+        batcher.failed()
+        raise e
+    except socket.timeout, e:
+        log.error("Timed out while fetching {0}".format(description))
+        batcher.failed()
         raise e
 
-    return raw_messages
+    # body is the fourth element for both IMAP and Gmail raw messages
+    num_bytes = sum(len(msg[3]) for msg in raw_messages)
+    batcher.record(len(raw_messages), num_bytes, time.time() - start)
+    get_scheduler().throttle(num_bytes)
+
+    return uids, raw_messages
 
 def create_db_objects(account_id, db_session, log, folder_name, raw_messages,
         msg_create_fn):
@@ -399,13 +681,50 @@ def create_db_objects(account_id, db_session, log, folder_name, raw_messages,
         uid = msg_create_fn(db_session, log, acc, folder_name, *msg)
         if uid is not None:
             new_imapuids.append(uid)
+    account.count_new_uids(account_id, db_session, folder_name, new_imapuids)
 
     # imapuid, message, thread, labels
     return new_imapuids
 
+def parse_raw_messages(account_id, log, folder_name, raw_messages):
+    """ Parse the bodies of raw_messages across the parse workers at once,
+        swapping in ParsedMessages. Unparseable messages are logged and
+        dropped.
+    """
+    # PartialMessages are parsed piecemeal by create_partial_message
+    to_parse = [msg for msg in raw_messages \
+            if not isinstance(msg[3], PartialMessage)]
+    if not to_parse:
+        return raw_messages
+    parsed = dict((msg[0], result) for msg, result in \
+            zip(to_parse, parse_many([msg[3] for msg in to_parse])))
+
+    result = []
+    for msg in raw_messages:
+        uid = msg[0]
+        if uid not in parsed:
+            result.append(msg)
+        elif parsed[uid] is None:
+            account.log_parse_error(log, account_id, folder_name, uid, msg[3])
+        else:
+            result.append(tuple(msg[:3]) + (parsed[uid],) + tuple(msg[4:]))
+    return result
+
 def download_and_commit_uids(crispin_client, db_session, log, folder_name,
-        uids, msg_create_fn, syncmanager_lock, c):
-    raw_messages = safe_download(crispin_client, log, uids, c)
+        uids, msg_create_fn, syncmanager_lock, c, raw_messages=None):
+    """ raw_messages may be passed in if the caller already downloaded them
+        (e.g. over a pipelined connection).
+    """
+    if raw_messages is None:
+        raw_messages = safe_download(crispin_client, log, uids, c)
+    # parse before taking the lock so other folders can keep committing
+    raw_messages = parse_raw_messages(crispin_client.account_id, log,
+            folder_name, raw_messages)
+    return commit_raw_messages(crispin_client, db_session, log, folder_name,
+            raw_messages, msg_create_fn, syncmanager_lock)
+
+def commit_raw_messages(crispin_client, db_session, log, folder_name,
+        raw_messages, msg_create_fn, syncmanager_lock):
     with syncmanager_lock:
         new_imapuids = create_db_objects(crispin_client.account_id, db_session,
                 log, folder_name, raw_messages, msg_create_fn)
@@ -413,12 +732,20 @@ def download_and_commit_uids(crispin_client, db_session, log, folder_name,
         return len(new_imapuids)
 
 def commit_uids(db_session, log, new_imapuids):
-    new_messages = [item.message for item in new_imapuids]
-
     # Save message part blobs before committing changes to db.
+    save_message_parts(log, [item.message for item in new_imapuids])
+
+    db_session.add_all(new_imapuids)
+    db_session.commit()
+
+    # NOTE: indexing temporarily disabled because xapian is leaking fds :/
+    # trigger_index_update(self.account.namespace.id)
+
+def save_message_parts(log, new_messages):
     for msg in new_messages:
         threads = [Greenlet.spawn(part.save, part._data) \
-                for part in msg.parts if hasattr(part, '_data')]
+                for part in msg.parts if getattr(part, '_data', None) \
+                        is not None]
         # Fatally abort if part saves error out. Messages in this
         # chunk will be retried when the sync is restarted.
         gevent_check_join(log, threads,
@@ -429,12 +756,6 @@ def commit_uids(db_session, log, new_imapuids):
 
     garbage_collect()
 
-    db_session.add_all(new_imapuids)
-    db_session.commit()
-
-    # NOTE: indexing temporarily disabled because xapian is leaking fds :/
-    # trigger_index_update(self.account.namespace.id)
-
 def remove_deleted_uids(account_id, db_session, log, folder_name,
         local_uids, remote_uids, c):
     """ Works as follows:
@@ -444,12 +765,14 @@ def remove_deleted_uids(account_id, db_session, log, folder_name,
         3. Purge messages we have locally but not on the server. Ignore
             messages we have on the server that aren't local.
     """
-    if len(remote_uids) > 0 and len(local_uids) > 0:
-        assert type(remote_uids[0]) != type('')
+    return remove_uids(account_id, db_session, log, folder_name,
+            UIDSet(local_uids) - remote_uids)
 
-    to_delete = set(local_uids).difference(set(remote_uids))
+def remove_uids(account_id, db_session, log, folder_name, to_delete):
+    """ Purge the given local UIDs; returns them for convenience. """
     if to_delete:
-        account.remove_messages(account_id, db_session, to_delete, folder_name)
+        account.remove_messages(account_id, db_session, list(to_delete),
+                folder_name)
         db_session.commit()
 
         log.info("Deleted {0} removed messages from {1}".format(
@@ -0,0 +1,211 @@
+""" Sync leases: which host syncs which account.
+
+Every account with sync turned on has a SyncLease row. A host syncs an
+account only while it holds that account's lease, and it has to renew the
+lease every so often or lose it. If a host dies, its leases run out after
+SYNC_LEASE_TTL seconds, and any other host can claim them. Turning sync
+off for an account deletes its row; the host that held it notices at its
+next renewal and stops.
+
+Each host runs a LeaseKeeper. Every ttl / 3 seconds it does a round:
+
+ 1. Heartbeat the host's SyncHost row, which advertises its capacity
+    (SYNC_HOST_CAPACITY accounts).
+ 2. Renew the leases it holds, and stop syncing any it has lost.
+ 3. Work out its fair share of all the leases: total * its capacity /
+    total capacity of hosts that have heartbeated recently. If it holds
+    more than its share, it releases the surplus for other hosts to claim.
+ 4. If it holds fewer than its share, it claims its own unexpired leases
+    from before a restart first, then orphans.
+
+Claims are single conditional UPDATEs, so two hosts can't both win one.
+Times come from the database, so clock skew between hosts doesn't matter.
+"""
+import math
+import socket
+
+from datetime import timedelta
+
+from gevent import Greenlet, sleep
+from sqlalchemy import func, or_, select
+
+from ..config import config
+from ..log import get_logger
+from ..models import session_scope
+from ..models.tables import SyncLease, SyncHost
+
+def db_now(db_session):
+    return db_session.execute(select([func.now()])).scalar()
+
+class LeaseKeeper(object):
+    """ Claims, renews and sheds sync leases for this host.
+
+        start_fn(account_id) starts syncing an account we've just claimed
+        and returns whether that worked; stop_fn(account_id) stops syncing
+        one we've lost or given up.
+    """
+    def __init__(self, start_fn, stop_fn, hostname=None, capacity=None,
+            ttl=None):
+        self.log = get_logger()
+        self.start_fn = start_fn
+        self.stop_fn = stop_fn
+        self.hostname = hostname or config.get('SYNC_HOSTNAME') or \
+                socket.getfqdn()
+        self.capacity = int(capacity or config.get('SYNC_HOST_CAPACITY', 1000))
+        self.ttl = timedelta(seconds=int(ttl or config.get('SYNC_LEASE_TTL',
+            60)))
+        # account_ids we hold leases for
+        self.held = set()
+        self.share = None
+
+    def start(self):
+        """ Start doing rounds in the background, beginning with one now. """
+        self.round()
+        return Greenlet.spawn(self._run)
+
+    def _run(self):
+        while True:
+            sleep(self.ttl.total_seconds() / 3)
+            try:
+                self.round()
+            except Exception, e:
+                self.log.error("Sync lease round failed: {0}".format(e))
+
+    def acquire(self, account_id):
+        """ Turn sync on for account_id and try to claim it. Returns None if
+            we now hold it, else the host that does.
+        """
+        with session_scope() as db_session:
+            if db_session.query(SyncLease).filter_by(
+                    imapaccount_id=account_id).first() is None:
+                db_session.add(SyncLease(imapaccount_id=account_id))
+                db_session.commit()
+            if self._claim(db_session, account_id):
+                self.held.add(account_id)
+                return None
+            return db_session.query(SyncLease.host).filter_by(
+                    imapaccount_id=account_id).scalar()
+
+    def drop(self, account_id):
+        """ Turn sync off for account_id. Whoever holds it stops at their
+            next renewal; call stop_fn yourself if it's us.
+        """
+        with session_scope() as db_session:
+            db_session.query(SyncLease).filter_by(
+                    imapaccount_id=account_id).delete()
+        self.held.discard(account_id)
+
+    def release(self, account_id):
+        """ Give up our lease on account_id, leaving sync on for another
+            host to pick up.
+        """
+        with session_scope() as db_session:
+            self._release(db_session, account_id)
+
+    def round(self):
+        with session_scope() as db_session:
+            now = db_now(db_session)
+            self._heartbeat(db_session, now)
+            self._renew(db_session, now)
+            self.share = self._fair_share(db_session, now)
+
+            for account_id in sorted(self.held)[self.share:]:
+                self.log.info("Shedding sync for account {0}".format(
+                    account_id))
+                self.stop_fn(account_id)
+                self._release(db_session, account_id)
+
+            wanted = self.share - len(self.held)
+            if wanted > 0:
+                for account_id in self._claimable(db_session, now, wanted):
+                    if not self._claim(db_session, account_id):
+                        # someone else got it first
+                        continue
+                    self.held.add(account_id)
+                    self.log.info("Claimed sync for account {0}".format(
+                        account_id))
+                    if not self.start_fn(account_id):
+                        self._release(db_session, account_id)
+
+    def _heartbeat(self, db_session, now):
+        host = db_session.query(SyncHost).filter_by(
+                hostname=self.hostname).first()
+        if host is None:
+            host = SyncHost(hostname=self.hostname)
+            db_session.add(host)
+        host.capacity = self.capacity
+        host.heartbeat_at = now
+        db_session.commit()
+
+    def _renew(self, db_session, now):
+        if not self.held:
+            return
+        db_session.query(SyncLease).filter(
+                SyncLease.host==self.hostname,
+                SyncLease.imapaccount_id.in_(self.held)).update(
+                        dict(expires_at=now + self.ttl, renewed_at=now),
+                        synchronize_session=False)
+        db_session.commit()
+        still_held = set(account_id for account_id, in \
+                db_session.query(SyncLease.imapaccount_id).filter(
+                    SyncLease.host==self.hostname,
+                    SyncLease.imapaccount_id.in_(self.held)))
+        for account_id in self.held - still_held:
+            # expired and claimed elsewhere, or sync turned off
+            self.log.warning("Lost sync lease for account {0}".format(
+                account_id))
+            self.stop_fn(account_id)
+        self.held = still_held
+
+    def _fair_share(self, db_session, now):
+        """ Our capacity's fraction of all the leases, rounded up, and
+            never more than our capacity.
+        """
+        total_leases = db_session.query(func.count(SyncLease.id)).scalar()
+        total_capacity = db_session.query(func.sum(SyncHost.capacity))\
+                .filter(SyncHost.heartbeat_at > now - self.ttl).scalar()
+        if not total_capacity:
+            return self.capacity
+        share = int(math.ceil(float(total_leases) * self.capacity / \
+                int(total_capacity)))
+        return min(share, self.capacity)
+
+    def _claimable(self, db_session, now, limit):
+        """ Our own leases first (e.g. from before a restart), then leases
+            nobody holds, then ones whose host has stopped renewing.
+        """
+        query = db_session.query(SyncLease.imapaccount_id).filter(or_(
+            SyncLease.host==self.hostname,
+            SyncLease.host==None,
+            SyncLease.expires_at < now))
+        if self.held:
+            query = query.filter(~SyncLease.imapaccount_id.in_(self.held))
+        return [account_id for account_id, in query.order_by(
+            (SyncLease.host==self.hostname).desc(),
+            SyncLease.expires_at).limit(limit)]
+
+    def _claim(self, db_session, account_id):
+        now = db_now(db_session)
+        claimed = db_session.query(SyncLease).filter(
+                SyncLease.imapaccount_id==account_id,
+                or_(SyncLease.host==None,
+                    SyncLease.host==self.hostname,
+                    SyncLease.expires_at < now)).update(
+                            dict(host=self.hostname,
+                                expires_at=now + self.ttl, renewed_at=now),
+                            synchronize_session=False)
+        db_session.commit()
+        return claimed == 1
+
+    def _release(self, db_session, account_id):
+        db_session.query(SyncLease).filter(
+                SyncLease.imapaccount_id==account_id,
+                SyncLease.host==self.hostname).update(
+                        dict(host=None, expires_at=None),
+                        synchronize_session=False)
+        db_session.commit()
+        self.held.discard(account_id)
+
+    def status(self):
+        return dict(hostname=self.hostname, capacity=self.capacity,
+                held=len(self.held), share=self.share)
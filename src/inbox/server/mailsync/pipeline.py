@@ -0,0 +1,185 @@
+""" Staged download -> parse -> persist pipeline for bulk message sync.
+
+Downloading, parsing and committing a batch of messages used to happen
+strictly in sequence, so the IMAP connection sat idle while we parsed and
+the parser sat idle while MySQL committed. A SyncPipeline runs each step as
+its own stage instead:
+
+    downloaders --[raw queue]--> parsers --[parsed queue]--> writer
+
+Downloader greenlets each drain an iterator of (uids, raw_messages)
+batches, usually one per IMAP connection. Parser greenlets hand batches to
+the parse worker pool. The writer runs in the calling greenlet (it owns the
+db session) and commits everything that's ready in one transaction, up to
+commit_batch messages at a time.
+
+The queues are bounded, so a slow stage makes the ones before it wait
+instead of buffering the whole folder in memory. Any stage failing stops
+the whole pipeline and re-raises in the caller, so @retry still works.
+
+Per-stage stats for every running pipeline are in `running` and show up in
+SyncService.status().
+"""
+import sys
+import time
+
+from gevent import Greenlet, joinall, killall
+from gevent.queue import Queue, Empty
+
+from ..config import config
+
+# (account_id, folder_name) -> SyncPipeline
+running = dict()
+
+class _Done(object):
+    """ Sent to each parser, and on to the writer, once every downloader is
+        finished.
+    """
+    pass
+
+class _Failed(object):
+    """ Sent downstream in place of a batch when a worker dies. """
+    def __init__(self, exc_info):
+        self.exc_info = exc_info
+
+class Stage(object):
+    """ Bookkeeping for one pipeline stage and the queue it feeds. """
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.queue = Queue(queue_size) if queue_size else None
+        self.batches = 0
+        self.messages = 0
+        # time spent working, summed over workers; excludes waiting on
+        # queues
+        self.seconds = 0.0
+
+    def record(self, num_messages, elapsed):
+        self.batches += 1
+        self.messages += num_messages
+        self.seconds += elapsed
+
+    def stats(self):
+        return dict(workers=self.workers,
+                queue_depth=self.queue.qsize() if self.queue else 0,
+                queue_size=self.queue.maxsize if self.queue else 0,
+                batches=self.batches, messages=self.messages,
+                seconds=round(self.seconds, 3),
+                messages_per_sec=round(self.messages / self.seconds, 1) \
+                        if self.seconds else 0.0)
+
+class SyncPipeline(object):
+    """ downloads is a list of iterables of (uids, raw_messages); each one
+        gets its own greenlet. parse_fn(raw_messages) returns the messages
+        ready to persist, and commit_fn(messages) persists them and returns
+        how many were new.
+
+        Stage concurrency and queue sizes default to the PIPELINE_PARSERS,
+        PIPELINE_QUEUE_SIZE and PIPELINE_COMMIT_BATCH config values.
+    """
+    def __init__(self, key, downloads, parse_fn, commit_fn, parsers=None,
+            queue_size=None, commit_batch=None):
+        self.key = key
+        self.downloads = downloads
+        self.parse_fn = parse_fn
+        self.commit_fn = commit_fn
+        parsers = parsers or int(config.get('PIPELINE_PARSERS', 2))
+        queue_size = queue_size or int(config.get('PIPELINE_QUEUE_SIZE', 4))
+        self.commit_batch = commit_batch or \
+                int(config.get('PIPELINE_COMMIT_BATCH', 500))
+
+        self.download = Stage('download', len(downloads), queue_size)
+        self.parse = Stage('parse', parsers, queue_size)
+        self.write = Stage('write', 1, None)
+        self.started = None
+
+    def stats(self):
+        return dict(started=self.started,
+                stages=dict((stage.name, stage.stats()) for stage in \
+                        (self.download, self.parse, self.write)))
+
+    def run(self):
+        """ Generator that runs the pipeline to completion, yielding the
+            number of new messages after each commit.
+
+            On the way out, stages that are still running are killed, and
+            the download iterators closed. Downloads over IMAP discard
+            their connection if that leaves FETCHes in flight.
+        """
+        self.started = time.time()
+        downloaders = [Greenlet.spawn(self._download, batches) for batches \
+                in self.downloads]
+        greenlets = downloaders + \
+                [Greenlet.spawn(self._end_downloads, downloaders)] + \
+                [Greenlet.spawn(self._parse) for _ in \
+                    xrange(self.parse.workers)]
+        running[self.key] = self
+        try:
+            for num_new in self._write(self.parse.workers):
+                yield num_new
+        finally:
+            running.pop(self.key, None)
+            killall(greenlets, block=True)
+
+    def _download(self, batches):
+        batches = iter(batches)
+        try:
+            while True:
+                start = time.time()
+                try:
+                    _, raw_messages = batches.next()
+                except StopIteration:
+                    return
+                self.download.record(len(raw_messages), time.time() - start)
+                self.download.queue.put(raw_messages)
+        except Exception:
+            self.download.queue.put(_Failed(sys.exc_info()))
+        finally:
+            # If we were killed while waiting on the queue, this is what
+            # lets a download generator give its connection back.
+            if hasattr(batches, 'close'):
+                batches.close()
+
+    def _end_downloads(self, downloaders):
+        joinall(downloaders)
+        for _ in xrange(self.parse.workers):
+            self.download.queue.put(_Done())
+
+    def _parse(self):
+        try:
+            while True:
+                raw_messages = self.download.queue.get()
+                if isinstance(raw_messages, (_Done, _Failed)):
+                    self.parse.queue.put(raw_messages)
+                    return
+                start = time.time()
+                messages = self.parse_fn(raw_messages)
+                self.parse.record(len(messages), time.time() - start)
+                self.parse.queue.put(messages)
+        except Exception:
+            self.parse.queue.put(_Failed(sys.exc_info()))
+
+    def _write(self, num_parsers):
+        while num_parsers:
+            to_commit = []
+            batch = self.parse.queue.get()
+            # batch up whatever else is ready, without waiting for more
+            while True:
+                if isinstance(batch, _Failed):
+                    raise batch.exc_info[0], batch.exc_info[1], \
+                            batch.exc_info[2]
+                elif isinstance(batch, _Done):
+                    num_parsers -= 1
+                else:
+                    to_commit.extend(batch)
+                if not num_parsers or len(to_commit) >= self.commit_batch:
+                    break
+                try:
+                    batch = self.parse.queue.get_nowait()
+                except Empty:
+                    break
+            if to_commit:
+                start = time.time()
+                num_new = self.commit_fn(to_commit)
+                self.write.record(len(to_commit), time.time() - start)
+                yield num_new
@@ -0,0 +1,255 @@
+""" Host-wide admission control for sync work.
+
+Every account's sync runs in its own greenlets, so without something in
+the middle, restarting a host with thousands of accounts starts thousands
+of initial syncs at once. Sync code asks the scheduler for a slot before
+doing IMAP work:
+
+    with get_scheduler().admitted(account_id, 'poll'):
+        ...
+
+and blocks until it fits under the host's limits on concurrent initial
+syncs and IMAP connections. Downloads also report the bytes they fetched
+with throttle(), which sleeps as needed to keep the whole host under a
+bandwidth cap.
+
+Waiting work is served in priority order (polls, then backfill, then
+initial syncs), and a quarter of the connections are kept for polls.
+Within a priority class, requests are served by weighted fair queueing
+across accounts: each one gets a virtual finish time of max(class virtual
+time, the account's last finish time) + 1 / weight, and the smallest goes
+first. An account with weight 2 gets twice the share of a busy class as
+one with weight 1, and an account that has been idle doesn't get to bank
+credit.
+"""
+import time
+import heapq
+import itertools
+
+from contextlib import contextmanager
+
+from gevent import sleep
+from gevent.event import Event
+
+from ..config import config
+
+# lower runs first
+PRIORITIES = {'poll': 0, 'backfill': 1, 'initial': 2}
+
+class _Request(object):
+    def __init__(self, account_id, kind, connections, finish):
+        self.account_id = account_id
+        self.kind = kind
+        self.connections = connections
+        self.finish = finish
+        self.admitted = Event()
+        self.queued_at = time.time()
+
+class SyncScheduler(object):
+    """ max_initial_syncs and max_connections cap concurrent work on this
+        host; max_bandwidth is in bytes per second. None means no limit.
+    """
+    def __init__(self, max_initial_syncs=None, max_connections=None,
+            max_bandwidth=None):
+        self.max_initial_syncs = max_initial_syncs
+        self.max_connections = max_connections
+        self.max_bandwidth = max_bandwidth
+
+        # kind -> heap of (virtual finish, seq, _Request)
+        self._queues = dict((kind, []) for kind in PRIORITIES)
+        # kind -> virtual time
+        self._vtime = dict((kind, 0.0) for kind in PRIORITIES)
+        # (kind, account_id) -> virtual finish time of its last request
+        self._last_finish = dict()
+        self._weights = dict()
+        self._seq = itertools.count()
+
+        self.running_initial_syncs = 0
+        self.connections = 0
+        # account_id -> connections in use
+        self.running = dict()
+        self.admitted_count = dict((kind, 0) for kind in PRIORITIES)
+        self.wait_seconds = dict((kind, 0.0) for kind in PRIORITIES)
+
+        # token bucket for throttle(), one second's worth deep
+        self._tokens = float(max_bandwidth or 0)
+        self._tokens_at = time.time()
+        self.bytes_downloaded = 0
+        self.throttled_seconds = 0.0
+
+    def set_weight(self, account_id, weight):
+        """ Accounts weigh 1 unless told otherwise. """
+        assert weight > 0, "weight must be positive"
+        self._weights[account_id] = float(weight)
+
+    @contextmanager
+    def admitted(self, account_id, kind, connections=1):
+        """ Block until there's room for a unit of work of the given kind
+            for account_id, using this many IMAP connections, then hold the
+            slot until the block exits.
+        """
+        assert kind in PRIORITIES, "unknown kind of sync work: " + kind
+        request = self._enqueue(account_id, kind, connections)
+        try:
+            request.admitted.wait()
+        except BaseException:
+            # killed while waiting; don't leave a ghost in the queue, or
+            # leak the slot if we were admitted just now
+            if request.admitted.is_set():
+                self._release(request)
+            else:
+                self._remove(request)
+            raise
+        try:
+            yield
+        finally:
+            self._release(request)
+
+    def throttle(self, num_bytes):
+        """ Account for num_bytes downloaded, sleeping if that puts the host
+            over its bandwidth limit.
+        """
+        self.bytes_downloaded += num_bytes
+        if not self.max_bandwidth:
+            return
+        now = time.time()
+        self._tokens = min(float(self.max_bandwidth), self._tokens + \
+                (now - self._tokens_at) * self.max_bandwidth)
+        self._tokens_at = now
+        self._tokens -= num_bytes
+        if self._tokens < 0:
+            delay = -self._tokens / self.max_bandwidth
+            self.throttled_seconds += delay
+            sleep(delay)
+
+    def status(self):
+        now = time.time()
+        return dict(
+                limits=dict(initial_syncs=self.max_initial_syncs,
+                    connections=self.max_connections,
+                    bandwidth=self.max_bandwidth),
+                running_initial_syncs=self.running_initial_syncs,
+                connections=self.connections,
+                running=dict(self.running),
+                queued=dict((kind, [dict(account_id=r.account_id,
+                    waiting=round(now - r.queued_at, 1)) for _, _, r in \
+                        sorted(queue)]) for kind, queue in \
+                                self._queues.iteritems()),
+                admitted=dict(self.admitted_count),
+                wait_seconds=dict((kind, round(seconds, 1)) for kind, seconds \
+                        in self.wait_seconds.iteritems()),
+                bytes_downloaded=self.bytes_downloaded,
+                throttled_seconds=round(self.throttled_seconds, 1))
+
+    def _enqueue(self, account_id, kind, connections):
+        weight = self._weights.get(account_id, 1.0)
+        start = max(self._vtime[kind],
+                self._last_finish.get((kind, account_id), 0.0))
+        finish = start + 1 / weight
+        self._last_finish[(kind, account_id)] = finish
+        request = _Request(account_id, kind, connections, finish)
+        heapq.heappush(self._queues[kind], (finish, next(self._seq), request))
+        self._dispatch()
+        return request
+
+    def _fits(self, request):
+        if request.kind == 'initial' and self.max_initial_syncs is not None \
+                and self.running_initial_syncs >= self.max_initial_syncs:
+            return False
+        if self.max_connections is None:
+            return True
+        limit = self.max_connections
+        if request.kind != 'poll':
+            # initial syncs run for hours; keep some connections free so
+            # polls don't queue up behind them
+            limit -= max(1, self.max_connections // 4)
+        # always let one thing through, or a request for more connections
+        # than the limit would wait forever
+        return not self.connections or \
+                self.connections + request.connections <= limit
+
+    def _dispatch(self):
+        for kind in sorted(PRIORITIES, key=PRIORITIES.get):
+            queue = self._queues[kind]
+            while queue and self._fits(queue[0][2]):
+                finish, _, request = heapq.heappop(queue)
+                self._vtime[kind] = max(self._vtime[kind],
+                        finish - 1 / self._weights.get(request.account_id, 1.0))
+                self._admit(request)
+            if queue:
+                # lower priorities wait until this class drains
+                break
+
+    def _admit(self, request):
+        if request.kind == 'initial':
+            self.running_initial_syncs += 1
+        self.connections += request.connections
+        self.running[request.account_id] = self.running.get(
+                request.account_id, 0) + request.connections
+        self.admitted_count[request.kind] += 1
+        self.wait_seconds[request.kind] += time.time() - request.queued_at
+        request.admitted.set()
+
+    def _release(self, request):
+        if request.kind == 'initial':
+            self.running_initial_syncs -= 1
+        self.connections -= request.connections
+        self.running[request.account_id] -= request.connections
+        if not self.running[request.account_id]:
+            del self.running[request.account_id]
+        self._dispatch()
+
+    def _remove(self, request):
+        queue = self._queues[request.kind]
+        queue[:] = [entry for entry in queue if entry[2] is not request]
+        heapq.heapify(queue)
+        self._dispatch()
+
+# the config key for each of SyncScheduler's limits
+LIMITS = dict(max_initial_syncs='SYNC_MAX_INITIAL_SYNCS',
+        max_connections='SYNC_MAX_CONNECTIONS',
+        max_bandwidth='SYNC_MAX_BANDWIDTH')
+
+def host_limits():
+    """ SyncScheduler keyword arguments for the host's limits from the
+        config. Unset or 0 means unlimited (None).
+    """
+    def limit(key):
+        value = config.get(key)
+        return int(value) if value else None
+    return dict((arg, limit(key)) for arg, key in LIMITS.iteritems())
+
+def worker_limits(limits, num_workers, index):
+    """ Worker `index`'s share of limits (from host_limits()) when the
+        host's syncs are split across num_workers processes.
+
+        The shares add up to the host's limits, except that every worker
+        gets at least 1 of everything (0 would mean unlimited).
+    """
+    shares = dict()
+    for arg, limit in limits.iteritems():
+        if limit is not None:
+            limit = max(1, limit // num_workers + \
+                    (1 if index < limit % num_workers else 0))
+        shares[arg] = limit
+    return shares
+
+_scheduler = None
+
+def get_scheduler():
+    """ The host's scheduler, with the limits from host_limits(), or in a
+        sync worker process, the worker's share (see set_limits()).
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = SyncScheduler(**host_limits())
+    return _scheduler
+
+def set_limits(**limits):
+    """ Make get_scheduler() use these limits rather than the config's.
+        For sync workers, which only get a share of the host's; call it
+        before anything uses the scheduler.
+    """
+    global _scheduler
+    assert _scheduler is None, "scheduler already in use"
+    _scheduler = SyncScheduler(**limits)
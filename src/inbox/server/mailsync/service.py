@@ -1,12 +1,17 @@
 """ ZeroRPC interface to syncing. """
-import socket
+from gevent import Greenlet, sleep
 
+from ..config import config
 from ..models import session_scope
+from ..models import imapaccount as account
 from ..models.tables import ImapAccount
 from ..log import get_logger
 
 from .gmail import GmailSyncMonitor
 from .imap import ImapSyncMonitor
+from . import pipeline
+from .lease import LeaseKeeper
+from .scheduler import get_scheduler
 
 monitor_cls_for = {'Gmail': GmailSyncMonitor, 'IMAP': ImapSyncMonitor}
 
@@ -19,7 +24,16 @@ def notify(account_id, mtype, message):
     # account_id, mtype, message))
 
 class SyncService(object):
-    def __init__(self):
+    """ Runs syncs in this process.
+
+        Normally the service holds sync leases for this host (see
+        lease.py): on startup it claims its share of the accounts that
+        should be syncing, and it keeps claiming orphans and shedding
+        surplus in the background. With leases=False (a SyncSupervisor
+        worker), it just syncs the accounts it's told to, and leases are
+        the supervisor's job.
+    """
+    def __init__(self, leases=True):
         self.log = get_logger()
         # { account_id: MailSyncMonitor() }
         self.monitors = dict()
@@ -31,14 +45,15 @@ class SyncService(object):
         # all data in here ought to be msgpack-serializable!
         self.statuses = dict()
 
-        # Restart existing active syncs.
-        # (Later we will want to partition these across different machines!)
-        with session_scope() as db_session:
-            # XXX: I think we can do some sqlalchemy magic to make it so we
-            # can query on the attribute sync_active.
-            for account_id, in db_session.query(ImapAccount.id)\
-                    .filter(ImapAccount.sync_host!=None):
-                self.start_sync(account_id)
+        self.leases = None
+        if leases:
+            self.leases = LeaseKeeper(self._start_monitor, self._stop_monitor)
+            self.leases.start()
+
+        self.reconcile_interval = int(config.get(
+            'FOLDER_COUNTER_RECONCILE_INTERVAL', 3600))
+        if self.reconcile_interval:
+            Greenlet.spawn(self._reconcile_counters)
 
     def start_sync(self, account_id=None):
         """ Starts all syncs if account_id not specified.
@@ -48,40 +63,28 @@ class SyncService(object):
         if account_id:
             account_id = int(account_id)
         with session_scope() as db_session:
-            query = db_session.query(ImapAccount)
+            query = db_session.query(ImapAccount.id, ImapAccount.email_address)
             if account_id is not None:
                 query = query.filter_by(id=account_id)
-            fqdn = socket.getfqdn()
-            for acc in query:
-                self.log.info("Starting sync for account {0}" \
-                        .format(acc.email_address))
-                if acc.sync_host is not None and acc.sync_host != fqdn:
-                    results[acc.id] = \
-                            'acc {0} is syncing on host {1}'.format(
-                                acc.email_address, acc.sync_host)
-                elif acc.id not in self.monitors:
-                    try:
-                        acc.sync_lock()
-                        def update_status(account_id, state, status):
-                            """ I really really wish I were a lambda """
-                            folder, progress = status
-                            self.statuses.setdefault(account_id,
-                                    dict())[folder] = (state, progress)
-                            notify(account_id, state, status)
-
-                        monitor = monitor_cls_for[acc.provider](acc.id,
-                                acc.email_address, acc.provider, update_status)
-                        self.monitors[acc.id] = monitor
-                        monitor.start()
-                        acc.sync_host = fqdn
-                        db_session.add(acc)
-                        db_session.commit()
-                        results[acc.id] = "OK sync started"
-                    except Exception as e:
-                        self.log.error(e.message)
-                        results[acc.id] = "ERROR error encountered"
-                else:
-                    results[acc.id] =  "OK sync already started"
+            accounts = query.all()
+        for acc_id, email_address in accounts:
+            self.log.info("Starting sync for account {0}" \
+                    .format(email_address))
+            if acc_id in self.monitors:
+                results[acc_id] = "OK sync already started"
+                continue
+            if self.leases is not None:
+                holder = self.leases.acquire(acc_id)
+                if holder is not None:
+                    results[acc_id] = 'acc {0} is syncing on host {1}'\
+                            .format(email_address, holder)
+                    continue
+            if self._start_monitor(acc_id):
+                results[acc_id] = "OK sync started"
+            else:
+                if self.leases is not None:
+                    self.leases.release(acc_id)
+                results[acc_id] = "ERROR error encountered"
         if account_id:
             if account_id in results:
                 return results[account_id]
@@ -96,38 +99,114 @@ class SyncService(object):
         results = {}
         if account_id:
             account_id = int(account_id)
-        with session_scope() as db_session:
-            query = db_session.query(ImapAccount)
-            if account_id is not None:
-                query = query.filter_by(id=account_id)
-            fqdn = socket.getfqdn()
-            for acc in query:
-                if (not acc.id in self.monitors) or \
-                        (not acc.sync_active):
-                    results[acc.id] = "OK sync stopped already"
-                try:
-                    assert acc.sync_host == fqdn, "sync host FQDN doesn't match"
-                    # XXX Can processing this command fail in some way?
-                    self.monitors[acc.id].inbox.put_nowait("shutdown")
-                    acc.sync_host = None
-                    db_session.add(acc)
-                    db_session.commit()
-                    acc.sync_unlock()
-                    del self.monitors[acc.id]
-                    results[acc.id] = "OK sync stopped"
-                except:
-                    results[acc.id] = "ERROR error encountered"
+            account_ids = [account_id]
+        else:
+            account_ids = self.monitors.keys()
+        for acc_id in account_ids:
+            try:
+                if self.leases is not None:
+                    # if another host has it, it'll stop on its next
+                    # lease renewal
+                    self.leases.drop(acc_id)
+                if acc_id not in self.monitors:
+                    results[acc_id] = "OK sync stopped already"
+                    continue
+                self._stop_monitor(acc_id)
+                results[acc_id] = "OK sync stopped"
+            except Exception as e:
+                self.log.error(e.message)
+                results[acc_id] = "ERROR error encountered"
         if account_id:
-            if account_id in results:
-                return results[account_id]
-            else:
-                return "OK no such user"
+            return results[account_id]
         return results
 
-    def sync_status(self, account_id):
-        return self.statuses.get(account_id)
+    def _start_monitor(self, account_id):
+        with session_scope() as db_session:
+            acc = db_session.query(ImapAccount).get(account_id)
+            if acc is None:
+                return False
+            try:
+                def update_status(account_id, state, status):
+                    """ I really really wish I were a lambda """
+                    folder, progress = status
+                    self.statuses.setdefault(account_id,
+                            dict())[folder] = (state, progress)
+                    notify(account_id, state, status)
+
+                monitor = monitor_cls_for[acc.provider](acc.id,
+                        acc.email_address, acc.provider, update_status,
+                        headers_first=config.get('HEADERS_FIRST_SYNC', False))
+                self.monitors[acc.id] = monitor
+                monitor.start()
+                return True
+            except Exception as e:
+                self.log.error(e.message)
+                return False
+
+    def _stop_monitor(self, account_id):
+        monitor = self.monitors.pop(account_id, None)
+        if monitor is not None:
+            # XXX Can processing this command fail in some way?
+            monitor.inbox.put_nowait("shutdown")
+
+    def _reconcile_counters(self):
+        """ Every so often, recount the folder counters of the accounts
+            we're syncing, in case anything got past the sync's own
+            adjustments.
+        """
+        while True:
+            sleep(self.reconcile_interval)
+            for account_id in self.monitors.keys():
+                try:
+                    with session_scope() as db_session:
+                        drift = account.reconcile_folder_counters(account_id,
+                                db_session)
+                        db_session.commit()
+                except Exception, e:
+                    self.log.error("Reconciling folder counters for "
+                            "account {0} failed: {1}".format(account_id, e))
+                    continue
+                for folder_name, (old, new) in drift.iteritems():
+                    self.log.warning("Folder counters for account {0} "
+                            "folder {1} were {2}, should be {3}".format(
+                                account_id, folder_name, old, new))
+
+    def sync_status(self, account_id=None):
+        if account_id is None:
+            return self.status()
+        return self.statuses.get(int(account_id))
 
     # XXX this should require some sort of auth or something, used from the
     # admin panel
     def status(self):
-        return self.statuses
+        """ Sync statuses, plus per-stage queue depth and throughput for
+            each folder that's in the middle of a bulk download:
+
+            { account_id: { folder_name: (state, progress), ...,
+                            'pipelines': { folder_name: stats } } }
+        """
+        statuses = dict((account_id, dict(folders)) for account_id, folders \
+                in self.statuses.iteritems())
+        for (account_id, folder_name), sync_pipeline in \
+                pipeline.running.iteritems():
+            statuses.setdefault(account_id, dict()).setdefault('pipelines',
+                    dict())[folder_name] = sync_pipeline.stats()
+        return statuses
+
+    def scheduler_status(self):
+        """ Limits, running work and queued work in the host's sync
+            scheduler.
+        """
+        return get_scheduler().status()
+
+    def lease_status(self):
+        """ This host's capacity, fair share and how many leases it holds. """
+        if self.leases is not None:
+            return self.leases.status()
+
+    def set_sync_weight(self, account_id, weight):
+        """ Give an account a bigger (or smaller) share of this host's sync
+            capacity when there's contention. Weights default to 1.
+        """
+        get_scheduler().set_weight(int(account_id), float(weight))
+        return "OK weight set"
@@ -0,0 +1,336 @@
+""" Sync across several processes on one host.
+
+A single SyncService runs every account's sync in one gevent process, so
+a host can only use one core however many accounts it carries. With
+SYNC_WORKERS > 1, `inbox start` serves a SyncSupervisor instead. The
+supervisor starts that many `inbox syncworker` processes, each running an
+ordinary SyncService over ZeroRPC on a local socket. The supervisor holds
+this host's sync leases (see lease.py) and hands the accounts out to the
+workers by consistent hashing; the workers only sync what they're told.
+The host's sync limits (SYNC_MAX_*) are split evenly between the workers.
+
+The supervisor has the same ZeroRPC interface as SyncService, so
+`inbox sync ...` and the API server can't tell the difference. Calls about
+one account go to the worker that has it; calls about every account go to
+all workers and the results get merged.
+
+When a worker dies, it leaves the hash ring, and only its accounts move,
+to the next workers around the ring. The worker is restarted (backing off
+if it keeps dying) and rejoins the ring once it answers. Then the accounts
+that hash to it are moved back: stopped on the interim worker and started
+on this one.
+"""
+import os
+import sys
+import time
+import bisect
+import tempfile
+
+from hashlib import md5
+
+import zerorpc
+from gevent import Greenlet, sleep, subprocess
+from gevent.coros import RLock
+
+from ..config import config
+from ..log import get_logger
+from ..models import session_scope
+from ..models.tables import ImapAccount
+
+from .lease import LeaseKeeper
+from .scheduler import host_limits, worker_limits
+
+# what SyncService.start_sync() says when the account ends up syncing
+STARTED = ('OK sync started', 'OK sync already started')
+
+class HashRing(object):
+    """ Consistent hashing of keys onto nodes. Each node gets `replicas`
+        points on the ring so keys spread evenly, and adding or removing a
+        node only moves the keys next to its points.
+    """
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int(md5(str(key)).hexdigest()[:8], 16)
+
+    def add(self, node):
+        for i in xrange(self.replicas):
+            h = self._hash('{0}-{1}'.format(node, i))
+            pos = bisect.bisect(self._hashes, h)
+            self._hashes.insert(pos, h)
+            self._nodes.insert(pos, node)
+
+    def remove(self, node):
+        points = [(h, n) for h, n in zip(self._hashes, self._nodes) \
+                if n != node]
+        self._hashes = [h for h, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def get(self, key):
+        """ The node for key, or None if the ring is empty. """
+        if not self._nodes:
+            return None
+        pos = bisect.bisect(self._hashes, self._hash(key)) % len(self._nodes)
+        return self._nodes[pos]
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+class _WorkerProcess(object):
+    """ One `inbox syncworker` process and a ZeroRPC client to it.
+
+        limits is the worker's share of the host's sync limits, as
+        SyncScheduler keyword arguments.
+    """
+    def __init__(self, index, limits):
+        self.index = index
+        self.limits = limits
+        self.location = 'ipc://{0}/inbox-sync-{1}-{2}'.format(
+                tempfile.gettempdir(), os.getpid(), index)
+        self.proc = None
+        self.client = None
+        self.started_at = None
+        self.restarts = 0
+
+    def spawn(self):
+        if self.client is not None:
+            self.client.close()
+        limit_args = []
+        for arg, limit in sorted(self.limits.iteritems()):
+            if limit is not None:
+                limit_args.extend(['--' + arg.replace('_', '-'), str(limit)])
+        self.proc = subprocess.Popen([sys.executable,
+            os.path.abspath(sys.argv[0]), 'syncworker', self.location] + \
+                    limit_args)
+        self.started_at = time.time()
+        self.client = zerorpc.Client(self.location, timeout=60)
+
+    def wait_ready(self, timeout=60):
+        """ Wait for the worker to answer RPCs. """
+        give_up = time.time() + timeout
+        while True:
+            try:
+                self.client.status(timeout=1)
+                return True
+            except Exception:
+                # not listening yet
+                pass
+            if self.proc.poll() is not None or time.time() > give_up:
+                return False
+            sleep(0.5)
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def kill(self):
+        if self.alive:
+            self.proc.kill()
+            self.proc.wait()
+
+class SyncSupervisor(object):
+    def __init__(self, num_workers=None):
+        self.log = get_logger()
+        self.num_workers = num_workers or int(config.get('SYNC_WORKERS', 1))
+        # SYNC_MAX_* are for the whole host, so each worker gets a share
+        limits = host_limits()
+        self.workers = [_WorkerProcess(i,
+            worker_limits(limits, self.num_workers, i)) \
+                    for i in xrange(self.num_workers)]
+        self.ring = HashRing()
+        # accounts we hold leases for, which should be on some worker
+        self.active = set()
+        # { account_id: index of the worker syncing it }
+        self.assigned = dict()
+        # membership changes and account moves happen one at a time
+        self._lock = RLock()
+
+        for worker in self.workers:
+            worker.spawn()
+        for worker in self.workers:
+            if worker.wait_ready():
+                self.ring.add(worker.index)
+            else:
+                # the watcher will restart it
+                worker.kill()
+            Greenlet.spawn(self._watch, worker)
+
+        # Claim this host's share of the accounts that should be syncing;
+        # the supervisor holds the leases and the workers just sync.
+        self.leases = LeaseKeeper(self._place, self._unplace)
+        self.leases.start()
+
+    def _watch(self, worker):
+        """ Restart the worker whenever it exits, moving its accounts to the
+            other workers in the meantime.
+        """
+        backoff = 1
+        while True:
+            worker.proc.wait()
+            self.log.error("Sync worker {0} (pid {1}) exited with {2}".format(
+                worker.index, worker.proc.pid, worker.proc.returncode))
+            if time.time() - worker.started_at > 300:
+                backoff = 1
+            with self._lock:
+                self.ring.remove(worker.index)
+                self._rebalance()
+            sleep(backoff)
+            backoff = min(backoff * 2, 300)
+            worker.restarts += 1
+            worker.spawn()
+            if worker.wait_ready():
+                with self._lock:
+                    self.ring.add(worker.index)
+                    self._rebalance()
+            else:
+                worker.kill()
+
+    def _rebalance(self):
+        """ Start every active account that isn't on the worker the ring
+            says it should be on there, stopping it where it was.
+        """
+        for account_id in self.active:
+            owner = self.ring.get(account_id)
+            index = self.assigned.get(account_id)
+            if owner == index:
+                continue
+            if index is not None:
+                if self.workers[index].alive:
+                    self._call(index, 'stop_sync', account_id)
+                del self.assigned[account_id]
+            if owner is not None:
+                self._start(owner, account_id)
+            else:
+                self.log.error("No sync workers left for account {0}"\
+                        .format(account_id))
+
+    def _call(self, index, method, *args):
+        try:
+            return getattr(self.workers[index].client, method)(*args)
+        except (zerorpc.exceptions.TimeoutExpired,
+                zerorpc.exceptions.LostRemote), e:
+            self.log.error("Sync worker {0} didn't answer {1}{2}: {3}".format(
+                index, method, args, e))
+            return "ERROR error encountered"
+
+    def _start(self, index, account_id):
+        result = self._call(index, 'start_sync', account_id)
+        if result in STARTED:
+            self.assigned[account_id] = index
+        return result
+
+    def _place(self, account_id):
+        """ Start syncing an account we've claimed on the worker it hashes
+            to. Returns whether that worked.
+        """
+        with self._lock:
+            index = self.ring.get(account_id)
+            if index is None or self._start(index, account_id) not in STARTED:
+                return False
+            self.active.add(account_id)
+            return True
+
+    def _unplace(self, account_id):
+        """ Stop syncing an account wherever it is. """
+        with self._lock:
+            self.active.discard(account_id)
+            index = self.assigned.pop(account_id, None)
+            if index is None or not self.workers[index].alive:
+                return "OK sync stopped already"
+            return self._call(index, 'stop_sync', account_id)
+
+    def _owner(self, account_id):
+        if account_id in self.assigned:
+            return self.assigned[account_id]
+        return self.ring.get(account_id)
+
+    def _live_workers(self):
+        return [worker.index for worker in self.workers \
+                if worker.index in self.ring]
+
+    def start_sync(self, account_id=None):
+        """ Starts all syncs if account_id not specified.
+            If account_id doesn't exist, does nothing.
+        """
+        if account_id is None:
+            with session_scope() as db_session:
+                account_ids = [account_id for account_id, in \
+                        db_session.query(ImapAccount.id)]
+            return dict((account_id, self.start_sync(account_id)) \
+                    for account_id in account_ids)
+        account_id = int(account_id)
+        with session_scope() as db_session:
+            acc = db_session.query(ImapAccount).get(account_id)
+            if acc is None:
+                return "OK no such user"
+            email_address = acc.email_address
+        if account_id in self.active:
+            return "OK sync already started"
+        holder = self.leases.acquire(account_id)
+        if holder is not None:
+            return 'acc {0} is syncing on host {1}'.format(email_address,
+                    holder)
+        if self._place(account_id):
+            return "OK sync started"
+        self.leases.release(account_id)
+        return "ERROR error encountered"
+
+    def stop_sync(self, account_id=None):
+        """ Stops all syncs if account_id not specified.
+            If account_id doesn't exist, does nothing.
+        """
+        if account_id is None:
+            return dict((account_id, self.stop_sync(account_id)) \
+                    for account_id in list(self.active))
+        account_id = int(account_id)
+        # if another host has it, it'll stop on its next lease renewal
+        self.leases.drop(account_id)
+        return self._unplace(account_id)
+
+    def sync_status(self, account_id=None):
+        if account_id is None:
+            return self.status()
+        index = self._owner(int(account_id))
+        if index is not None:
+            return self._call(index, 'sync_status', account_id)
+
+    def status(self):
+        """ SyncService.status() from every worker, merged. """
+        statuses = dict()
+        for index in self._live_workers():
+            worker_statuses = self._call(index, 'status')
+            if isinstance(worker_statuses, dict):
+                statuses.update(worker_statuses)
+        return statuses
+
+    def lease_status(self):
+        return self.leases.status()
+
+    def scheduler_status(self):
+        """ Each worker has its own scheduler, with its share of the
+            host's limits.
+        """
+        return dict((index, self._call(index, 'scheduler_status')) \
+                for index in self._live_workers())
+
+    def set_sync_weight(self, account_id, weight):
+        index = self._owner(int(account_id))
+        if index is None:
+            return "ERROR no sync workers running"
+        return self._call(index, 'set_sync_weight', account_id, weight)
+
+    def worker_status(self):
+        """ { worker index: { pid, alive, restarts, accounts } } """
+        accounts = dict()
+        for account_id, index in self.assigned.iteritems():
+            accounts.setdefault(index, []).append(account_id)
+        return dict((worker.index, dict(pid=worker.proc.pid,
+            alive=worker.index in self.ring, restarts=worker.restarts,
+            accounts=sorted(accounts.get(worker.index, [])))) \
+                    for worker in self.workers)
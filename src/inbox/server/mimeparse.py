@@ -0,0 +1,269 @@
+""" Parsing raw messages into plain data, in worker processes.
+
+MIME parsing, HTML sanitizing and hashing are CPU-bound; done in a greenlet
+they stall every other sync and the ZeroRPC servers in the process. So
+parse_message() is a pure function that turns raw bytes into a picklable
+ParsedMessage, and parse() / parse_many() run it in a ProcessPool. The
+sync engine only builds ORM objects out of the result.
+
+Set PARSE_WORKERS = 0 in the config to parse in-process instead.
+"""
+import json
+
+from hashlib import sha256
+from itertools import chain
+
+from gevent.pool import Pool as GreenletPool
+from bs4 import BeautifulSoup, Doctype, Comment
+from flanker import mime
+
+from inbox.util.misc import or_none, parse_ml_headers, strip_plaintext_quote
+from inbox.util.addr import parse_email_address
+from inbox.util.html import plaintext2html
+from inbox.util.file import SpooledData
+
+from .config import config
+from .util.concurrency import ProcessPool
+
+SNIPPET_LENGTH = 191
+
+class ParsedMessage(object):
+    """ Everything we need from a raw message to create its Message and
+        Block rows.
+
+        parts is a list of dicts with the Block attributes (walk_index,
+        misc_keyval, content_type, filename, content_disposition,
+        content_id, data, data_sha256), not including the headers part.
+        warnings are (level, message) pairs for the caller to log, since
+        workers don't log.
+    """
+    def __init__(self):
+        self.headers = []
+        self.subject = None
+        self.from_addr = None
+        self.sender_addr = None
+        self.reply_to = None
+        self.to_addr = None
+        self.cc_addr = None
+        self.bcc_addr = None
+        self.in_reply_to = None
+        self.message_id = None
+        self.mailing_list_headers = None
+        self.size = 0
+        self.data_sha256 = None
+        self.parts = []
+        self.sanitized_body = u''
+        self.snippet = u''
+        self.warnings = []
+
+    @property
+    def headers_data(self):
+        """ Data for the headers Block (walk_index 0). """
+        return json.dumps(self.headers)
+
+def parse_message(body):
+    """ Parse a raw message. Returns a ParsedMessage, or None if flanker
+        can't decode it.
+    """
+    try:
+        parsed = mime.from_string(body)
+        result = ParsedMessage()
+
+        mime_version = parsed.headers.get('Mime-Version')
+        # NOTE: sometimes MIME-Version is set to "1.0 (1.0)", hence the .startswith
+        if mime_version is not None and not mime_version.startswith('1.0'):
+            result.warnings.append(('error',
+                "Unexpected MIME-Version: %s" % mime_version))
+
+        result.headers = _plain_headers(parsed.headers.items())
+        # clean_subject strips re:, fwd: etc.
+        result.subject = parsed.clean_subject
+        result.from_addr = parse_email_address(parsed.headers.get('From'))
+        result.sender_addr = parse_email_address(parsed.headers.get('Sender'))
+        result.reply_to = parse_email_address(parsed.headers.get('Reply-To'))
+        result.to_addr = or_none(parsed.headers.getall('To'),
+                lambda tos: filter(lambda p: p is not None,
+                    [parse_email_address(t) for t in tos]))
+        result.cc_addr = or_none(parsed.headers.getall('Cc'),
+                lambda ccs: filter(lambda p: p is not None,
+                    [parse_email_address(c) for c in ccs]))
+        result.bcc_addr = or_none(parsed.headers.getall('Bcc'),
+                lambda bccs: filter(lambda p: p is not None,
+                    [parse_email_address(c) for c in bccs]))
+        result.in_reply_to = parsed.headers.get('In-Reply-To')
+        result.message_id = parsed.headers.get('Message-Id')
+
+        # Optional mailing list headers
+        result.mailing_list_headers = parse_ml_headers(parsed.headers)
+
+        result.size = len(body)  # includes headers text
+        result.data_sha256 = sha256(body).hexdigest()
+
+        result.parts = _parse_parts(parsed, result.warnings)
+    except mime.DecodingError:
+        return None
+
+    plain_part = html_part = None
+    for part in result.parts:
+        if part['content_type'] == 'text/html' and html_part is None:
+            html_part = part['data'].decode('utf-8')
+        if part['content_type'] == 'text/plain' and plain_part is None:
+            plain_part = part['data'].decode('utf-8')
+    result.sanitized_body, result.snippet = sanitize_body(plain_part,
+            html_part)
+    return result
+
+def _plain_headers(headers):
+    """ (name, value) header pairs with flanker's ContentType / WithParams
+        values rendered back into strings, the way MessagePart.headers() does.
+        Those tuple subclasses pickle but don't unpickle, so they can't come
+        back from a worker.
+    """
+    result = []
+    for name, value in headers:
+        if isinstance(value, tuple):
+            value, params = value
+            value = u'; '.join([value] + [u'{0}="{1}"'.format(k, v) for \
+                    k, v in params.iteritems()])
+        result.append((name, value))
+    return result
+
+def _parse_parts(parsed, warnings):
+    parts = []
+    i = 0  # for walk_index
+    for mimepart in parsed.walk(
+            with_self=parsed.content_type.is_singlepart()):
+        i += 1
+        if mimepart.content_type.is_multipart():
+            warnings.append(('warning', "multipart sub-part found!"))
+            continue  # TODO should we store relations?
+
+        part = dict(walk_index=i,
+                misc_keyval=_plain_headers(mimepart.headers.items()),
+                content_type=mimepart.content_type.value,
+                filename=mimepart.content_type.params.get('name'),
+                content_disposition=None)
+
+        # Content-Disposition attachment; filename="floorplan.gif"
+        if mimepart.content_disposition[0] is not None:
+            value, params = mimepart.content_disposition
+            if value not in ['inline', 'attachment']:
+                warnings.append(('error', """
+    Unknown Content-Disposition.
+    Bad Content-Disposition was: '{0}'
+    Parsed Content-Disposition was: '{1}'""".format(
+        mimepart.headers.get('Content-Disposition'),
+        mimepart.content_disposition)))
+                continue
+            else:
+                part['content_disposition'] = value
+                if value == 'attachment':
+                    part['filename'] = params.get('filename')
+
+        if mimepart.body is None:
+            data = ''
+        elif part['content_type'].startswith('text'):
+            data = mimepart.body.encode('utf-8', 'strict')
+        else:
+            data = mimepart.body
+        if data is None:
+            data = ''
+        # normalize mac/win/unix newlines
+        data = data.replace('\r\n', '\n').replace('\r', '\n')
+
+        part['content_id'] = mimepart.headers.get('Content-Id')
+        part['data'] = data
+        part['data_sha256'] = sha256(data).hexdigest()
+        parts.append(part)
+    return parts
+
+def sanitize_body(plain_part, html_part):
+    """ Returns (sanitized_body, snippet) from a message's decoded plain
+        text and HTML bodies, either of which may be None.
+    """
+    if html_part:
+        assert '\r' not in html_part, "newlines not normalized"
+
+        # Try our best to strip out gmail quoted text.
+        soup = BeautifulSoup(html_part.strip(), "lxml")
+        for div in soup.findAll('div', 'gmail_quote'):
+            div.extract()
+        for container in soup.findAll('div', 'gmail_extra'):
+            if container.contents is not None:
+                for tag in reversed(container.contents):
+                    if not hasattr(tag, 'name') or tag.name != 'br': break
+                    else: tag.extract()
+            if container.contents is None:
+                # we emptied it!
+                container.extract()
+
+        # Paragraphs don't need trailing line-breaks.
+        for container in soup.findAll('p'):
+            if container.contents is not None:
+                for tag in reversed(container.contents):
+                    if not hasattr(tag, 'name') or tag.name != 'br': break
+                    else: tag.extract()
+
+        # Misc other crap.
+        dtd = [item for item in soup.contents if isinstance(item, Doctype)]
+        comments = soup.findAll(text=lambda text:isinstance(text, Comment))
+        for tag in chain(dtd, comments):
+            tag.extract()
+
+        sanitized_body = unicode(soup)
+
+        # trim for snippet
+        for tag in soup.findAll(['style', 'head', 'title']):
+            tag.extract()
+        return sanitized_body, soup.get_text(' ')[:SNIPPET_LENGTH]
+    elif plain_part is None:
+        return u'', u''
+    else:
+        stripped = strip_plaintext_quote(plain_part.strip())
+        return plaintext2html(stripped), stripped[:SNIPPET_LENGTH]
+
+_pool = None
+
+def parse_pool():
+    """ The process-wide parsing pool, or None to parse in-process. Created
+        on first use; PARSE_WORKERS defaults to one per core.
+    """
+    global _pool
+    num_workers = config.get('PARSE_WORKERS')
+    if num_workers is not None and int(num_workers) == 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPool(int(num_workers) if num_workers else None)
+    return _pool
+
+def parse(body):
+    """ parse_message() in a worker process. """
+    if isinstance(body, SpooledData):
+        # spool files are anonymous, so there's no path to hand a worker
+        body = body.read()
+    pool = parse_pool()
+    if pool is None:
+        return parse_message(body)
+    return pool.apply(parse_message, body)
+
+def sanitize(plain_part, html_part):
+    """ sanitize_body() in a worker process, for bodies that were pieced
+        together without parse_message() (lazy attachments).
+    """
+    pool = parse_pool()
+    if pool is None:
+        return sanitize_body(plain_part, html_part)
+    return pool.apply(sanitize_body, plain_part, html_part)
+
+def parse_many(bodies):
+    """ Parse several messages at once, across all workers. Returns a list
+        of results in the same order.
+
+        parse() reads a spooled body into memory before it waits for a
+        worker, so we only start as many as there are workers; the rest
+        stay on disk until their turn.
+    """
+    pool = parse_pool()
+    if pool is None:
+        return [parse(body) for body in bodies]
+    return GreenletPool(pool.num_workers).map(parse, bodies)
@@ -0,0 +1,230 @@
+""" Bulk persistence for batches of newly downloaded messages.
+
+The ORM path (commit_uids) flushes every Message, Block, ImapUid and
+FolderItem with its own INSERT, and Thread.from_message needs an autoflush
+per message to find threads created earlier in the same batch. Here we
+build the same objects with create_message(), but never add them to the
+session: threads for the whole batch are looked up in one query, and each
+table is written with a single executemany, which MySQLdb sends as one
+multi-row INSERT.
+
+New IDs come from LAST_INSERT_ID(), which is the first ID of a multi-row
+INSERT; InnoDB hands out consecutive IDs for the rest as long as
+innodb_autoinc_lock_mode is 0 or 1. With 2 ("interleaved") that isn't
+guaranteed, so bulk_insert_supported() says no and callers should use the
+ORM path.
+
+Transaction rows are written here too, since the after_flush hook never
+sees these objects.
+"""
+from sqlalchemy.orm import object_mapper
+from sqlalchemy.orm.exc import UnmappedColumnError
+
+from inbox.sqlalchemy.revision import coarsen
+
+from ..config import config
+from ..log import get_logger
+log = get_logger()
+
+from .tables import Message, Block, ImapUid, Thread, FolderItem, Transaction
+from .tables import serialize_before_insert
+from .imapaccount import create_message, thread_labels, update_thread_labels
+from .imapaccount import count_new_uids
+
+# engine url -> whether we can trust consecutive autoincrement IDs
+_supported = dict()
+
+def bulk_insert_supported(db_session):
+    """ True if BULK_INSERT is on and the database hands out consecutive
+        IDs for multi-row INSERTs.
+    """
+    if not config.get('BULK_INSERT', False):
+        return False
+    engine = db_session.get_bind()
+    key = str(engine.url)
+    if key not in _supported:
+        if engine.dialect.name != 'mysql':
+            _supported[key] = False
+        else:
+            lock_mode = db_session.execute(
+                    'SELECT @@innodb_autoinc_lock_mode').scalar()
+            _supported[key] = int(lock_mode) < 2
+            if not _supported[key]:
+                log.warning("innodb_autoinc_lock_mode is {0}; not using "
+                        "bulk inserts".format(lock_mode))
+    return _supported[key]
+
+def create_gmail_messages(db_session, log, account, folder_name,
+        raw_messages):
+    """ Like create_gmail_message for a whole batch, except the objects
+        aren't added to the session and don't have threads yet.
+
+        Returns a list of (imapuid, x_gm_labels).
+    """
+    created = []
+    for uid, internaldate, flags, body, x_gm_thrid, x_gm_msgid, x_gm_labels \
+            in raw_messages:
+        new_uid = create_message(db_session, log, account, folder_name, uid,
+                internaldate, flags, body)
+        if new_uid is None:
+            continue
+        new_uid.message.g_msgid = x_gm_msgid
+        new_uid.message.g_thrid = x_gm_thrid
+        new_uid.update_flags(flags, x_gm_labels)
+        created.append((new_uid, x_gm_labels))
+    return created
+
+def insert_gmail_messages(db_session, account, folder_name, created):
+    """ Write out the results of create_gmail_messages(), after their parts
+        have been saved to the block store. Threads and labels are updated
+        the same way add_gmail_attrs would. Doesn't commit.
+    """
+    namespace_id = account.namespace.id
+    messages = [imapuid.message for imapuid, _ in created]
+
+    # threads: update the ones we have, create the rest
+    # crispin gives us g_thrids as numbers; they're strings in the db
+    g_thrids = set(str(message.g_thrid) for message in messages)
+    thread_for = dict((thread.g_thrid, thread) for thread in \
+            db_session.query(Thread).filter(
+                Thread.namespace_id==namespace_id,
+                Thread.g_thrid.in_(g_thrids)))
+    existing_thread_ids = set(thread.id for thread in thread_for.itervalues())
+    new_threads = []
+    for imapuid, _ in created:
+        message = imapuid.message
+        thread = thread_for.get(str(message.g_thrid))
+        if thread is None:
+            thread = thread_for[str(message.g_thrid)] = Thread(
+                    subject=message.subject, g_thrid=message.g_thrid,
+                    recentdate=message.internaldate,
+                    subjectdate=message.internaldate)
+            new_threads.append(thread)
+        else:
+            thread.update_from_message(message)
+        thread.add_message(message, unread=not imapuid.is_seen)
+
+    # labels, worked out message by message like add_gmail_attrs does;
+    # by g_thrid, since new threads don't have IDs until they're inserted
+    # and their summaries need the labels first
+    items_for = dict()
+    if existing_thread_ids:
+        g_thrid_for = dict((thread.id, g_thrid) for g_thrid, thread in \
+                thread_for.iteritems() if thread.id is not None)
+        for item in db_session.query(FolderItem).filter(
+                FolderItem.thread_id.in_(existing_thread_ids)):
+            items_for.setdefault(g_thrid_for[item.thread_id], dict())[
+                    item.folder_name] = item
+    labels_for = dict((g_thrid, set(items)) for g_thrid, items in \
+            items_for.iteritems())
+    for imapuid, x_gm_labels in created:
+        g_thrid = str(imapuid.message.g_thrid)
+        labels_for[g_thrid] = update_thread_labels(
+                labels_for.get(g_thrid, set()),
+                thread_labels(x_gm_labels, folder_name))
+    for g_thrid, labels in labels_for.iteritems():
+        thread_for[g_thrid].labels = sorted(labels)
+
+    new_thread_ids = insert_rows(db_session, Thread.__table__,
+            [dict(row(thread), namespace_id=namespace_id) for thread in \
+                    new_threads])
+    for thread, thread_id in zip(new_threads, new_thread_ids):
+        thread.id = thread_id
+
+    folder_items = []
+    for g_thrid, labels in labels_for.iteritems():
+        thread_id = thread_for[g_thrid].id
+        items = items_for.get(g_thrid, dict())
+        for label, item in items.iteritems():
+            if label not in labels:
+                # rare; let the ORM log the delete revision
+                db_session.delete(item)
+        folder_items.extend(dict(thread_id=thread_id, folder_name=label) \
+                for label in labels if label not in items)
+    folder_item_ids = insert_rows(db_session, FolderItem.__table__,
+            folder_items)
+
+    # messages, then the parts and UIDs that point at them
+    message_rows = [dict(row(message),
+        thread_id=thread_for[str(message.g_thrid)].id) for message in messages]
+    message_ids = insert_rows(db_session, Message.__table__, message_rows)
+
+    block_rows = []
+    for message, message_id in zip(messages, message_ids):
+        for part in message.parts:
+            serialize_before_insert(None, None, part)
+            block_rows.append(dict(row(part), message_id=message_id,
+                namespace_id=namespace_id))
+    block_ids = insert_rows(db_session, Block.__table__, block_rows)
+
+    insert_rows(db_session, ImapUid.__table__,
+            [dict(row(imapuid), message_id=message_id,
+                imapaccount_id=account.id) for (imapuid, _), message_id in \
+                        zip(created, message_ids)], return_ids=False)
+    count_new_uids(account.id, db_session, folder_name,
+            [imapuid for imapuid, _ in created])
+
+    revisions = []
+    for table, rows, ids in ((Message.__table__, message_rows, message_ids),
+            (Block.__table__, block_rows, block_ids),
+            (FolderItem.__table__, folder_items, folder_item_ids)):
+        revisions.extend(dict(table_name=table.name, record_id=record_id,
+            command='insert', delta=delta, namespace_id=namespace_id) \
+                    for delta, record_id in zip(rows, ids))
+    if db_session.coarse_revisions:
+        revisions = coarsen(revisions)
+    insert_rows(db_session, Transaction.__table__, revisions,
+            return_ids=False)
+
+    return len(message_ids)
+
+def row(obj):
+    """ Column values for inserting a transient object, with Python-side
+        scalar defaults filled in (executemany needs the same keys on every
+        row, and NULL isn't the same as the default).
+    """
+    mapper = object_mapper(obj)
+    values = dict()
+    for col in mapper.local_table.c:
+        if col.primary_key:
+            continue
+        try:
+            prop = mapper.get_property_by_column(col)
+        except UnmappedColumnError:
+            continue
+        value = getattr(obj, prop.key)
+        if value is None and col.default is not None and \
+                col.default.is_scalar:
+            value = col.default.arg
+        values[col.key] = value
+    return values
+
+def _estimated_size(values):
+    return sum(len(v) if isinstance(v, basestring) else 16 for v in \
+            values.itervalues())
+
+def insert_rows(db_session, table, rows, return_ids=True):
+    """ INSERT rows with as few statements as fit in BULK_INSERT_MAX_BYTES
+        (keep this under the server's max_allowed_packet). Returns the new
+        IDs in the same order as rows.
+    """
+    max_bytes = int(config.get('BULK_INSERT_MAX_BYTES', 4*1024*1024))
+    ids = []
+    batch, batch_bytes = [], 0
+    for values in rows:
+        size = _estimated_size(values)
+        if batch and batch_bytes + size > max_bytes:
+            ids.extend(_insert_batch(db_session, table, batch, return_ids))
+            batch, batch_bytes = [], 0
+        batch.append(values)
+        batch_bytes += size
+    if batch:
+        ids.extend(_insert_batch(db_session, table, batch, return_ids))
+    return ids
+
+def _insert_batch(db_session, table, batch, return_ids):
+    db_session.execute(table.insert(), batch)
+    if not return_ids:
+        return []
+    first_id = db_session.execute('SELECT LAST_INSERT_ID()').scalar()
+    return range(first_id, first_id + len(batch))
@@ -9,20 +9,21 @@ import json
 
 from hashlib import sha256
 
-from sqlalchemy import distinct, func
+from sqlalchemy import distinct, func, case, event
 from sqlalchemy.orm.exc import NoResultFound
 
-from flanker import mime
-
-from inbox.util.misc import or_none
-from inbox.util.addr import parse_email_address
-from inbox.util.file import mkdirp
-from inbox.util.misc import parse_ml_headers
+from inbox.util.file import mkdirp, SpooledData
+from inbox.util.uidset import UIDSet
+from inbox.util.itert import chunk
+from inbox.sqlalchemy import keyset
 
 from .tables import Block, Message, ImapUid, UIDValidity, FolderItem, Thread
+from .tables import FolderSync, FolderCounter
 
 from ..config import config
 from ..log import get_logger
+from ..bodystructure import PartialMessage, decode_part
+from ..mimeparse import ParsedMessage, parse, sanitize
 log = get_logger()
 
 def total_stored_data(account_id, session):
@@ -43,17 +44,73 @@ def total_stored_messages(account_id, session):
             .group_by(Message.id).count()
 
 def all_uids(account_id, session, folder_name):
-    return [uid for uid, in
+    return UIDSet.from_sorted(uid for uid, in
             session.query(ImapUid.msg_uid).filter_by(
-                imapaccount_id=account_id, folder_name=folder_name)]
+                imapaccount_id=account_id, folder_name=folder_name)
+            .order_by(ImapUid.msg_uid))
+
+def headers_only_uids(account_id, session, folder_name, limit=None):
+    """ UIDs of messages whose bodies haven't been downloaded yet, most
+        recent (highest UID) first.
+    """
+    query = session.query(ImapUid.msg_uid).join(Message).filter(
+            ImapUid.imapaccount_id==account_id,
+            ImapUid.folder_name==folder_name,
+            Message.headers_only==True).order_by(ImapUid.msg_uid.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return [uid for uid, in query]
+
+def get_sync_substate(account_id, session, folder_name):
+    return session.query(FolderSync.substate).filter_by(
+            imapaccount_id=account_id, folder_name=folder_name).scalar()
+
+def set_sync_substate(account_id, session, folder_name, substate):
+    session.query(FolderSync).filter_by(imapaccount_id=account_id,
+            folder_name=folder_name).update(dict(substate=substate),
+                    synchronize_session='fetch')
+
+def keyset_options():
+    """ How to send big batches of keys to the database; see
+        inbox.sqlalchemy.keyset.
+    """
+    return dict(in_max=int(config.get('KEYSET_IN_MAX', 1000)),
+            temp_tables=config.get('KEYSET_TEMP_TABLES', True))
 
-def g_msgids(account_id, session, in_=None):
+def g_msgids(account_id, session):
     query = session.query(distinct(Message.g_msgid)).join(ImapUid) \
                 .filter(ImapUid.imapaccount_id==account_id)
-    if in_:
-        query = query.filter(Message.g_msgid.in_(in_))
     return sorted([g_msgid for g_msgid, in query], key=long)
 
+def existing_g_msgids(account_id, session, g_msgids):
+    """ Which of g_msgids we already have messages for, as a set. """
+    query = session.query(distinct(Message.g_msgid)).join(ImapUid) \
+                .filter(ImapUid.imapaccount_id==account_id)
+    return keyset.present(session, query, Message.g_msgid, g_msgids,
+            **keyset_options())
+
+def new_g_msgids(account_id, session, g_msgids):
+    """ Which of g_msgids we don't have messages for yet, as a set. """
+    query = session.query(distinct(Message.g_msgid)).join(ImapUid) \
+                .filter(ImapUid.imapaccount_id==account_id)
+    return keyset.missing(session, query, Message.g_msgid, g_msgids,
+            **keyset_options())
+
+def messages_for_g_msgids(account_id, session, g_msgids):
+    """ { g_msgid: Message } for the g_msgids we have messages for. """
+    query = session.query(Message).join(ImapUid) \
+                .filter(ImapUid.imapaccount_id==account_id)
+    return dict((message.g_msgid, message) for message in \
+            keyset.matching(session, query, Message.g_msgid, g_msgids,
+                **keyset_options()))
+
+def existing_uids(account_id, session, folder_name, uids):
+    """ Which of uids we already have in folder_name, as a set. """
+    query = session.query(ImapUid.msg_uid).filter_by(
+            imapaccount_id=account_id, folder_name=folder_name)
+    return keyset.present(session, query, ImapUid.msg_uid, uids,
+            **keyset_options())
+
 def g_metadata(account_id, session, folder_name):
     query = session.query(ImapUid.msg_uid, Message.g_msgid,
                 Message.g_thrid).filter(
@@ -66,25 +123,193 @@ def g_metadata(account_id, session, folder_name):
 
 def update_metadata(account_id, session, folder_name, uids, new_flags):
     """ Update flags (the only metadata that can change). """
+    # messages that were read or marked unread
+    changed = set()
+    unread_change = 0
     for item in session.query(ImapUid).filter(
             ImapUid.imapaccount_id==account_id,
             ImapUid.msg_uid.in_(uids),
             ImapUid.folder_name==folder_name):
         flags = new_flags[item.msg_uid]['flags']
         labels = new_flags[item.msg_uid]['labels']
+        was_seen = item.is_seen
         item.update_flags(flags, labels)
+        if item.is_seen != was_seen:
+            changed.add(item.message_id)
+            unread_change += -1 if item.is_seen else 1
+    if changed:
+        update_unread_counts(session, changed)
+        adjust_folder_counters(account_id, session, folder_name,
+                unread=unread_change)
+
+def update_unread_counts(session, message_ids):
+    """ Recount Thread.unread_count for the threads of these messages. A
+        message is unread if any of its UIDs is, so we can't just add or
+        subtract one when a single UID's flags change.
+    """
+    thread_ids = set(thread_id for thread_id, in \
+            session.query(distinct(Message.thread_id)).filter(
+                Message.id.in_(message_ids)))
+    unread = dict(session.query(Message.thread_id,
+        func.count(distinct(Message.id))).join(ImapUid).filter(
+            Message.thread_id.in_(thread_ids),
+            ImapUid.is_seen==False).group_by(Message.thread_id))
+    for thread in session.query(Thread).filter(Thread.id.in_(thread_ids)):
+        thread.unread_count = unread.get(thread.id, 0)
+
+def adjust_folder_counters(account_id, session, folder_name, total=0,
+        unread=0, bytes=0):
+    """ Add to a folder's counters, in the session's transaction. The
+        increment happens in the database, so concurrent adjustments don't
+        overwrite each other.
+    """
+    if not (total or unread or bytes):
+        return
+    updated = session.query(FolderCounter).filter_by(
+            imapaccount_id=account_id, folder_name=folder_name).update(dict(
+                total=FolderCounter.total + total,
+                unread=FolderCounter.unread + unread,
+                bytes=FolderCounter.bytes + bytes),
+                synchronize_session=False)
+    if not updated:
+        session.add(FolderCounter(imapaccount_id=account_id,
+            folder_name=folder_name, total=total, unread=unread, bytes=bytes))
+        session.flush()
+
+def count_new_uids(account_id, session, folder_name, imapuids):
+    """ Count freshly created ImapUids into their folder's counters. """
+    adjust_folder_counters(account_id, session, folder_name,
+            total=len(imapuids),
+            unread=sum(1 for imapuid in imapuids if not imapuid.is_seen),
+            bytes=sum(imapuid.message.size or 0 for imapuid in imapuids))
+
+def reconcile_folder_counters(account_id, session, folder_name=None):
+    """ Recount the counters for one folder, or all of the account's, from
+        the ImapUids we actually have, and fix any that drifted. Returns
+        {folder_name: (old (total, unread, bytes), new)} for those. Doesn't
+        commit.
+    """
+    counter_query = session.query(FolderCounter).filter_by(
+            imapaccount_id=account_id)
+    uid_query = session.query(ImapUid.folder_name, func.count(ImapUid.id),
+            func.sum(case([(ImapUid.is_seen==False, 1)], else_=0)),
+            func.sum(Message.size)).join(Message).filter(
+                    ImapUid.imapaccount_id==account_id)
+    if folder_name is not None:
+        counter_query = counter_query.filter_by(folder_name=folder_name)
+        uid_query = uid_query.filter(ImapUid.folder_name==folder_name)
+    # lock the counters first so sync can't adjust them between our count
+    # and our fix
+    counters = dict((counter.folder_name, counter) for counter in \
+            counter_query.with_lockmode('update'))
+    actual = dict((name, (total, int(unread or 0), int(size or 0))) \
+            for name, total, unread, size in \
+            uid_query.group_by(ImapUid.folder_name))
+
+    drift = dict()
+    for name in set(counters) | set(actual):
+        new = actual.get(name, (0, 0, 0))
+        counter = counters.get(name)
+        if counter is None:
+            counter = FolderCounter(imapaccount_id=account_id,
+                    folder_name=name)
+            session.add(counter)
+            old = None
+        else:
+            old = (counter.total, counter.unread, counter.bytes)
+        if old != new:
+            counter.total, counter.unread, counter.bytes = new
+            drift[name] = (old, new)
+    return drift
 
 def remove_messages(account_id, session, uids, folder):
+    """ Doesn't synchronize the session; commit before using any ImapUids
+        you have loaded.
+    """
+    # what's going, for the folder's counters
+    counts_query = session.query(func.count(ImapUid.id),
+            func.sum(case([(ImapUid.is_seen==False, 1)], else_=0)),
+            func.sum(Message.size)).join(Message).filter(
+                    ImapUid.imapaccount_id==account_id,
+                    ImapUid.folder_name==folder)
+    counts = keyset.matching(session, counts_query, ImapUid.msg_uid, uids,
+            **keyset_options())
+
     fm_query = session.query(ImapUid).filter(
             ImapUid.imapaccount_id==account_id,
-            ImapUid.folder_name==folder,
-            ImapUid.msg_uid.in_(uids))
-    fm_query.delete(synchronize_session='fetch')
+            ImapUid.folder_name==folder)
+    keyset.delete(session, fm_query, ImapUid.msg_uid, uids,
+            **keyset_options())
+
+    adjust_folder_counters(account_id, session, folder,
+            total=-sum(total for total, _, _ in counts),
+            unread=-sum(int(unread or 0) for _, unread, _ in counts),
+            bytes=-sum(int(size or 0) for _, _, size in counts))
 
     # XXX TODO: Have a recurring worker permanently remove dangling
     # messages from the database and block store. (Probably too
     # expensive to do here.)
 
+def forget_uids(account_id, session, folder_name):
+    """ Drop every UID we have for a folder, e.g. when its UIDVALIDITY
+        changed and there's no way to tell which new UID is which message.
+    """
+    session.query(FolderCounter).filter_by(imapaccount_id=account_id,
+            folder_name=folder_name).delete(synchronize_session=False)
+    return session.query(ImapUid).filter_by(imapaccount_id=account_id,
+            folder_name=folder_name).delete(synchronize_session=False)
+
+# Remapping a folder's UIDs after UIDVALIDITY changes, without downloading
+# anything again: negate_uids(), then remap_uids() for each chunk of the new
+# UIDs, then remove_unmapped_uids() for whatever's left. Do it all in one
+# transaction.
+
+def negate_uids(account_id, session, folder_name):
+    """ Flip the folder's UIDs negative, so we can write the new UIDs as we
+        go without hitting the unique constraint on the old ones. Rows that
+        are already negative (from an earlier attempt in this transaction)
+        stay negative.
+    """
+    return session.query(ImapUid).filter(ImapUid.imapaccount_id==account_id,
+            ImapUid.folder_name==folder_name, ImapUid.msg_uid > 0).update(
+                    {ImapUid.msg_uid: -ImapUid.msg_uid},
+                    synchronize_session=False)
+
+def remap_uids(account_id, session, folder_name, new_uids):
+    """ new_uids is {g_msgid: new UID} for some of the messages in the
+        folder. Rewrites those messages' negated UIDs, with one UPDATE per
+        KEYSET_IN_MAX of them, and returns how many it found.
+    """
+    options = keyset_options()
+    query = session.query(ImapUid.id, Message.g_msgid).join(Message).filter(
+            ImapUid.imapaccount_id==account_id,
+            ImapUid.folder_name==folder_name, ImapUid.msg_uid < 0)
+    imapuid_for = dict()
+    for imapuid_id, g_msgid in keyset.matching(session, query,
+            Message.g_msgid, new_uids, **options):
+        # if we somehow have a message twice, the other copy stays negative
+        # and gets removed
+        imapuid_for.setdefault(g_msgid, imapuid_id)
+    uid_for = dict((imapuid_id, new_uids[g_msgid]) for g_msgid, imapuid_id \
+            in imapuid_for.iteritems())
+    # keeps both the IN list and the CASE a sensible size
+    for imapuid_ids in chunk(sorted(uid_for), options['in_max']):
+        session.query(ImapUid).filter(ImapUid.id.in_(imapuid_ids)).update(
+                {ImapUid.msg_uid: case(dict((imapuid_id, uid_for[imapuid_id]) \
+                    for imapuid_id in imapuid_ids), value=ImapUid.id)},
+                synchronize_session=False)
+    return len(imapuid_for)
+
+def remove_unmapped_uids(account_id, session, folder_name):
+    """ Drop the UIDs remap_uids() didn't find on the server. """
+    removed = session.query(ImapUid).filter(
+            ImapUid.imapaccount_id==account_id,
+            ImapUid.folder_name==folder_name, ImapUid.msg_uid < 0).delete(
+                    synchronize_session=False)
+    if removed:
+        reconcile_folder_counters(account_id, session, folder_name)
+    return removed
+
 def get_uidvalidity(account_id, session, folder_name):
     try:
         # using .one() here may catch duplication bugs
@@ -125,6 +350,9 @@ def create_message(db_session, log, account, folder_name, uid, internaldate,
     """ Parses message data, creates metadata database entries, and writes mail
         parts to disk.
 
+        body may already have been parsed with mimeparse.parse_many(), in
+        which case it's a ParsedMessage.
+
         Returns the new ImapUid, which links to new Message and Block
         objects through relationships. All new objects are uncommitted.
 
@@ -137,116 +365,207 @@ def create_message(db_session, log, account, folder_name, uid, internaldate,
     """
     # trickle-down bugs
     assert account is not None and account.namespace is not None
-    try:
-        parsed = mime.from_string(body)
-
-        mime_version = parsed.headers.get('Mime-Version')
-        # NOTE: sometimes MIME-Version is set to "1.0 (1.0)", hence the .startswith
-        if mime_version is not None and not mime_version.startswith('1.0'):
-            log.error("Unexpected MIME-Version: %s" % mime_version)
-
-        new_msg = Message()
-        new_msg.data_sha256 = sha256(body).hexdigest()
-
-        # clean_subject strips re:, fwd: etc.
-        new_msg.subject = parsed.clean_subject
-        new_msg.from_addr = parse_email_address(parsed.headers.get('From'))
-        new_msg.sender_addr = parse_email_address(parsed.headers.get('Sender'))
-        new_msg.reply_to = parse_email_address(parsed.headers.get('Reply-To'))
-        new_msg.to_addr = or_none(parsed.headers.getall('To'),
-                lambda tos: filter(lambda p: p is not None,
-                    [parse_email_address(t) for t in tos]))
-        new_msg.cc_addr = or_none(parsed.headers.getall('Cc'),
-                lambda ccs: filter(lambda p: p is not None,
-                    [parse_email_address(c) for c in ccs]))
-        new_msg.bcc_addr = or_none(parsed.headers.getall('Bcc'),
-                lambda bccs: filter(lambda p: p is not None,
-                    [parse_email_address(c) for c in bccs]))
-        new_msg.in_reply_to = parsed.headers.get('In-Reply-To')
-        new_msg.message_id = parsed.headers.get('Message-Id')
-
-        new_msg.internaldate = internaldate
-
-        # Optional mailing list headers
-        new_msg.mailing_list_headers = parse_ml_headers(parsed.headers)
-
-        imapuid = ImapUid(imapaccount=account, folder_name=folder_name,
-                msg_uid=uid, message=new_msg)
-        imapuid.update_flags(flags)
-
-        new_msg.size = len(body)  # includes headers text
-
-        i = 0  # for walk_index
-
-        # Store all message headers as object with index 0
-        headers_part = Block()
-        headers_part.message = new_msg
-        headers_part.walk_index = i
-        headers_part._data = json.dumps(parsed.headers.items())
-        headers_part.size = len(headers_part._data)
-        headers_part.data_sha256 = sha256(headers_part._data).hexdigest()
-        new_msg.parts.append(headers_part)
-
-        for mimepart in parsed.walk(
-                with_self=parsed.content_type.is_singlepart()):
-            err = open('err.txt', 'w')
-            err.write(mimepart.to_string())
-            err.close()
-            i += 1
-            if mimepart.content_type.is_multipart():
-                log.warning("multipart sub-part found! on {0}".format(new_msg.g_msgid))
-                continue  # TODO should we store relations?
-
-            new_part = Block()
-            new_part.message = new_msg
-            new_part.walk_index = i
-            new_part.misc_keyval = mimepart.headers.items()  # everything
-            new_part.content_type = mimepart.content_type.value
-            new_part.filename = mimepart.content_type.params.get('name')
-
-            # Content-Disposition attachment; filename="floorplan.gif"
-            if mimepart.content_disposition[0] is not None:
-                value, params = mimepart.content_disposition
-                if value not in ['inline', 'attachment']:
-                    errmsg = """
-    Unknown Content-Disposition on message {0} found in {1}.
-    Bad Content-Disposition was: '{2}'
-    Parsed Content-Disposition was: '{3}'""".format(uid, folder_name,
-        mimepart.content_disposition)
-                    log.error(errmsg)
-                    continue
-                else:
-                    new_part.content_disposition = value
-                    if value == 'attachment':
-                        new_part.filename = params.get('filename')
-
-            if mimepart.body is None:
-                data_to_write = ''
-            elif new_part.content_type.startswith('text'):
-                data_to_write = mimepart.body.encode('utf-8', 'strict')
-            else:
-                data_to_write = mimepart.body
-            if data_to_write is None:
-                data_to_write = ''
-            # normalize mac/win/unix newlines
-            data_to_write = data_to_write \
-                    .replace('\r\n', '\n').replace('\r', '\n')
-
-            new_part.content_id = mimepart.headers.get('Content-Id')
-
-            new_part._data = data_to_write
-            new_part.size = len(data_to_write)
-            new_part.data_sha256 = sha256(data_to_write).hexdigest()
-            new_msg.parts.append(new_part)
-    except mime.DecodingError:
-        log_decode_error(account.id, folder_name, uid, body)
-        log.error("DecodeError encountered, unparseable message logged to {0}" \
-                .format(get_errfilename(account.id, folder_name, uid)))
+    if isinstance(body, PartialMessage):
+        return create_partial_message(db_session, log, account, folder_name,
+                uid, internaldate, flags, body)
+    if isinstance(body, ParsedMessage):
+        parsed = body
+    else:
+        parsed = parse(body)
+        if parsed is None:
+            log_parse_error(log, account.id, folder_name, uid, body)
+            return
+    log_parse_warnings(log, parsed, folder_name, uid)
+
+    new_msg = Message()
+    new_msg.namespace_id = account.namespace.id
+    set_message_headers(new_msg, parsed, internaldate)
+    new_msg.data_sha256 = parsed.data_sha256
+    new_msg.size = parsed.size  # includes headers text
+
+    imapuid = ImapUid(imapaccount=account, folder_name=folder_name,
+            msg_uid=uid, message=new_msg)
+    imapuid.update_flags(flags)
+
+    # Store all message headers as object with index 0
+    new_msg.parts.append(headers_block(new_msg, parsed))
+    create_parts(new_msg, parsed)
+
+    new_msg.sanitized_body = parsed.sanitized_body
+    new_msg.snippet = parsed.snippet
+
+    return imapuid
+
+def create_parts(new_msg, parsed):
+    """ Create a Block for every leaf MIME part of a parsed message. The
+        headers Block (walk_index 0) is created separately.
+    """
+    for part in parsed.parts:
+        new_part = Block()
+        new_part.message = new_msg
+        new_part.walk_index = part['walk_index']
+        new_part.misc_keyval = part['misc_keyval']
+        new_part.content_type = part['content_type']
+        new_part.filename = part['filename']
+        new_part.content_disposition = part['content_disposition']
+        new_part.content_id = part['content_id']
+        new_part._data = part['data']
+        new_part.size = len(part['data'])
+        new_part.data_sha256 = part['data_sha256']
+        new_msg.parts.append(new_part)
+
+def fill_message_body(db_session, log, imapuid, body):
+    """ Add the parts to a message created by a header-first sync, now that
+        we have the body (a PartialMessage with LAZY_ATTACHMENTS on).
+        Returns False if there's nothing to do, or the body can't be parsed;
+        in that case we keep just the headers and set decode_error, so we
+        don't keep downloading it.
+    """
+    message = imapuid.message
+    if not message.headers_only:
+        # another folder got to it first
+        return False
+    if isinstance(body, PartialMessage):
+        create_partial_parts(message, body.parts)
+        # we never see the whole message, so there's nothing to hash
+        size, data_sha256 = body.size, None
+    else:
+        parsed = parse(body)
+        if parsed is None:
+            log_parse_error(log, imapuid.imapaccount_id, imapuid.folder_name,
+                    imapuid.msg_uid, body)
+            message.headers_only = False
+            message.decode_error = True
+            return False
+        log_parse_warnings(log, parsed, imapuid.folder_name, imapuid.msg_uid)
+        create_parts(message, parsed)
+        message.sanitized_body = parsed.sanitized_body
+        message.snippet = parsed.snippet
+        size, data_sha256 = parsed.size, parsed.data_sha256
+    message.data_sha256 = data_sha256
+    # the headers-only size was already counted in the message's folders
+    for account_id, folder_name in db_session.query(ImapUid.imapaccount_id,
+            ImapUid.folder_name).filter(ImapUid.message_id==message.id):
+        adjust_folder_counters(account_id, db_session, folder_name,
+                bytes=size - (message.size or 0))
+    message.size = size
+    message.headers_only = False
+    return True
+
+def set_message_headers(new_msg, parsed, internaldate):
+    """ Fill in the Message attributes that come from top-level headers. """
+    new_msg.subject = parsed.subject
+    new_msg.from_addr = parsed.from_addr
+    new_msg.sender_addr = parsed.sender_addr
+    new_msg.reply_to = parsed.reply_to
+    new_msg.to_addr = parsed.to_addr
+    new_msg.cc_addr = parsed.cc_addr
+    new_msg.bcc_addr = parsed.bcc_addr
+    new_msg.in_reply_to = parsed.in_reply_to
+    new_msg.message_id = parsed.message_id
+    new_msg.internaldate = internaldate
+    new_msg.mailing_list_headers = parsed.mailing_list_headers
+
+def headers_block(new_msg, parsed):
+    """ All message headers are stored as the Block with walk_index 0. """
+    headers_part = Block()
+    headers_part.message = new_msg
+    headers_part.walk_index = 0
+    headers_part._data = parsed.headers_data
+    headers_part.size = len(headers_part._data)
+    headers_part.data_sha256 = sha256(headers_part._data).hexdigest()
+    return headers_part
+
+def create_partial_message(db_session, log, account, folder_name, uid,
+        internaldate, flags, partial):
+    """ Like create_message, but from a PartialMessage: the header plus the
+        parts crispin fetched up front. Parts that weren't fetched become
+        placeholder Blocks that download themselves when first read.
+    """
+    parsed = parse(partial.headers)
+    if parsed is None:
+        log_parse_error(log, account.id, folder_name, uid, partial.headers)
         return
-    new_msg.calculate_sanitized_body()
+
+    new_msg = Message()
+    new_msg.namespace_id = account.namespace.id
+    # we never see the whole message, so there's nothing to hash
+    new_msg.data_sha256 = None
+    set_message_headers(new_msg, parsed, internaldate)
+    new_msg.size = partial.size
+    # no parts at all means the body comes later
+    new_msg.headers_only = partial.parts is None
+
+    imapuid = ImapUid(imapaccount=account, folder_name=folder_name,
+            msg_uid=uid, message=new_msg)
+    imapuid.update_flags(flags)
+
+    new_msg.parts.append(headers_block(new_msg, parsed))
+
+    create_partial_parts(new_msg, partial.parts or [])
 
     return imapuid
 
+def create_partial_parts(new_msg, parts):
+    """ Create Blocks for the bodystructure.MessageParts of a PartialMessage,
+        and the message's sanitized body and snippet from its text parts.
+    """
+    plain_part = html_part = None
+    for part in parts:
+        new_part = Block()
+        new_part.message = new_msg
+        new_part.walk_index = part.walk_index
+        new_part.misc_keyval = part.headers()
+        new_part.content_type = part.content_type
+        new_part.filename = part.filename
+        new_part.content_id = part.content_id
+        if part.disposition in ('inline', 'attachment'):
+            new_part.content_disposition = part.disposition
+
+        if part.data is None:
+            # placeholder; see Block.fetch_data
+            new_part.imap_section = part.section
+            new_part.size = part.decoded_size
+            new_part.data_sha256 = None
+            new_msg.parts.append(new_part)
+            continue
+
+        data_to_write = decode_part(part.data, part.encoding)
+        if part.content_type.startswith('text'):
+            charset = part.params.get('charset', 'ascii')
+            try:
+                data_to_write = data_to_write.decode(charset)
+            except (UnicodeDecodeError, LookupError):
+                data_to_write = data_to_write.decode('latin-1')
+                new_msg.decode_error = True
+            data_to_write = data_to_write.encode('utf-8', 'strict')
+        # normalize mac/win/unix newlines
+        data_to_write = data_to_write \
+                .replace('\r\n', '\n').replace('\r', '\n')
+        if part.content_type == 'text/html' and html_part is None:
+            html_part = data_to_write.decode('utf-8')
+        elif part.content_type == 'text/plain' and plain_part is None:
+            plain_part = data_to_write.decode('utf-8')
+
+        new_part._data = data_to_write
+        new_part.size = len(data_to_write)
+        new_part.data_sha256 = sha256(data_to_write).hexdigest()
+        new_msg.parts.append(new_part)
+
+    new_msg.sanitized_body, new_msg.snippet = sanitize(plain_part, html_part)
+
+def log_parse_warnings(log, parsed, folder_name, uid):
+    for level, msg in parsed.warnings:
+        getattr(log, level)("{0} (UID {1} in {2})".format(msg, uid,
+            folder_name))
+
+def log_parse_error(log, account_id, folder_name, uid, body):
+    if isinstance(body, SpooledData):
+        body = body.read()
+    log_decode_error(account_id, folder_name, uid, body)
+    log.error("DecodeError encountered, unparseable message logged to {0}" \
+            .format(get_errfilename(account_id, folder_name, uid)))
+
 def get_errfilename(account_id, folder_name, uid):
     errdir = os.path.join(config['LOGDIR'], str(account_id), 'errors',
             folder_name)
@@ -260,6 +579,117 @@ def log_decode_error(account_id, folder_name, uid, msg_string):
     with open(errfile, 'w') as fh:
         fh.write(msg_string)
 
+def thread_labels(x_gm_labels, folder_name):
+    """ Labels to apply to the thread of a message with these X-GM-LABELS
+        that we found in folder_name.
+    """
+    # convert things like \Inbox -> Inbox, \Important -> Important
+    # also, gmail labels are case-insensitive
+    return set([l.lstrip('\\').lower() for l in x_gm_labels] + \
+            [folder_name.lower()])
+
+def update_thread_labels(existing, new_labels):
+    """ A thread's labels after adding a message with new_labels to it. """
+    existing_lower = set(l.lower() for l in existing)
+    # remove labels that have been deleted -- note that the \Sent label is
+    # per-message, not per-thread, but since we always work at the thread
+    # level, _we_ apply the label to the whole thread. same goes for
+    # \Important.
+    kept = set(l for l in existing if l in new_labels \
+            or l in ('sent', 'important'))
+    return kept | set(l for l in new_labels if l not in existing_lower)
+
+class ThreadCache(object):
+    """ Threads (and their labels) we've seen during one sync's session,
+        by namespace and g_thrid.
+
+        Without it, add_gmail_attrs looks up each message's thread with a
+        query (so an autoflush) and lazy-loads the thread's FolderItems.
+        prewarm() fetches the threads and labels for a whole batch with
+        two IN queries; after that, messages in the batch don't touch the
+        database until commit, and threads created earlier in the batch
+        are found here rather than by flushing.
+
+        Lives on the session (see thread_cache()) and only lasts a
+        transaction: it's emptied when the session commits, since every
+        batch prewarms what it needs anyway and otherwise it would grow
+        with the mailbox, and when it rolls back, since new threads in it
+        may never have made it to the database.
+    """
+    def __init__(self):
+        # { (namespace_id, g_thrid): Thread, or None if there isn't one }
+        self._threads = dict()
+        # { (namespace_id, g_thrid): { label: FolderItem } }
+        self._items = dict()
+
+    def clear(self):
+        self._threads.clear()
+        self._items.clear()
+
+    def prewarm(self, db_session, namespace_id, g_thrids):
+        """ Look up (or refresh) the threads and labels for g_thrids. """
+        g_thrids = set(str(g_thrid) for g_thrid in g_thrids)
+        if not g_thrids:
+            return
+        for g_thrid in g_thrids:
+            self._threads[(namespace_id, g_thrid)] = None
+            self._items.pop((namespace_id, g_thrid), None)
+        key_for = dict()
+        for thread in db_session.query(Thread).filter(
+                Thread.namespace_id==namespace_id,
+                Thread.g_thrid.in_(g_thrids)).order_by(Thread.id):
+            key = (namespace_id, thread.g_thrid)
+            if self._threads[key] is not None:
+                log.info("Duplicate thread rows for thread {0}".format(
+                    thread.g_thrid))
+                continue
+            self._threads[key] = thread
+            self._items[key] = dict()
+            key_for[thread.id] = key
+        if key_for:
+            for item in db_session.query(FolderItem).filter(
+                    FolderItem.thread_id.in_(key_for)):
+                self._items[key_for[item.thread_id]][item.folder_name] = item
+
+    def thread_for(self, db_session, namespace, message):
+        """ Like Thread.from_message, for threads we've prewarmed or seen
+            before in this session.
+        """
+        key = (namespace.id, str(message.g_thrid))
+        if key not in self._threads:
+            thread = Thread.from_message(db_session, namespace, message)
+            self._items[key] = dict((item.folder_name, item) for item in \
+                    thread.folders)
+        elif self._threads[key] is None:
+            thread = Thread(subject=message.subject, g_thrid=message.g_thrid,
+                    recentdate=message.internaldate, namespace=namespace,
+                    subjectdate=message.internaldate)
+            self._items[key] = dict()
+        else:
+            thread = self._threads[key].update_from_message(message)
+        self._threads[key] = thread
+        return thread
+
+    def folder_items(self, namespace_id, g_thrid):
+        """ { label: FolderItem } for a thread from thread_for(). Keep it up
+            to date as you add and remove labels.
+        """
+        return self._items[(namespace_id, str(g_thrid))]
+
+def thread_cache(db_session):
+    """ The ThreadCache for db_session, made on first use. """
+    if getattr(db_session, 'thread_cache', None) is None:
+        db_session.thread_cache = ThreadCache()
+
+        @event.listens_for(db_session, 'after_commit')
+        def after_commit(session):
+            session.thread_cache.clear()
+
+        @event.listens_for(db_session, 'after_rollback')
+        def after_rollback(session):
+            session.thread_cache.clear()
+    return db_session.thread_cache
+
 def add_gmail_attrs(db_session, log, new_uid, flags, folder_name, x_gm_thrid,
         x_gm_msgid, x_gm_labels):
     """ Gmail-specific post-create-message bits."""
@@ -269,28 +699,28 @@ def add_gmail_attrs(db_session, log, new_uid, flags, folder_name, x_gm_thrid,
     new_uid.message.g_thrid = x_gm_thrid
     new_uid.update_flags(flags, x_gm_labels)
 
-    # NOTE: This code _requires_ autoflush=True, otherwise duplicate
-    # threads may attempt to be created and crash.
-    thread = new_uid.message.thread = Thread.from_message(db_session,
-            new_uid.imapaccount.namespace, new_uid.message)
+    # Threads we haven't seen in this session are looked up with a query,
+    # which needs autoflush=True to find ones created earlier in the
+    # session; prewarm the session's thread cache to skip that.
+    namespace = new_uid.imapaccount.namespace
+    cache = thread_cache(db_session)
+    thread = new_uid.message.thread = cache.thread_for(db_session, namespace,
+            new_uid.message)
+    thread.add_message(new_uid.message, unread=not new_uid.is_seen)
     # make sure this thread has all the correct labels
-    existing_labels = set([l.folder_name.lower() for l in thread.folders])
-    # convert things like \Inbox -> Inbox, \Important -> Important
-    # also, gmail labels are case-insensitive
-    new_labels = set([l.lstrip('\\').lower() for l in x_gm_labels] + \
-            [folder_name.lower()])
-    # remove labels that have been deleted -- note that the \Sent label is
-    # per-message, not per-thread, but since we always work at the thread
-    # level, _we_ apply the label to the whole thread. same goes for
-    # \Important.
-    thread.folders = [l for l in thread.folders if l.folder_name in new_labels \
-            or l.folder_name in ('sent', 'important')]
+    items = cache.folder_items(namespace.id, x_gm_thrid)
+    new_labels = update_thread_labels(set(items),
+            thread_labels(x_gm_labels, folder_name))
+    for label in set(items) - new_labels:
+        # rare; removing it from the collection deletes it (or forgets it,
+        # if it's new)
+        thread.folders.remove(items.pop(label))
     # add new labels
-    for label in new_labels:
-        if label.lower() not in existing_labels:
-            # creates by association
-            item = FolderItem(thread=thread, folder_name=label)
-            db_session.add(item)
+    for label in new_labels - set(items):
+        # creates by association
+        item = items[label] = FolderItem(thread=thread, folder_name=label)
+        db_session.add(item)
+    thread.labels = sorted(items)
 
     return new_uid
 
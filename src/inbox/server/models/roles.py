@@ -48,7 +48,12 @@ class Blob(object):
             # NOTE: This is a placeholder for "empty bytes". If this doesn't
             # work as intended, it will trigger the hash assertion later.
             data = ""
-        elif hasattr(self, '_data'):
+        elif self.data_sha256 is None:
+            # placeholder for data we didn't download during sync
+            data = self.fetch_data()
+            self.save(data)
+            return data
+        elif getattr(self, '_data', None) is not None:
             # on initial download we temporarily store data in memory
             data = self._data
         elif STORE_MSG_ON_S3:
@@ -59,6 +64,11 @@ class Blob(object):
                 "Returned data doesn't match stored hash!"
         return data
 
+    def fetch_data(self):
+        """ Override this to download data for placeholder blobs. """
+        raise NotImplementedError("{0} {1} has no data".format(
+            self.__class__.__name__, self.id))
+
     def delete_data(self):
         if self.size == 0:
             # nothing to do here
@@ -1,26 +1,22 @@
 import os
 import json
 
-from itertools import chain
-
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum
+from sqlalchemy import BigInteger
 from sqlalchemy import ForeignKey, Text, Index, func, event
 from sqlalchemy.orm import reconstructor, relationship, backref
+from sqlalchemy.orm import object_session
 from sqlalchemy.schema import UniqueConstraint
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
-from bs4 import BeautifulSoup, Doctype, Comment
-
 from ..log import get_logger
 log = get_logger()
 
-from inbox.util.file import Lock
-from inbox.util.html import plaintext2html
-from inbox.util.misc import strip_plaintext_quote
 from inbox.sqlalchemy.util import Base, JSON, LittleJSON
 from inbox.sqlalchemy.revision import Revision, gen_rev_role
 
 from .roles import JSONSerializable, Blob
+from ..mimeparse import sanitize_body
 
 # global
 
@@ -37,12 +33,19 @@ class ImapAccount(Base):
     # local flags & data
     save_raw_messages = Column(Boolean, default=True)
 
-    sync_host = Column(String(255), nullable=True)
     last_synced_contacts = Column(DateTime, nullable=True)
 
     @property
     def sync_active(self):
-        return self.sync_host is not None
+        return self.sync_lease is not None
+
+    @property
+    def sync_host(self):
+        """ The host holding this account's sync lease, if any. (It may have
+            died; see SyncLease.)
+        """
+        if self.sync_lease is not None:
+            return self.sync_lease.host
 
     # oauth stuff (most providers support oauth at this point, shockingly)
     # TODO figure out the actual lengths of these
@@ -63,19 +66,33 @@ class ImapAccount(Base):
     # used to verify key lifespan
     date = Column(DateTime)
 
-    @property
-    def _sync_lockfile_name(self):
-        return "/var/lock/inbox_sync/{0}.lock".format(self.id)
 
-    @property
-    def _sync_lock(self):
-        return Lock(self._sync_lockfile_name, block=False)
+class SyncLease(Base):
+    """ An account that should be syncing, and which sync host has it.
 
-    def sync_lock(self):
-        self._sync_lock.acquire()
+        The row exists for as long as sync is on for the account. host is
+        the sync host that claimed it, which has to renew the lease before
+        expires_at or lose it; an expired or unclaimed lease can be claimed
+        by any host. See mailsync/lease.py.
+    """
+    imapaccount_id = Column(ForeignKey('imapaccount.id', ondelete='CASCADE'),
+            nullable=False, unique=True)
+    imapaccount = relationship('ImapAccount',
+            backref=backref('sync_lease', uselist=False))
 
-    def sync_unlock(self):
-        self._sync_lock.release()
+    # indexed columns can only be 767 bytes under utf8mb4
+    host = Column(String(191), nullable=True, index=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+    # when host last renewed it
+    renewed_at = Column(DateTime, nullable=True)
+
+class SyncHost(Base):
+    """ A sync host and how many accounts it can take. Hosts heartbeat this
+        row; ones that stop are left out when working out shares.
+    """
+    hostname = Column(String(191), nullable=False, unique=True)
+    capacity = Column(Integer, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False)
 
 class UserSession(Base):
     """ Inbox-specific sessions. """
@@ -127,15 +144,14 @@ class Transaction(Base, Revision):
     namespace_id = Column(Integer, ForeignKey('namespace.id'), nullable=False)
     namespace = relationship('Namespace', backref='transactions')
 
-    def set_extra_attrs(self, obj):
+    @classmethod
+    def extra_attrs(cls, obj):
         try:
-            self.namespace = obj.namespace
+            return dict(namespace_id=obj.namespace.id)
         except AttributeError:
-            log.info("Couldn't create {2} revision for {0}:{1}".format(
-                self.table_name, self.record_id, self.command))
-            log.info("Delta is {0}".format(self.delta))
+            log.info("Couldn't create revision for {0}:{1}".format(
+                obj.__tablename__, obj.id))
             log.info("Thread is: {0}".format(obj.thread_id))
-            import pdb; pdb.set_trace()
             raise
 
 HasRevisions = gen_rev_role(Transaction)
@@ -179,6 +195,12 @@ class Message(JSONSerializable, Base, HasRevisions):
     thread = relationship('Thread', backref="messages",
             order_by="Message.internaldate")
 
+    # same as thread.namespace_id, so namespace-scoped queries don't need to
+    # join through threads or UIDs. NULL on rows from before we had it until
+    # tools/backfill-namespace-ids gets to them.
+    namespace_id = Column(ForeignKey('namespace.id', ondelete='CASCADE'),
+            nullable=True)
+
     from_addr = Column(JSON, nullable=True)
     sender_addr = Column(JSON, nullable=True)
     reply_to = Column(JSON, nullable=True)
@@ -208,8 +230,13 @@ class Message(JSONSerializable, Base, HasRevisions):
     # mail-parsing bug, or just a message from a bad client.
     decode_error = Column(Boolean, default=False, nullable=False)
 
+    # header-first initial sync creates messages before we have the body;
+    # the parts get filled in later (see imapaccount.fill_message_body)
+    headers_only = Column(Boolean, default=False, nullable=False)
+
     # only on messages from Gmail
-    g_msgid = Column(String(40), nullable=True)
+    # (indexed for remapping UIDs after a UIDVALIDITY change)
+    g_msgid = Column(String(40), nullable=True, index=True)
     g_thrid = Column(String(40), nullable=True)
 
     @property
@@ -218,49 +245,8 @@ class Message(JSONSerializable, Base, HasRevisions):
 
     def calculate_sanitized_body(self):
         plain_part, html_part = self.body()
-        snippet_length = 191
-        if html_part:
-            assert '\r' not in html_part, "newlines not normalized"
-
-            # Try our best to strip out gmail quoted text.
-            soup = BeautifulSoup(html_part.strip(), "lxml")
-            for div in soup.findAll('div', 'gmail_quote'):
-                div.extract()
-            for container in soup.findAll('div', 'gmail_extra'):
-                if container.contents is not None:
-                    for tag in reversed(container.contents):
-                        if not hasattr(tag, 'name') or tag.name != 'br': break
-                        else: tag.extract()
-                if container.contents is None:
-                    # we emptied it!
-                    container.extract()
-
-            # Paragraphs don't need trailing line-breaks.
-            for container in soup.findAll('p'):
-                if container.contents is not None:
-                    for tag in reversed(container.contents):
-                        if not hasattr(tag, 'name') or tag.name != 'br': break
-                        else: tag.extract()
-
-            # Misc other crap.
-            dtd = [item for item in soup.contents if isinstance(item, Doctype)]
-            comments = soup.findAll(text=lambda text:isinstance(text, Comment))
-            for tag in chain(dtd, comments):
-                tag.extract()
-
-            self.sanitized_body = unicode(soup)
-
-            # trim for snippet
-            for tag in soup.findAll(['style', 'head', 'title']):
-                tag.extract()
-            self.snippet = soup.get_text(' ')[:191]
-        elif plain_part is None:
-            self.sanitized_body = u''
-            self.snippet = u''
-        else:
-            stripped = strip_plaintext_quote(plain_part.strip())
-            self.sanitized_body = plaintext2html(stripped)
-            self.snippet = stripped[:snippet_length]
+        self.sanitized_body, self.snippet = sanitize_body(plain_part,
+                html_part)
 
     def body(self):
         """ Returns (plaintext, html) body for the message, decoded. """
@@ -335,6 +321,12 @@ class Message(JSONSerializable, Base, HasRevisions):
 
         return json_headers
 
+# the lookups sync and the API do within a namespace
+Index('message_namespace_id_g_msgid', Message.namespace_id, Message.g_msgid)
+Index('message_namespace_id_g_thrid', Message.namespace_id, Message.g_thrid)
+Index('message_namespace_id_internaldate', Message.namespace_id,
+        Message.internaldate)
+
 # These are the top 15 most common Content-Type headers
 # in my personal mail archive. --mg
 common_content_types = ['text/plain',
@@ -357,6 +349,9 @@ class Block(JSONSerializable, Blob, Base, HasRevisions):
     """ Metadata for message parts stored in s3 """
     message_id = Column(Integer, ForeignKey('message.id'), nullable=False)
     message = relationship('Message', backref="parts")
+    # same as message.namespace_id; set on insert
+    namespace_id = Column(ForeignKey('namespace.id', ondelete='CASCADE'),
+            nullable=True, index=True)
 
     walk_index = Column(Integer)
     # Save some space with common content types
@@ -370,6 +365,10 @@ class Block(JSONSerializable, Blob, Base, HasRevisions):
 
     is_inboxapp_attachment = Column(Boolean, default=False)
 
+    # IMAP part specifier (e.g. '2.1') for parts we didn't download during
+    # sync; NULL once the data is in the block store
+    imap_section = Column(String(64), nullable=True)
+
     # TODO: create a constructor that allows the 'content_type' keyword
 
     __table_args__ = (UniqueConstraint('message_id', 'walk_index', 'data_sha256'),)
@@ -403,6 +402,46 @@ class Block(JSONSerializable, Blob, Base, HasRevisions):
     def namespace(self):
         return self.message.namespace
 
+    def fetch_data(self):
+        """ Download a part we left on the IMAP server during sync. """
+        # circular import
+        from ..crispin import new_crispin
+        from ..bodystructure import decode_part
+        assert self.imap_section is not None, \
+                "Block {0} has no data and nowhere to fetch it from".format(
+                        self.id)
+        db_session = object_session(self)
+        imapuid = db_session.query(ImapUid).filter_by(
+                message_id=self.message_id).first()
+        assert imapuid is not None, \
+                "No UIDs left for message {0}".format(self.message_id)
+        account = imapuid.imapaccount
+        saved_validity = db_session.query(UIDValidity).filter_by(
+                imapaccount_id=account.id,
+                folder_name=imapuid.folder_name).one()
+
+        def check_uidvalidity(folder, select_info):
+            assert select_info['UIDVALIDITY'] == saved_validity.uid_validity, \
+                    "UIDVALIDITY changed on {0}; can't fetch part".format(
+                            folder)
+            return select_info
+
+        crispin_client = new_crispin(account.id, account.provider)
+        with crispin_client.pool.get() as c:
+            crispin_client.select_folder(imapuid.folder_name,
+                    check_uidvalidity, c)
+            data = crispin_client.fetch_part(imapuid.msg_uid,
+                    self.imap_section, c)
+        encoding = dict((k.lower(), v) for k, v in self.misc_keyval).get(
+                'content-transfer-encoding')
+        self.imap_section = None
+        return decode_part(data, encoding)
+
+@event.listens_for(Block, 'before_insert', propagate = True)
+def set_namespace_before_insert(mapper, connection, target):
+    if target.namespace_id is None and target.message is not None:
+        target.namespace_id = target.message.namespace_id
+
 @event.listens_for(Block, 'before_insert', propagate = True)
 def serialize_before_insert(mapper, connection, target):
     if target.content_type in common_content_types:
@@ -526,6 +565,22 @@ class Thread(JSONSerializable, Base):
     # unique globally.
     g_thrid = Column(String(255), nullable=True, index=True)
 
+    # What a thread list shows, kept current by the sync writer as messages
+    # and labels are added and flags change, so listing a folder doesn't
+    # have to load any messages. See add_message() and
+    # imapaccount.update_unread_counts().
+    message_count = Column(Integer, default=0, nullable=False)
+    unread_count = Column(Integer, default=0, nullable=False)
+    # [[name, address], ...] in the order they first turned up
+    participants = Column(JSON, nullable=True)
+    # of the most recent message
+    snippet = Column(String(191), nullable=True)
+    has_attachments = Column(Boolean, default=False, nullable=False)
+    # sorted folder_names of the thread's FolderItems
+    labels = Column(JSON, nullable=True)
+
+    MAX_PARTICIPANTS = 50
+
     def update_from_message(self, message):
         if message.internaldate > self.recentdate:
             self.recentdate = message.internaldate
@@ -558,6 +613,43 @@ class Thread(JSONSerializable, Base):
                 subjectdate=message.internaldate)
         return thread
 
+    def add_message(self, message, unread):
+        """ Count a new message in the summary columns. Call after
+            update_from_message() (or creating the thread from message).
+        """
+        self.message_count = (self.message_count or 0) + 1
+        if unread:
+            self.unread_count = (self.unread_count or 0) + 1
+        if message.internaldate >= self.recentdate:
+            self.snippet = message.snippet
+        if any(part.content_disposition == 'attachment' for part in \
+                message.parts):
+            self.has_attachments = True
+
+        participants = list(self.participants or [])
+        seen = set(addr.lower() for _, addr in participants)
+        addrs = ([message.from_addr] if message.from_addr else []) + \
+                (message.to_addr or []) + (message.cc_addr or [])
+        for name, addr in addrs:
+            if len(participants) >= self.MAX_PARTICIPANTS:
+                break
+            if addr and addr.lower() not in seen:
+                seen.add(addr.lower())
+                participants.append([name, addr])
+        # JSON columns don't notice changes in place
+        self.participants = participants
+
+    def summary(self):
+        """ The thread without its messages, for thread lists. """
+        return dict(id=self.id, subject=self.subject,
+                recentdate=self.recentdate,
+                message_count=self.message_count,
+                unread_count=self.unread_count,
+                participants=self.participants or [],
+                snippet=self.snippet,
+                has_attachments=self.has_attachments,
+                labels=self.labels or [])
+
     def cereal(self):
         """ Threads are serialized with full message data. """
         d = {}
@@ -580,5 +672,36 @@ class FolderSync(Base):
     state = Column(Enum('initial', 'initial uidinvalid',
                         'poll', 'poll uidinvalid', 'finish'),
                         default='initial', nullable=False)
+    # progress within a state that takes several passes: during a
+    # header-first initial sync, 'headers' and then 'bodies' while message
+    # bodies are backfilled
+    substate = Column(Enum('headers', 'bodies'), nullable=True)
+
+    __table_args__ = (UniqueConstraint('imapaccount_id', 'folder_name'),)
+
+class FolderCounter(Base):
+    """ How many messages (and unread ones, and bytes) we have in a folder,
+        so nobody has to count ImapUids to find out.
+
+        Sync adjusts these in the same transactions that add, remove and
+        update UIDs (see imapaccount.adjust_folder_counters), and
+        imapaccount.reconcile_folder_counters recounts now and then to fix
+        any drift.
+    """
+    imapaccount_id = Column(ForeignKey('imapaccount.id', ondelete='CASCADE'),
+            nullable=False)
+    imapaccount = relationship('ImapAccount')
+    # maximum Gmail label length is 225 (tested empirically), but constraining
+    # folder_name uniquely requires max length of 767 bytes under utf8mb4
+    # http://mathiasbynens.be/notes/mysql-utf8mb4
+    folder_name = Column(String(191), nullable=False)
+
+    total = Column(Integer, default=0, nullable=False)
+    unread = Column(Integer, default=0, nullable=False)
+    # sum of Message.size over the folder's UIDs
+    bytes = Column(BigInteger, default=0, nullable=False)
 
     __table_args__ = (UniqueConstraint('imapaccount_id', 'folder_name'),)
+
+    def cereal(self):
+        return dict(total=self.total, unread=self.unread, bytes=self.bytes)
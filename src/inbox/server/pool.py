@@ -1,8 +1,17 @@
+import zlib
+
+from contextlib import contextmanager
+
+import gevent
+
 # monkey-patch so geventconnpool's @retry recognizes errors
 from gevent import socket
 import imaplib
 imaplib.IMAP4.error = socket.error
 imaplib.IMAP4.abort = socket.error
+# RFC 4978 / RFC 5161; imaplib refuses to send commands it doesn't know about
+imaplib.Commands['COMPRESS'] = ('AUTH', 'SELECTED')
+imaplib.Commands['ENABLE'] = ('AUTH',)
 
 from geventconnpool import ConnectionPool
 
@@ -28,11 +37,114 @@ def get_connection_pool(account_id):
                 = IMAPConnectionPool(account_id, num_connections=POOL_SIZE)
     return pool
 
+class DeflateStream(object):
+    """ COMPRESS=DEFLATE (RFC 4978) for an imaplib connection.
+
+        Replaces the connection's read/readline/send with versions that go
+        through a raw deflate stream, and keeps byte counters on both sides
+        of the compression so we can see how much we actually save.
+    """
+    READ_SIZE = 64*1024
+
+    def __init__(self, imap):
+        self.imap = imap
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION,
+                zlib.DEFLATED, -15)
+        self._decompressor = zlib.decompressobj(-15)
+        self._buffer = ''
+        # imaplib's send() writes everything it's given
+        self._raw_send = imap.send
+        sslobj = getattr(imap, 'sslobj', None)
+        self._raw_read = sslobj.read if sslobj is not None else imap.sock.recv
+
+        self.compressed_in = 0
+        self.uncompressed_in = 0
+        self.compressed_out = 0
+        self.uncompressed_out = 0
+
+        imap.read = self.read
+        imap.readline = self.readline
+        imap.send = self.send
+
+    def _fill(self):
+        compressed = self._raw_read(self.READ_SIZE)
+        if not compressed:
+            raise self.imap.abort("socket error: EOF")
+        self.compressed_in += len(compressed)
+        data = self._decompressor.decompress(compressed)
+        self.uncompressed_in += len(data)
+        self._buffer += data
+
+    def read(self, size):
+        pieces = []
+        while size > 0:
+            if not self._buffer:
+                self._fill()
+            piece = self._buffer[:size]
+            self._buffer = self._buffer[len(piece):]
+            pieces.append(piece)
+            size -= len(piece)
+        return ''.join(pieces)
+
+    def readline(self):
+        pieces = []
+        while True:
+            if not self._buffer:
+                self._fill()
+            end = self._buffer.find('\n') + 1
+            if end:
+                pieces.append(self._buffer[:end])
+                self._buffer = self._buffer[end:]
+                return ''.join(pieces)
+            pieces.append(self._buffer)
+            self._buffer = ''
+
+    def send(self, data):
+        self.uncompressed_out += len(data)
+        compressed = self._compressor.compress(data) + \
+                self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.compressed_out += len(compressed)
+        self._raw_send(compressed)
+
+    def stats(self):
+        return dict(compressed_in=self.compressed_in,
+                uncompressed_in=self.uncompressed_in,
+                compressed_out=self.compressed_out,
+                uncompressed_out=self.uncompressed_out)
+
+def enable_compression(conn):
+    """ Negotiate COMPRESS=DEFLATE on an authenticated IMAPClient connection.
+
+        Afterwards conn.compression.stats() has the byte counters.
+    """
+    typ, data = conn._imap._simple_command('COMPRESS', 'DEFLATE')
+    if typ != 'OK':
+        raise socket.error("COMPRESS DEFLATE failed: {0}".format(data))
+    # compression starts right after the tagged OK
+    conn.compression = DeflateStream(conn._imap)
+
+def discard_connection(conn):
+    """ Shut down a connection that's in a state we can't recover from,
+        e.g. with commands in flight whose responses nobody will read.
+
+        Anything still using it gets a socket.error from then on, and the
+        pool replaces it instead of handing it out again.
+    """
+    conn.discarded = True
+    try:
+        # closing the plain socket isn't enough: imaplib's SSL object holds
+        # on to it too
+        conn._imap.sock.shutdown(socket.SHUT_RDWR)
+        conn._imap.shutdown()
+    except socket.error:
+        pass
+
 class IMAPConnectionPool(ConnectionPool):
-    def __init__(self, account_id, num_connections=5):
+    def __init__(self, account_id, num_connections=5, compress=True):
         log.info("Creating connection pool for account {0} with {1} connections" \
                 .format(account_id, num_connections))
         self.account_id = account_id
+        self.compress = compress
         self._set_account_info()
         # 1200s == 20min
         ConnectionPool.__init__(self, num_connections, keepalive=1200)
@@ -60,7 +172,49 @@ class IMAPConnectionPool(ConnectionPool):
                 self._set_account_info()
                 conn.oauth2_login(self.email_address, self.o_access_token)
 
+        conn.discarded = False
+        conn.compression = None
+        if self.compress and conn.has_capability('COMPRESS=DEFLATE'):
+            enable_compression(conn)
+
+        # QRESYNC has to be ENABLEd before the first SELECT (RFC 5162)
+        conn.qresync_enabled = False
+        if conn.has_capability('QRESYNC'):
+            typ, data = conn._imap._simple_command('ENABLE', 'QRESYNC')
+            conn.qresync_enabled = typ == 'OK'
+
         return conn
 
+    @contextmanager
+    def get(self):
+        """ Like ConnectionPool.get(), except that connections discarded
+            while checked out (see discard_connection) are replaced rather
+            than going back in the pool.
+        """
+        self.lock.acquire()
+        try:
+            c = self.conn.popleft()
+            yield c
+        except socket.error:
+            # The current connection has failed, drop it and create a new one
+            gevent.spawn_later(1, self._addOne)
+            raise
+        except:
+            self._put_back(c)
+            raise
+        else:
+            self._put_back(c)
+
+    def _put_back(self, c):
+        if c.discarded:
+            # _addOne releases the lock once the replacement is ready
+            gevent.spawn(self._addOne)
+        else:
+            self.conn.append(c)
+            self.lock.release()
+
     def _keepalive(self, c):
         c.noop()
+        if c.compression is not None:
+            log.info("Connection for account {0}: {1}".format(
+                self.account_id, c.compression.stats()))
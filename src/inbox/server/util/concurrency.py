@@ -1,8 +1,16 @@
+import os
 import sys
+import time
+import fcntl
+import struct
+import cPickle as pickle
+import traceback
+import multiprocessing
 
 import zerorpc
 from time import sleep
-from gevent import Greenlet
+from gevent import Greenlet, socket
+from gevent.queue import Queue
 
 from ..log import get_logger
 log = get_logger()
@@ -26,3 +34,116 @@ def print_dots():
             sys.stdout.flush()
             sleep(.02)
     Greenlet.spawn(m)
+
+class WorkerError(Exception):
+    """ A function run in a ProcessPool worker raised. """
+    pass
+
+def _read_exactly(read, size):
+    data = []
+    while size > 0:
+        chunk = read(size)
+        if not chunk:
+            raise EOFError("worker pipe closed")
+        data.append(chunk)
+        size -= len(chunk)
+    return ''.join(data)
+
+_LENGTH = struct.Struct('!I')
+
+def _pack(obj):
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return _LENGTH.pack(len(data)) + data
+
+def _unpack(read):
+    size, = _LENGTH.unpack(_read_exactly(read, _LENGTH.size))
+    return pickle.loads(_read_exactly(read, size))
+
+def _worker_loop(fd):
+    """ Runs in the child. Only plain blocking syscalls here: the child
+        inherits the parent's greenlets and must never switch to them.
+    """
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags & ~os.O_NONBLOCK)
+    read = lambda size: os.read(fd, size)
+    while True:
+        try:
+            fn, args = _unpack(read)
+        except EOFError:
+            return
+        try:
+            result = ('ok', fn(*args))
+        except Exception, e:
+            result = ('error', '{0}: {1}\n{2}'.format(type(e).__name__, e,
+                traceback.format_exc()))
+        data = _pack(result)
+        while data:
+            data = data[os.write(fd, data):]
+
+class _Worker(object):
+    def __init__(self):
+        self.sock, child_sock = socket.socketpair()
+        self.pid = os.fork()
+        if self.pid == 0:
+            self.sock.close()
+            try:
+                _worker_loop(child_sock.fileno())
+            finally:
+                os._exit(0)
+        child_sock.close()
+
+    def call(self, fn, args):
+        self.sock.sendall(_pack((fn, args)))
+        return _unpack(self.sock.recv)
+
+    def kill(self):
+        self.sock.close()
+        try:
+            os.kill(self.pid, 9)
+            os.waitpid(self.pid, 0)
+        except OSError:
+            pass
+
+class ProcessPool(object):
+    """ A pool of forked worker processes for CPU-bound work, usable from
+        greenlets without blocking the hub.
+
+        apply() ships a module-level function and its (picklable) arguments
+        to an idle worker and waits on a gevent socket for the result, so
+        other greenlets keep running meanwhile. Callers block when all
+        workers are busy.
+
+        Workers are forked when the pool is created and inherit whatever
+        the parent had open then; they must only compute, never touch the
+        parent's connections.
+    """
+    def __init__(self, num_workers=None):
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self._idle = Queue()
+        for _ in xrange(self.num_workers):
+            self._idle.put(_Worker())
+        self.tasks = 0
+        # wall-clock seconds workers spent on tasks, including IPC
+        self.busy_seconds = 0.0
+
+    def apply(self, fn, *args):
+        worker = self._idle.get()
+        start = time.time()
+        try:
+            status, result = worker.call(fn, args)
+        except BaseException:
+            # the worker's in an unknown state (maybe we were killed
+            # mid-call); replace it
+            worker.kill()
+            self._idle.put(_Worker())
+            raise
+        self._idle.put(worker)
+        self.tasks += 1
+        self.busy_seconds += time.time() - start
+        if status == 'error':
+            raise WorkerError(result)
+        return result
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get().kill()
@@ -0,0 +1,133 @@
+""" Set operations between a big batch of keys and what's in the database.
+
+Filtering with column.in_(keys) puts every key in the statement. With tens
+of thousands of keys that runs into MySQL's max_allowed_packet, and the
+server plans it as one enormous range scan. Instead, once there are more
+than in_max keys, we load them into a TEMPORARY TABLE with multi-row
+INSERTs and let the database join against it. Temporary tables belong to
+the connection, so this all happens on the session's connection, inside
+its transaction, and the table is dropped when we're done (with DROP
+TEMPORARY TABLE, which unlike DROP TABLE doesn't commit on MySQL).
+
+With temp_tables=False (e.g. if statement-based replication makes
+temporary tables a pain), big batches are sent as IN queries of at most
+in_max keys each instead.
+
+    matching(session, query, column, keys)
+        what query returns with column in keys
+    present(session, query, column, keys)
+        the keys that query has in column
+    missing(session, query, column, keys)
+        the keys that query doesn't have in column
+    delete(session, query, column, keys)
+        delete what query finds with column in keys
+"""
+from contextlib import contextmanager
+from itertools import count
+
+from sqlalchemy import Table, Column, MetaData, String
+
+from inbox.util.itert import chunk
+
+# keys per INSERT when filling a temporary table
+INSERT_CHUNK_SIZE = 5000
+
+_metadata = MetaData()
+_table_ids = count()
+
+# the longest string a utf8mb4 InnoDB key can hold (767 bytes)
+MAX_KEY_LENGTH = 191
+
+def _key_type(column):
+    """ column's own type, so the join compares like with like, but no
+        longer than fits in a key.
+    """
+    key_type = column.type
+    if isinstance(key_type, String) and \
+            (key_type.length is None or key_type.length > MAX_KEY_LENGTH):
+        return String(MAX_KEY_LENGTH)
+    return key_type
+
+@contextmanager
+def key_table(session, keys, column):
+    """ A temporary table with one column, key, holding keys, of the same
+        type as column.
+    """
+    table = Table('keyset_{0}'.format(next(_table_ids)), _metadata,
+            Column('key', _key_type(column), primary_key=True,
+                autoincrement=False),
+            prefixes=['TEMPORARY'])
+    connection = session.connection()
+    table.create(bind=connection)
+    try:
+        for keys_chunk in chunk(keys, INSERT_CHUNK_SIZE):
+            connection.execute(table.insert(),
+                    [dict(key=key) for key in keys_chunk])
+        yield table
+    finally:
+        _drop(connection, table)
+        _metadata.remove(table)
+
+def _drop(connection, table):
+    if connection.dialect.name == 'mysql':
+        # Table.drop() doesn't say TEMPORARY, and a plain DROP TABLE makes
+        # MySQL commit the caller's transaction first
+        connection.execute('DROP TEMPORARY TABLE {0}'.format(
+            connection.dialect.identifier_preparer.format_table(table)))
+    else:
+        table.drop(bind=connection)
+
+def matching(session, query, column, keys, in_max=1000, temp_tables=True):
+    """ Everything query returns with column in keys, as a list. """
+    keys = set(keys)
+    if not keys:
+        return []
+    if len(keys) <= in_max or not temp_tables:
+        return [row for keys_chunk in chunk(keys, in_max) \
+                for row in query.filter(column.in_(keys_chunk))]
+    with key_table(session, keys, column) as table:
+        return query.join(table, table.c.key==column).all()
+
+def present(session, query, column, keys, in_max=1000, temp_tables=True):
+    """ The keys that query finds in column, as a set. query should select
+        just column.
+    """
+    return set(key for key, in matching(session, query, column, keys,
+        in_max, temp_tables))
+
+def _stored(key, key_type):
+    """ key the way the database hands it back from a key_type column, e.g.
+        a string for a number in a string column.
+    """
+    if isinstance(key, basestring):
+        return key
+    return key_type.python_type(key)
+
+def missing(session, query, column, keys, in_max=1000, temp_tables=True):
+    """ The keys that query doesn't find in column, as a set. """
+    keys = set(keys)
+    key_type = _key_type(column)
+    if len(keys) <= in_max or not temp_tables:
+        found = present(session, query, column, keys, in_max, temp_tables)
+        return set(key for key in keys if _stored(key, key_type) not in found)
+    with key_table(session, keys, column) as table:
+        absent = set(key for key, in session.query(table.c.key).filter(
+            ~query.filter(column==table.c.key).exists()))
+    return set(key for key in keys if _stored(key, key_type) in absent)
+
+def delete(session, query, column, keys, in_max=1000, temp_tables=True):
+    """ Delete the rows query finds with column in keys; returns how many
+        went. Doesn't synchronize the session.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    if len(keys) <= in_max or not temp_tables:
+        return sum(query.filter(column.in_(keys_chunk)).delete(
+            synchronize_session=False) \
+                    for keys_chunk in chunk(keys, in_max))
+    with key_table(session, keys, column) as table:
+        # Query.delete() can't join, but an IN subquery over the temporary
+        # table is fine
+        return query.filter(column.in_(session.query(table.c.key))).delete(
+                synchronize_session=False)
@@ -11,6 +11,8 @@ master Revision table that logs deltas as JSON.
 Requires sqlalchemy 0.8, for the inspect API.
 """
 
+from contextlib import contextmanager
+
 from sqlalchemy import Column, Integer, String, Enum
 from sqlalchemy import event, inspect
 from sqlalchemy.orm import relationship
@@ -21,7 +23,12 @@ from sqlalchemy.ext.declarative import declared_attr
 from .util import BigJSON
 
 class Revision(object):
-    """ All revision records in a single table (role). """
+    """ All revision records in a single table (role).
+
+        In coarse mode (see coarse_revisions()) there's one revision per
+        table, command and set of extra attributes for each flush: record_id
+        is the lowest ID and delta is {'record_ids': [every ID]}.
+    """
     # Which object are we recording changes to?
     table_name = Column(String(20), nullable=False)
     record_id = Column(Integer, nullable=False)
@@ -29,8 +36,13 @@ class Revision(object):
     command = Column(Enum('insert', 'update', 'delete'), nullable=False)
     delta = Column(BigJSON, nullable=True)
 
-    def set_extra_attrs(self, obj):
-        pass
+    @classmethod
+    def extra_attrs(cls, obj):
+        """ Extra column values for a revision of obj. Revision rows are
+            inserted directly, so these must be plain columns, not
+            relationships.
+        """
+        return dict()
 
 def gen_rev_role(rev_cls):
     """ Generate generic HasRevisions mixin.
@@ -50,101 +62,142 @@ def gen_rev_role(rev_cls):
 
     return HasRevisions
 
-def create_insert_revision(rev_cls, obj, session):
+def create_insert_revision(obj):
     d = delta(obj)
     assert d, "Can't insert object {0}:{1} with no delta".format(
             obj.__tablename__, obj.id)
-    return rev_cls(command='insert', record_id=obj.id,
+    return dict(command='insert', record_id=obj.id,
             table_name=obj.__tablename__, delta=d)
 
-def create_delete_revision(rev_cls, obj, session):
+def create_delete_revision(obj):
     # NOTE: The application layer needs to deal with purging all history
     # related to the object at some point.
-    return rev_cls(command='delete', record_id=obj.id,
-            table_name=obj.__tablename__)
+    return dict(command='delete', record_id=obj.id,
+            table_name=obj.__tablename__, delta=None)
 
-def create_update_revision(rev_cls, obj, session):
+def create_update_revision(obj):
     d = delta(obj)
     # sqlalchemy objects can be dirty even if they haven't changed
     if not d:
         return
-    return rev_cls(command='update', record_id=obj.id,
+    return dict(command='update', record_id=obj.id,
             table_name=obj.__tablename__, delta=d)
 
+# mapper -> ([(column key, attribute key)], [relationship keys])
+_mapped_columns = dict()
+
+def mapped_columns(mapper):
+    """ The columns delta() looks at for objects of this mapper, and the
+        relationships that go through a foreign key. Worked out once per
+        mapper, since flushes during sync are large and frequent.
+    """
+    if mapper not in _mapped_columns:
+        columns = []
+        for m in mapper.iterate_to_root():
+            for col in m.local_table.c:
+                # get the value of the attribute based on the MapperProperty
+                # related to the mapped column. this will allow usage of
+                # MapperProperties that have a different keyname than that
+                # of the mapped column.
+                try:
+                    prop = mapper.get_property_by_column(col)
+                except UnmappedColumnError:
+                    # in the case of single table inheritance, there may be
+                    # columns on the mapped table intended for the subclass
+                    # only. the "unmapped" status of the subclass column on
+                    # the base class is a feature of the declarative module
+                    # as of sqla 0.5.2.
+                    continue
+                columns.append((col.key, prop.key))
+        relationships = [prop.key for prop in mapper.iterate_properties if \
+                isinstance(prop, RelationshipProperty) and \
+                any(p.foreign_keys for p in prop.local_columns)]
+        _mapped_columns[mapper] = (columns, relationships)
+    return _mapped_columns[mapper]
+
 def delta(obj):
     obj_state = inspect(obj)
+    columns, relationships = mapped_columns(obj_state.mapper)
 
-    obj_changed = False
     d = {}
-
-    for m in obj_state.mapper.iterate_to_root():
-        for col in m.local_table.c:
-            # get the value of the attribute based on the MapperProperty
-            # related to the mapped column. this will allow usage of
-            # MapperProperties that have a different keyname than that of the
-            # mapped column.
-            try:
-                prop = obj_state.mapper.get_property_by_column(col)
-            except UnmappedColumnError:
-                # in the case of single table inheritance, there may be columns
-                # on the mapped table intended for the subclass only. the
-                # "unmapped" status of the subclass column on the base class is
-                # a feature of the declarative module as of sqla 0.5.2.
-                continue
-
-            # expired object attributes and also deferred cols might not be in
-            # the dict. force it to load no matter what by using getattr().
-            if prop.key not in obj_state.dict:
-                getattr(obj, prop.key)
-
-            # import pytest
-            # pytest.set_trace()
-            added, unchanged, deleted = getattr(obj_state.attrs, prop.key).history
-            if added:
-                # if the attribute had no value.
-                d[col.key] = added[0]
-                obj_changed = True
-            elif deleted:
-                d[col.key] = deleted[0]
-                obj_changed = True
-            # do nothing for unchanged
-
-        if not obj_changed:
-            # not changed, but we have relationships.  OK
-            # check those too
-            for prop in obj_state.mapper.iterate_properties:
-                if isinstance(prop, RelationshipProperty) and \
-                    getattr(obj_state.attrs, prop.key).history.has_changes():
-                    for p in prop.local_columns:
-                        if p.foreign_keys:
-                            obj_changed = True
-                            break
-                    if obj_changed is True:
-                        break
-
-        if not obj_changed:
-            return
-
-    return d
+    for col_key, prop_key in columns:
+        # expired object attributes and also deferred cols might not be in
+        # the dict. force it to load no matter what by using getattr().
+        if prop_key not in obj_state.dict:
+            getattr(obj, prop_key)
+
+        added, unchanged, deleted = getattr(obj_state.attrs, prop_key).history
+        if added:
+            # if the attribute had no value.
+            d[col_key] = added[0]
+        elif deleted:
+            d[col_key] = deleted[0]
+        # do nothing for unchanged
+
+    if d:
+        return d
+
+    # not changed, but we have relationships.  OK
+    # check those too
+    for key in relationships:
+        if getattr(obj_state.attrs, key).history.has_changes():
+            return d
+
+def coarsen(revisions):
+    """ Collapse revisions into one per table, command and extra attributes.
+    """
+    record_ids = dict()
+    for rev in revisions:
+        key = tuple(sorted((k, v) for k, v in rev.iteritems() \
+                if k not in ('record_id', 'delta')))
+        record_ids.setdefault(key, []).append(rev['record_id'])
+    return [coarse_revision(record_ids=sorted(ids), **dict(key)) \
+            for key, ids in record_ids.iteritems()]
+
+def coarse_revision(record_ids, **attrs):
+    """ A single revision row standing in for changes to all of record_ids.
+    """
+    return dict(attrs, record_id=record_ids[0],
+            delta=dict(record_ids=record_ids))
+
+@contextmanager
+def coarse_revisions(session, enabled=True):
+    """ Log one revision per table and command for each flush instead of
+        one per object, e.g. during initial sync when clients don't need
+        per-row deltas and there are a lot of rows.
+    """
+    previous = session.coarse_revisions
+    session.coarse_revisions = enabled or previous
+    try:
+        yield session
+    finally:
+        session.coarse_revisions = previous
 
 def versioned_session(session, rev_cls, rev_role):
-    def create_revision(session, obj, create_fn):
-        if isinstance(obj, rev_role):
-            rev = create_fn(rev_cls, obj, session)
-            if rev is not None:
-                rev.set_extra_attrs(obj)
-                session.add(rev)
+    session.coarse_revisions = False
 
     @event.listens_for(session, 'after_flush')
     def after_flush(session, flush_context):
         """ Hook to log revision deltas. Must be post-flush in order to grab
             object IDs on new objects.
+
+            Revisions are written straight to the revision table with one
+            multi-row INSERT, rather than being added to the session, which
+            would need a second flush.
         """
-        for obj in session.new:
-            create_revision(session, obj, create_insert_revision)
-        for obj in session.dirty:
-            create_revision(session, obj, create_update_revision)
-        for obj in session.deleted:
-            create_revision(session, obj, create_delete_revision)
+        revisions = []
+        for objects, create_fn in ((session.new, create_insert_revision),
+                (session.dirty, create_update_revision),
+                (session.deleted, create_delete_revision)):
+            for obj in objects:
+                if isinstance(obj, rev_role):
+                    rev = create_fn(obj)
+                    if rev is not None:
+                        rev.update(rev_cls.extra_attrs(obj))
+                        revisions.append(rev)
+        if session.coarse_revisions:
+            revisions = coarsen(revisions)
+        if revisions:
+            session.execute(rev_cls.__table__.insert(), revisions)
 
     return session
@@ -0,0 +1,93 @@
+""" Adaptive batching by byte budget.
+
+Used to size IMAP FETCH batches: instead of a fixed number of messages per
+round trip, we pack as many messages as fit in a byte budget (and under a
+message-count cap), and grow or shrink the budget based on the throughput we
+actually observe.
+"""
+from __future__ import division
+
+class AdaptiveBatcher(object):
+    """ Groups keys into batches bounded by a byte budget and a count cap.
+
+        Call record() after each batch completes. The budget grows as long as
+        throughput doesn't get noticeably worse and shrinks when it does.
+        Call failed() on MemoryError / timeouts to back off hard.
+
+        batches() is lazy, so budget changes apply to the next batch handed
+        out.
+    """
+    def __init__(self, initial_bytes=1024*1024, min_bytes=64*1024,
+            max_bytes=32*1024*1024, max_count=500, grow=2.0, shrink=0.5,
+            tolerance=0.9):
+        assert min_bytes <= initial_bytes <= max_bytes
+        self.budget = initial_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.count_cap = max_count
+        self.max_count = max_count
+        self.grow = grow
+        self.shrink = shrink
+        # how much of the last rate we need to keep to count as "not worse"
+        self.tolerance = tolerance
+        self.failures = 0
+        # [(num_items, num_bytes, seconds), ...]
+        self.history = []
+        self._last_rate = None
+
+    def batches(self, keys, sizes):
+        """ Yield tuples of keys, in order. A single key larger than the
+            budget is yielded on its own.
+
+            sizes maps key -> size in bytes; unknown sizes count as 0.
+        """
+        batch = []
+        batch_bytes = 0
+        for key in keys:
+            size = sizes.get(key, 0)
+            if batch and (batch_bytes + size > self.budget or \
+                    len(batch) >= self.max_count):
+                yield tuple(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(key)
+            batch_bytes += size
+        if batch:
+            yield tuple(batch)
+
+    def record(self, num_items, num_bytes, seconds):
+        """ Feed back the result of a completed batch. """
+        self.history.append((num_items, num_bytes, seconds))
+        if seconds <= 0:
+            return
+        rate = num_bytes / seconds
+        if self._last_rate is None or rate >= self._last_rate * self.tolerance:
+            self.budget = min(self.max_bytes, int(self.budget * self.grow))
+            self.max_count = min(self.count_cap, self.max_count * 2)
+        else:
+            self.budget = max(self.min_bytes, int(self.budget * self.shrink))
+        self._last_rate = rate
+
+    def failed(self):
+        """ Back off after a batch blew up (out of memory, timed out). """
+        self.failures += 1
+        self.budget = max(self.min_bytes, int(self.budget * self.shrink))
+        self.max_count = max(1, self.max_count // 2)
+        self._last_rate = None
+
+    def summary(self):
+        """ Batch sizes chosen and throughput achieved so far. """
+        counts = [n for n, _, _ in self.history]
+        total_bytes = sum(b for _, b, _ in self.history)
+        total_seconds = sum(s for _, _, s in self.history)
+        return dict(
+                batches=len(self.history),
+                min_batch=min(counts) if counts else 0,
+                max_batch=max(counts) if counts else 0,
+                mean_batch=sum(counts) / len(counts) if counts else 0,
+                bytes=total_bytes,
+                seconds=total_seconds,
+                bytes_per_sec=total_bytes / total_seconds \
+                        if total_seconds > 0 else 0,
+                failures=self.failures,
+                budget=self.budget)
@@ -11,6 +11,10 @@ def _path_from_key(key):
     parts = [safe_filename(part) for part in splitall(key)]
     return os.path.join(CACHE_BASEDIR, *parts)
 
+def cache_path(key):
+    """ Where the cache keeps key, for data that isn't pickled. """
+    return _path_from_key(key)
+
 def set_cache(key, val):
     path = _path_from_key(key)
     dirname = os.path.dirname(path)
@@ -2,6 +2,9 @@ import string
 import errno
 import os
 import fcntl
+import tempfile
+
+from hashlib import sha256
 
 def safe_filename(filename):
     """ Strip potentially bad characters from a filename so it is safe to
@@ -103,3 +106,77 @@ def human_readable_filesize(size_bytes, suffixes=None):
         formatted_size = str(round(num, ndigits=precision))
 
     return "%s %s" % (formatted_size, suffix)
+
+class SpooledData(object):
+    """ A run of bytes that lives in a spool file instead of memory.
+
+        Stands in for a (potentially huge) string: len() works without
+        touching the disk, and read() / sha256() go to the file. Spool files
+        are anonymous temporary files, so the disk space goes away once the
+        last SpooledData referring to the file is garbage collected.
+    """
+    def __init__(self, fileobj, offset, size):
+        self._file = fileobj
+        self.offset = offset
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def chunks(self, chunk_size=64*1024):
+        """ Iterate over the data without loading all of it at once. """
+        position = self.offset
+        remaining = self.size
+        while remaining > 0:
+            self._file.seek(position)
+            data = self._file.read(min(chunk_size, remaining))
+            assert data, "spool file truncated"
+            position += len(data)
+            remaining -= len(data)
+            yield data
+
+    def read(self):
+        return ''.join(self.chunks())
+
+    def sha256(self):
+        h = sha256()
+        for data in self.chunks():
+            h.update(data)
+        return h.hexdigest()
+
+class Spool(object):
+    """ Streams data into anonymous temporary files in `directory`.
+
+        A new file is started once the current one grows past rotate_bytes,
+        so a long-running download doesn't pin one ever-growing file.
+    """
+    def __init__(self, directory, buffer_size=64*1024,
+            rotate_bytes=64*1024*1024):
+        mkdirp(directory)
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.rotate_bytes = rotate_bytes
+        self._file = None
+
+    def write_from(self, read, size):
+        """ Copy `size` bytes from read(n) into the spool, buffer_size bytes
+            at a time, and return a SpooledData for them.
+        """
+        if self._file is not None:
+            # readers seek around in the same file
+            self._file.seek(0, os.SEEK_END)
+            if self._file.tell() >= self.rotate_bytes:
+                self._file = None
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(dir=self.directory)
+        offset = self._file.tell()
+        remaining = size
+        while remaining > 0:
+            data = read(min(self.buffer_size, remaining))
+            if not data:
+                raise IOError("short read while spooling ({0} of {1} bytes "
+                        "missing)".format(remaining, size))
+            self._file.write(data)
+            remaining -= len(data)
+        self._file.flush()
+        return SpooledData(self._file, offset, size)
@@ -0,0 +1,194 @@
+""" Compact sets of IMAP UIDs.
+
+A folder's UIDs are mostly long runs of consecutive integers with a few gaps
+where messages were deleted, so we store them as sorted, non-overlapping,
+inclusive ranges in two arrays instead of one Python long per UID. Set
+operations walk both range lists in a single merge pass.
+"""
+from array import array
+from bisect import bisect_right
+from itertools import izip
+
+class UIDSet(object):
+    """ An immutable set of non-negative integer UIDs.
+
+        Supports len(), iteration (ascending), `in`, equality, and the
+        union (|), intersection (&) and difference (-) operators. Any
+        iterable of UIDs is accepted wherever another UIDSet is expected.
+
+        str() gives the IMAP sequence-set syntax, e.g. '1:500,502,510:512'.
+    """
+    __slots__ = ('_starts', '_ends', '_len')
+
+    def __init__(self, uids=()):
+        if isinstance(uids, UIDSet):
+            self._starts = array('L', uids._starts)
+            self._ends = array('L', uids._ends)
+            self._len = uids._len
+        else:
+            self._from_sorted(sorted(uids))
+
+    @classmethod
+    def from_sorted(cls, uids):
+        """ Build from an ascending iterable without sorting it first.
+
+            Duplicates are fine. Useful to stream results straight from an
+            ordered database query.
+        """
+        uidset = cls.__new__(cls)
+        uidset._from_sorted(uids)
+        return uidset
+
+    @classmethod
+    def from_ranges(cls, ranges):
+        """ Build from (start, end) inclusive pairs sorted by start.
+            Overlapping or adjacent ranges are coalesced.
+        """
+        uidset = cls.__new__(cls)
+        uidset._starts = array('L')
+        uidset._ends = array('L')
+        uidset._len = 0
+        starts, ends = uidset._starts, uidset._ends
+        for start, end in ranges:
+            if ends and start <= ends[-1] + 1:
+                if end > ends[-1]:
+                    uidset._len += end - ends[-1]
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+                uidset._len += end - start + 1
+        return uidset
+
+    @classmethod
+    def from_sequence_set(cls, seqset):
+        """ Parse IMAP sequence-set syntax like '1:500,502'. """
+        ranges = []
+        for part in seqset.split(','):
+            if not part:
+                continue
+            if ':' in part:
+                ranges.append(tuple(sorted(long(n) for n in part.split(':'))))
+            else:
+                ranges.append((long(part), long(part)))
+        return cls.from_ranges(sorted(ranges))
+
+    def _from_sorted(self, uids):
+        starts = array('L')
+        ends = array('L')
+        count = 0
+        for uid in uids:
+            if ends and uid <= ends[-1] + 1:
+                if uid > ends[-1]:
+                    ends[-1] = uid
+                    count += 1
+                else:
+                    assert uid >= starts[-1], "UIDs must be sorted"
+            else:
+                starts.append(uid)
+                ends.append(uid)
+                count += 1
+        self._starts = starts
+        self._ends = ends
+        self._len = count
+
+    def ranges(self):
+        """ Iterate over (start, end) inclusive pairs. """
+        return izip(self._starts, self._ends)
+
+    def __len__(self):
+        return self._len
+
+    def __nonzero__(self):
+        return self._len > 0
+
+    def __iter__(self):
+        for start, end in self.ranges():
+            for uid in xrange(start, end + 1):
+                yield uid
+
+    def __reversed__(self):
+        for i in xrange(len(self._starts) - 1, -1, -1):
+            for uid in xrange(self._ends[i], self._starts[i] - 1, -1):
+                yield uid
+
+    def __contains__(self, uid):
+        i = bisect_right(self._starts, uid) - 1
+        return i >= 0 and uid <= self._ends[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, UIDSet):
+            other = UIDSet(other)
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'UIDSet({0!r})'.format(str(self))
+
+    def __str__(self):
+        return self.to_sequence_set()
+
+    def to_sequence_set(self):
+        return ','.join(str(start) if start == end else
+                '{0}:{1}'.format(start, end) for start, end in self.ranges())
+
+    def union(self, other):
+        if not isinstance(other, UIDSet):
+            other = UIDSet(other)
+        return UIDSet.from_ranges(_merge(self.ranges(), other.ranges()))
+
+    def intersection(self, other):
+        if not isinstance(other, UIDSet):
+            other = UIDSet(other)
+        result = []
+        i = j = 0
+        a_starts, a_ends = self._starts, self._ends
+        b_starts, b_ends = other._starts, other._ends
+        while i < len(a_starts) and j < len(b_starts):
+            lo = max(a_starts[i], b_starts[j])
+            hi = min(a_ends[i], b_ends[j])
+            if lo <= hi:
+                result.append((lo, hi))
+            if a_ends[i] < b_ends[j]:
+                i += 1
+            else:
+                j += 1
+        return UIDSet.from_ranges(result)
+
+    def difference(self, other):
+        if not isinstance(other, UIDSet):
+            other = UIDSet(other)
+        result = []
+        j = 0
+        b_starts, b_ends = other._starts, other._ends
+        for start, end in self.ranges():
+            # skip ranges entirely before this one
+            while j < len(b_starts) and b_ends[j] < start:
+                j += 1
+            k = j
+            while start <= end:
+                if k >= len(b_starts) or b_starts[k] > end:
+                    result.append((start, end))
+                    break
+                if b_starts[k] > start:
+                    result.append((start, b_starts[k] - 1))
+                start = b_ends[k] + 1
+                k += 1
+        return UIDSet.from_ranges(result)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+def _merge(a, b):
+    """ Merge two ascending iterators of (start, end) pairs by start. """
+    a_next, b_next = next(a, None), next(b, None)
+    while a_next is not None or b_next is not None:
+        if b_next is None or (a_next is not None and a_next[0] <= b_next[0]):
+            yield a_next
+            a_next = next(a, None)
+        else:
+            yield b_next
+            b_next = next(b, None)
@@ -35,9 +35,13 @@ CREATE TABLE `block` (
   `content_id` varchar(255) DEFAULT NULL,
   `misc_keyval` text,
   `is_inboxapp_attachment` tinyint(1) DEFAULT NULL,
+  `imap_section` varchar(64) DEFAULT NULL,
+  `namespace_id` int(11) DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `message_id` (`message_id`,`walk_index`,`data_sha256`),
-  CONSTRAINT `block_ibfk_1` FOREIGN KEY (`message_id`) REFERENCES `message` (`id`)
+  KEY `ix_block_namespace_id` (`namespace_id`),
+  CONSTRAINT `block_ibfk_1` FOREIGN KEY (`message_id`) REFERENCES `message` (`id`),
+  CONSTRAINT `block_ibfk_2` FOREIGN KEY (`namespace_id`) REFERENCES `namespace` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=22 DEFAULT CHARSET=utf8mb4;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -47,7 +51,7 @@ CREATE TABLE `block` (
 
 LOCK TABLES `block` WRITE;
 /*!40000 ALTER TABLE `block` DISABLE KEYS */;
-INSERT INTO `block` VALUES (1,2878,'b5a4cd388253264774512485f3876f16c4c84924d242437302a9774136b0f2c5',1,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(2,2890,'6bb18fd029b3e9b40089b9b33dfe3edc6557ecd1adcaaf6dae854be6dbea7872',1,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(3,4301,'8d80f307dc22437d2b027cbc11b77b73ced85e23288f859306d87c70ebf175d4',1,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(4,5191,'6c3e555a8b1399b5a6666ea6a8b808be32b7b22f3e4bb48ff5ae8c696aa095fa',2,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(5,572,'288c0081b65542e939b8437461fb8a55e36401ab43f6aea5f64d4760d03531d2',2,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]]]',0),(6,1079,'d2c04b83237b2af6baaba5ec04e04eef6de19f8cc8c684cbc0aff2f6c77fed57',2,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(7,452,'2249bbabdb27d37e4f12943f747b785d6d2eabc8269e767aed1f1ef05f57c45b',3,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(8,1756,'047fa83a202cebd70ae6dbe912dd197df10187854ffe4decda9ce18f76998a9e',3,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(9,13085,'cd44fb22f257932dd15a423134ca62369dbb309d2ea34150f6df427163230397',3,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(10,468,'c32547c85aa035bcfcad78e1e0d0663fb153edcbe3fab2635f0662c5cc4130b1',4,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(11,645,'3566785a8b48d288237d7634ce2a3ffd363a2fd86667fbe0753d7fc9868f84b0',4,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(12,7041,'a5de2bb5b246fdf0f32a588af13a7d7534d66959cc5e0d83889c002847a5f493',4,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(13,456,'44e619afc801dadc1673c187eaf18b34223fe1a8aa88ee584b56f3faf9d04f95',5,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(14,1251,'b1558fdb97bc5918be82a7d342358fdd8abaa32cace1c96056319c594af6ddfe',5,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"windows-1252\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(15,12626,'5ef8b7411036839cf82f81125fda1227b56378c14e4d2f2e251aaaa5496062ad',5,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"windows-1252\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(16,5639,'5b3ef0a1ca544c24cb199a2dc826ab73e82221adbb79221ed48a252976a82e81',6,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(17,2401,'37806d7922400999225e4701998f03c7a8636a0bbeebf3a435d533f38d60f067',6,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]]]',0),(18,7492,'07c1ee541793998815179ce80b0c0af0d4b8ebb93d7e1678029a8d2ad3685c46',6,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0),(19,4828,'0b0640f57ccce3563d112dedac9df9f367a10c341d2469843bc083f46e4c8cfb',7,0,NULL,NULL,NULL,NULL,NULL,NULL,0),(20,944,'216aa39060875b0305d978af411b9325b099e0bacc4f13f05c16dce6eb7bb372',7,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]]]',0),(21,1635,'504fe698d3b6e529bbfae1b33ff0c69dd4cbe956797703b15bcee8ca5c616e61',7,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0);
+INSERT INTO `block` VALUES (1,2878,'b5a4cd388253264774512485f3876f16c4c84924d242437302a9774136b0f2c5',1,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(2,2890,'6bb18fd029b3e9b40089b9b33dfe3edc6557ecd1adcaaf6dae854be6dbea7872',1,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(3,4301,'8d80f307dc22437d2b027cbc11b77b73ced85e23288f859306d87c70ebf175d4',1,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(4,5191,'6c3e555a8b1399b5a6666ea6a8b808be32b7b22f3e4bb48ff5ae8c696aa095fa',2,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(5,572,'288c0081b65542e939b8437461fb8a55e36401ab43f6aea5f64d4760d03531d2',2,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]]]',0,NULL,1),(6,1079,'d2c04b83237b2af6baaba5ec04e04eef6de19f8cc8c684cbc0aff2f6c77fed57',2,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(7,452,'2249bbabdb27d37e4f12943f747b785d6d2eabc8269e767aed1f1ef05f57c45b',3,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(8,1756,'047fa83a202cebd70ae6dbe912dd197df10187854ffe4decda9ce18f76998a9e',3,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(9,13085,'cd44fb22f257932dd15a423134ca62369dbb309d2ea34150f6df427163230397',3,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(10,468,'c32547c85aa035bcfcad78e1e0d0663fb153edcbe3fab2635f0662c5cc4130b1',4,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(11,645,'3566785a8b48d288237d7634ce2a3ffd363a2fd86667fbe0753d7fc9868f84b0',4,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(12,7041,'a5de2bb5b246fdf0f32a588af13a7d7534d66959cc5e0d83889c002847a5f493',4,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"ISO-8859-1\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(13,456,'44e619afc801dadc1673c187eaf18b34223fe1a8aa88ee584b56f3faf9d04f95',5,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(14,1251,'b1558fdb97bc5918be82a7d342358fdd8abaa32cace1c96056319c594af6ddfe',5,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"windows-1252\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(15,12626,'5ef8b7411036839cf82f81125fda1227b56378c14e4d2f2e251aaaa5496062ad',5,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"windows-1252\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(16,5639,'5b3ef0a1ca544c24cb199a2dc826ab73e82221adbb79221ed48a252976a82e81',6,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(17,2401,'37806d7922400999225e4701998f03c7a8636a0bbeebf3a435d533f38d60f067',6,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]]]',0,NULL,1),(18,7492,'07c1ee541793998815179ce80b0c0af0d4b8ebb93d7e1678029a8d2ad3685c46',6,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1),(19,4828,'0b0640f57ccce3563d112dedac9df9f367a10c341d2469843bc083f46e4c8cfb',7,0,NULL,NULL,NULL,NULL,NULL,NULL,0,NULL,1),(20,944,'216aa39060875b0305d978af411b9325b099e0bacc4f13f05c16dce6eb7bb372',7,1,'text/plain',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/plain\", {\"charset\": \"UTF-8\"}]]]',0,NULL,1),(21,1635,'504fe698d3b6e529bbfae1b33ff0c69dd4cbe956797703b15bcee8ca5c616e61',7,2,'text/html',NULL,NULL,NULL,NULL,'[[\"Content-Type\", [\"text/html\", {\"charset\": \"UTF-8\"}]], [\"Content-Transfer-Encoding\", [\"quoted-printable\", {}]]]',0,NULL,1);
 /*!40000 ALTER TABLE `block` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -84,6 +88,36 @@ LOCK TABLES `contact` WRITE;
 /*!40000 ALTER TABLE `contact` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `foldercounter`
+--
+
+DROP TABLE IF EXISTS `foldercounter`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `foldercounter` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `imapaccount_id` int(11) NOT NULL,
+  `folder_name` varchar(191) NOT NULL,
+  `total` int(11) NOT NULL,
+  `unread` int(11) NOT NULL,
+  `bytes` bigint(20) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `imapaccount_id` (`imapaccount_id`,`folder_name`),
+  CONSTRAINT `foldercounter_ibfk_1` FOREIGN KEY (`imapaccount_id`) REFERENCES `imapaccount` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `foldercounter`
+--
+
+LOCK TABLES `foldercounter` WRITE;
+/*!40000 ALTER TABLE `foldercounter` DISABLE KEYS */;
+INSERT INTO `foldercounter` VALUES (1,1,'[Gmail]/All Mail',7,5,83203);
+/*!40000 ALTER TABLE `foldercounter` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `folderitem`
 --
@@ -125,6 +159,7 @@ CREATE TABLE `foldersync` (
   `imapaccount_id` int(11) NOT NULL,
   `folder_name` varchar(191) NOT NULL,
   `state` enum('initial','initial uidinvalid','poll','poll uidinvalid','finish') NOT NULL,
+  `substate` enum('headers','bodies') DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `imapaccount_id` (`imapaccount_id`,`folder_name`),
   CONSTRAINT `foldersync_ibfk_1` FOREIGN KEY (`imapaccount_id`) REFERENCES `imapaccount` (`id`) ON DELETE CASCADE
@@ -137,7 +172,7 @@ CREATE TABLE `foldersync` (
 
 LOCK TABLES `foldersync` WRITE;
 /*!40000 ALTER TABLE `foldersync` DISABLE KEYS */;
-INSERT INTO `foldersync` VALUES (1,1,'INBOX','poll'),(2,1,'[Gmail]/All Mail','poll');
+INSERT INTO `foldersync` VALUES (1,1,'INBOX','poll',NULL),(2,1,'[Gmail]/All Mail','poll',NULL);
 /*!40000 ALTER TABLE `foldersync` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -154,7 +189,6 @@ CREATE TABLE `imapaccount` (
   `email_address` varchar(254) DEFAULT NULL,
   `provider` enum('Gmail','Outlook','Yahoo','Inbox') NOT NULL,
   `save_raw_messages` tinyint(1) DEFAULT NULL,
-  `sync_host` varchar(255) DEFAULT NULL,
   `last_synced_contacts` datetime DEFAULT NULL,
   `o_token_issued_to` varchar(512) DEFAULT NULL,
   `o_user_id` varchar(512) DEFAULT NULL,
@@ -181,7 +215,7 @@ CREATE TABLE `imapaccount` (
 
 LOCK TABLES `imapaccount` WRITE;
 /*!40000 ALTER TABLE `imapaccount` DISABLE KEYS */;
-INSERT INTO `imapaccount` VALUES (1,1,'testinboxapp@gmail.com','Gmail',1,'precise64',NULL,'986659776516-fg79mqbkbktf5ku10c215vdij918ra0a.apps.googleusercontent.com','118053820939486070906','ya29.1.AADtN_Whip2LtoRaxrPrcuM05y9kR4byrv_vozm049qvbxHj9Fz-YA8gXqV256M','eyJhbGciOiJSUzI1NiIsImtpZCI6IjFmNTc0Yzk4MzkyYjA2OWU2OWNiY2U4OTk4MjVkZjdhYzM3YTM0ZmEifQ.eyJpc3MiOiJhY2NvdW50cy5nb29nbGUuY29tIiwidmVyaWZpZWRfZW1haWwiOiJ0cnVlIiwiZW1haWxfdmVyaWZpZWQiOiJ0cnVlIiwiZW1haWwiOiJ0ZXN0aW5ib3hhcHBAZ21haWwuY29tIiwiaWQiOiIxMTgwNTM4MjA5Mzk0ODYwNzA5MDYiLCJzdWIiOiIxMTgwNTM4MjA5Mzk0ODYwNzA5MDYiLCJjaWQiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJhenAiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJhdWQiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJ0b2tlbl9oYXNoIjoiZHZHZlg0UFlFeElvMDBuOWZaaUpyZyIsImF0X2hhc2giOiJkdkdmWDRQWUV4SW8wMG45ZlppSnJnIiwiaWF0IjoxMzkwNDU0NDA3LCJleHAiOjEzOTA0NTgzMDd9.gXOV84Up0qkmHODORy3J3QSPvaeYfiGWBZRgK6HDRK-uoXx3WRca_y9zTHsU0obDS_A2tdj8-6vBML9HRuaGlhrOknNTOf4CKyHAJ42wCPpy5sawSRcyZuKQfYiQuGcduY7SeMclxACYPMF7jql3jjEonAdA1z1sQS6aUR7cO04',3600,'offline','Bearer','986659776516-fg79mqbkbktf5ku10c215vdij918ra0a.apps.googleusercontent.com','https://www.googleapis.com/auth/userinfo.email https://www.googleapis.com/auth/userinfo.profile https://mail.google.com/ https://www.google.com/m8/feeds https://www.googleapis.com/auth/calendar','1/iLw5JazqOZmGkRrqTRuRq2j4Wa0sPvSWMSDfnutngjk',1,'2014-01-23 05:25:07');
+INSERT INTO `imapaccount` VALUES (1,1,'testinboxapp@gmail.com','Gmail',1,NULL,'986659776516-fg79mqbkbktf5ku10c215vdij918ra0a.apps.googleusercontent.com','118053820939486070906','ya29.1.AADtN_Whip2LtoRaxrPrcuM05y9kR4byrv_vozm049qvbxHj9Fz-YA8gXqV256M','eyJhbGciOiJSUzI1NiIsImtpZCI6IjFmNTc0Yzk4MzkyYjA2OWU2OWNiY2U4OTk4MjVkZjdhYzM3YTM0ZmEifQ.eyJpc3MiOiJhY2NvdW50cy5nb29nbGUuY29tIiwidmVyaWZpZWRfZW1haWwiOiJ0cnVlIiwiZW1haWxfdmVyaWZpZWQiOiJ0cnVlIiwiZW1haWwiOiJ0ZXN0aW5ib3hhcHBAZ21haWwuY29tIiwiaWQiOiIxMTgwNTM4MjA5Mzk0ODYwNzA5MDYiLCJzdWIiOiIxMTgwNTM4MjA5Mzk0ODYwNzA5MDYiLCJjaWQiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJhenAiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJhdWQiOiI5ODY2NTk3NzY1MTYtZmc3OW1xYmtia3RmNWt1MTBjMjE1dmRpajkxOHJhMGEuYXBwcy5nb29nbGV1c2VyY29udGVudC5jb20iLCJ0b2tlbl9oYXNoIjoiZHZHZlg0UFlFeElvMDBuOWZaaUpyZyIsImF0X2hhc2giOiJkdkdmWDRQWUV4SW8wMG45ZlppSnJnIiwiaWF0IjoxMzkwNDU0NDA3LCJleHAiOjEzOTA0NTgzMDd9.gXOV84Up0qkmHODORy3J3QSPvaeYfiGWBZRgK6HDRK-uoXx3WRca_y9zTHsU0obDS_A2tdj8-6vBML9HRuaGlhrOknNTOf4CKyHAJ42wCPpy5sawSRcyZuKQfYiQuGcduY7SeMclxACYPMF7jql3jjEonAdA1z1sQS6aUR7cO04',3600,'offline','Bearer','986659776516-fg79mqbkbktf5ku10c215vdij918ra0a.apps.googleusercontent.com','https://www.googleapis.com/auth/userinfo.email https://www.googleapis.com/auth/userinfo.profile https://mail.google.com/ https://www.google.com/m8/feeds https://www.googleapis.com/auth/calendar','1/iLw5JazqOZmGkRrqTRuRq2j4Wa0sPvSWMSDfnutngjk',1,'2014-01-23 05:25:07');
 /*!40000 ALTER TABLE `imapaccount` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -251,9 +285,16 @@ CREATE TABLE `message` (
   `decode_error` tinyint(1) NOT NULL,
   `g_msgid` varchar(40) DEFAULT NULL,
   `g_thrid` varchar(40) DEFAULT NULL,
+  `headers_only` tinyint(1) NOT NULL,
+  `namespace_id` int(11) DEFAULT NULL,
   PRIMARY KEY (`id`),
   KEY `thread_id` (`thread_id`),
-  CONSTRAINT `message_ibfk_1` FOREIGN KEY (`thread_id`) REFERENCES `thread` (`id`)
+  KEY `ix_message_g_msgid` (`g_msgid`),
+  KEY `message_namespace_id_g_msgid` (`namespace_id`,`g_msgid`),
+  KEY `message_namespace_id_g_thrid` (`namespace_id`,`g_thrid`),
+  KEY `message_namespace_id_internaldate` (`namespace_id`,`internaldate`),
+  CONSTRAINT `message_ibfk_1` FOREIGN KEY (`thread_id`) REFERENCES `thread` (`id`),
+  CONSTRAINT `message_ibfk_2` FOREIGN KEY (`namespace_id`) REFERENCES `namespace` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=8 DEFAULT CHARSET=utf8mb4;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -263,7 +304,7 @@ CREATE TABLE `message` (
 
 LOCK TABLES `message` WRITE;
 /*!40000 ALTER TABLE `message` DISABLE KEYS */;
-INSERT INTO `message` VALUES (1,1,'[\"Ben Bitdiddle\", \"ben.bitdiddle1861@gmail.com\"]',NULL,NULL,'[[\"\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CABO4WuNkrsw6zjTGbLVGe5k73pwKs+EdY12mfAxJj2z7gkaP_A@mail.gmail.com>','[go-nuts] Strange error with html/template','2014-01-23 05:20:23',10836,'43a35d0e66b781f4db123ede926163b7aa7bccf392ca4af9ac785fdb0ffc39fb','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html><body><div dir=\"ltr\"><br/></div></body></html>','',0,'1457997137582659815','1457997137582659815'),(2,2,'[\"Nacho\", \"ncc1701zzz@gmail.com\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"Dave Cheney\", \"dave@cheney.net\"]]','[]','[]','\"<CANp9fE9JJ6O19wj=r3CyqTXTJ9vYwUsTD0Fx9xyVGK5OmPKBBw@mail.gmail.com>\"','<CA+Ac+URsAJkqXVau6C0BME=Yc40=TFHcnfyV4=aT7+GrD2oYXA@mail.gmail.com>','[go-nuts] Weird behaviour of Go compiler.','2014-01-23 05:19:33',7003,'06ef0433d87d9226731e0cb01c6ac72acb2e84d0d149e6a854d20ed7277c634b','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\">I have reproduced it in the last tip for linux/arm. I have added the details here: <a href=\"https://code.google.com/p/go/issues/detail?id=6993\">https://code.google.com/p/go/issues/detail?id=6993</a><div class=\"gmail_extra\">\n</div></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','I have reproduced it in the last tip for linux/arm. I have added the details here:  https://code.google.com/p/go/issues/detail?id=6993 \n \n \n\n--  \nYou received this message because you are sub',0,'1457997085555638926','1457997085555638926'),(3,3,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW-f9k=ckpro=0JHo3ZZQ7wdpnNkrYKmfpKh9A1domsyvA@mail.gmail.com>','Welcome to Gmail','2014-01-23 05:08:16',16789,'ae11defd7599cf2ff00c61fdd88b71429c21c04ad42aaf382ff73d9d957cffae','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Welcome to Gmail</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"40\"> </td>\n</tr>\n<tr>\n<td> </td>\n<td width=\"450\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                    </font>\n</b>\n</td>\n<td> </td>\n</tr>\n<tr>\n<td height=\"40\" valign=\"top\">\n</td></tr>\n<tr>\n<td width=\"111\"> </td>\n<td align=\"left\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Arial, sans-serif; font-size: 25px\">Welcome to Gmail</span></font></td>\n</tr>\n</table>\n</td>\n<td width=\"111\"> </td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"10\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"850\" width=\"64\"><img alt=\"\" height=\"850\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td align=\"left\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=inboxtabsvideo&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\"><img alt=\"\" border=\"0\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_video.png\" style=\"display:block\"/></a>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Meet the inbox</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Your inbox is organized into categories so that you can see what\'s new at a glance and decide which emails you want to read when. <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=inboxtabsvideo&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">Watch the video</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_inbox_tab.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Organized into categories</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">You choose from five optional tabs: Primary, Social, Promotions, Updates and Forums.  Primary, Social and Promotions are enabled by default. These categories make it easy to read messages of the same type all at once.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_customize.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Easy to customize</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Select the tabs you want from all five to none. And, if you see a message you want in a different tab, all you have to do is drag and drop it into the tab you choose. <a href=\"https://support.google.com/mail?hl=en&amp;p=inboxtabs\" style=\"text-decoration:none;\">More tips</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_mobile.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Get the inbox on your mobile device</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Gmail\'s inbox is available in Gmail\'s official mobile apps on <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">Android 4.0+ devices</a> as well as <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;hl=en\" style=\"text-decoration:none;\">iPhone and iPad</a>.  Your mobile inbox and notifications show primary email.  It\'s easy to access and keep track of email in other categories.</font>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"300\">\n<tr>\n<td height=\"60\" width=\"130\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">\n<img alt=\"\" border=\"0\" height=\"41\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/google_play_en.png\" style=\"display:block;\" width=\"119\"/>\n</a>\n</td>\n<td height=\"60\" width=\"150\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;utm_campaign=apple&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">\n<img alt=\"\" border=\"0\" height=\"42\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/apple_store_en.png\" style=\"display:block;\" width=\"140\"/>\n</a>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"500\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"60\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"850\" width=\"64\"><img alt=\"\" height=\"850\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Welcome to Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n ',0,'1457996374982313648','1457996374982313648'),(4,4,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW_nRzFj7Hc77FcU=EoNDT4X2DKpzjoiDUMt-g6-8Rrr7A@mail.gmail.com>','Get Gmail for your mobile device','2014-01-23 05:08:15',9094,'5da233fac8b41b54c96d707ecb96663e625e8c2215278e9e6f601bd8e831db9e','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Get Gmail for your mobile device</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"100\" width=\"64\"><img alt=\"\" height=\"100\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"100\" width=\"64\"><img alt=\"\" height=\"100\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"430\" width=\"64\"><img alt=\"\" height=\"430\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td align=\"left\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                  </font>\n</b>\n</td>\n</tr>\n<tr>\n<td align=\"left\" rowspan=\"1\" width=\"450\">\n<span style=\"font-family:Open Sans, Arial, sans-serif; font-size: 25px\">Get Gmail for your mobile device</span>\n<p>\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Gmail is always available wherever you are, from any device - desktop, laptop, phone or tablet.  Download the app or go to <a href=\"https://www.gmail.com\">gmail.com</a> on your mobile device to get started.</font>\n</p>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"300\">\n<tr>\n<td height=\"60\" width=\"130\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\">\n<img alt=\"\" border=\"0\" height=\"41\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/google_play_en.png\" style=\"display:block;\" width=\"119\"/>\n</a>\n</td>\n<td height=\"60\" width=\"150\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;utm_campaign=apple&amp;utm_source=welcome&amp;hl=en\">\n<img alt=\"\" border=\"0\" height=\"42\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/apple_store_en.png\" style=\"display:block;\" width=\"140\"/>\n</a>\n</td>\n</tr>\n</table>\n</td>\n<td rowspan=\"1\" width=\"15\"></td>\n<td align=\"left\" width=\"150\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_nexus.png\" style=\"display:block\"/>\n</td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"62\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"430\" width=\"64\"><img alt=\"\" height=\"430\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n \n \n \n Hi Inbox\n                   \n \n \n \n \n \n Get Gmail for your mobile device \n \n Gmail is always availabl',0,'1457996374675087574','1457996374675087574'),(5,5,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW8hTk2m1H0Kokhwd-+W7sDEhcDFWXrwxY1=_1RnKJV=Gg@mail.gmail.com>','Tips for using Gmail','2014-01-23 05:08:15',15714,'6acb2703b3205d6d6c594467a21c8e88e4095c18c65c7776b3346cb94fe12916','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Tips for using Gmail</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"40\"> </td>\n</tr>\n<tr>\n<td> </td>\n<td width=\"450\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                    </font>\n</b>\n</td>\n<td> </td>\n</tr>\n<tr>\n<td height=\"40\" valign=\"top\">\n</td></tr>\n<tr>\n<td width=\"111\"> </td>\n<td align=\"left\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif; font-size: 25px\">Tips for using Gmail</span></font></td>\n</tr>\n</table>\n</td>\n<td width=\"111\"> </td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"10\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"950\" width=\"64\"><img alt=\"\" height=\"950\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_hangouts.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Chat right from your inbox</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Chat with contacts and start video chats with up to 10 people in <a href=\"http://www.google.com/+/learnmore/hangouts/?hl=en\" style=\"text-decoration:none;\">Google+ Hangouts</a>.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_contacts.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Bring your email into Gmail</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">You can import your email from other webmail to make the transition to Gmail a bit easier. <a href=\"https://support.google.com/mail/answer/164640?hl=en\" style=\"text-decoration:none;\">Learn how.</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_drive.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Use Google Drive to send large files</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\"><a href=\"https://support.google.com/mail/answer/2480713?hl=en\" style=\"text-decoration:none;\">Send huge files in Gmail </a>  (up to 10GB) using <a href=\"https://drive.google.com/?hl=en\" style=\"text-decoration:none;\">Google Drive</a>. Plus files stored in Drive stay up-to-date automatically so everyone has the most recent version and can access them from anywhere.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_storage.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Save everything</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">With 10GB of space, you’ll never need to delete an email. Just keep everything and easily find it later.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_search.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Find emails fast</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">With the power of Google Search right in your inbox, you can quickly find the important emails you need with suggestions based on emails, past searches and contacts.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"500\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"60\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"950\" width=\"64\"><img alt=\"\" height=\"950\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Tips for using Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n ',0,'1457996374149388361','1457996374149388361'),(6,6,'[\"Brad Fitzpatrick\", \"bradfitz@golang.org\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"kate Fernando\", \"hasaradinu@gmail.com\"]]','[[\"golang-nuts\", \"golang-nuts@googlegroups.com\"]]','[]','\"<0c6138e7-17d2-4600-a734-3f77cae88837@googlegroups.com>\"','<CAFzRk01fxvsK29ZrV7O7d8BE5SHtSi3p8-ZnBfv-shzLE_JG6Q@mail.gmail.com>','[go-nuts] Convert the go object to a JSON string','2014-01-23 05:26:29',16145,'b6d86b6f72f8887f5376ad0f02f138127115658b69ae4cd5cc12c9d04fc493e9','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\"><div>Why don\'t you just use the encoding/json package?</div><div><br/></div><div>What\'s your actual problem?  If you just want to learn to use the reflect package, you can read encoding/json\'s source (which uses reflect itself), or read <a href=\"http://blog.golang.org/laws-of-reflection\">http://blog.golang.org/laws-of-reflection</a> etc.</div>\n<div><br/></div></div><div class=\"gmail_extra\"></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','Why don\'t you just use the encoding/json package? What\'s your actual problem?  If you just want to learn to use the reflect package, you can read encoding/json\'s source (which uses reflect it',0,'1457997521161569151','1457997521161569151'),(7,7,'[\"Jesse McNelis\", \"jessta@jessta.id.au\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"\", \"miolini@gmail.com\"]]','[]','[]','\"<CAF1mBFbAqgu483Ozi=PEh-6W1d0NrrNs8Xz+REgWqHE7+zqvPw@mail.gmail.com>\"','<CAAuPoqeJaTzztCCkePF2Lxw5UAQ3i8vrd7Be-Z1BcP3yiVE3TA@mail.gmail.com>','[go-nuts] Strange error with html/template','2014-01-23 05:28:03',7622,'e28380bc543ee0e9228338c5314cd81a80be713efffec0e4896016f9472e8259','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\"><div class=\"gmail_extra\">-- <br/>=====================<br/><a href=\"http://jessta.id.au\">http://jessta.id.au</a><br/><br/>\n</div></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','--  ===================== http://jessta.id.au \n \n \n\n--  \nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group. \nTo unsubscribe from this group and sto',0,'1457997619314912665','1457997619314912665');
+INSERT INTO `message` VALUES (1,1,'[\"Ben Bitdiddle\", \"ben.bitdiddle1861@gmail.com\"]',NULL,NULL,'[[\"\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CABO4WuNkrsw6zjTGbLVGe5k73pwKs+EdY12mfAxJj2z7gkaP_A@mail.gmail.com>','[go-nuts] Strange error with html/template','2014-01-23 05:20:23',10836,'43a35d0e66b781f4db123ede926163b7aa7bccf392ca4af9ac785fdb0ffc39fb','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html><body><div dir=\"ltr\"><br/></div></body></html>','',0,'1457997137582659815','1457997137582659815',0,1),(2,2,'[\"Nacho\", \"ncc1701zzz@gmail.com\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"Dave Cheney\", \"dave@cheney.net\"]]','[]','[]','\"<CANp9fE9JJ6O19wj=r3CyqTXTJ9vYwUsTD0Fx9xyVGK5OmPKBBw@mail.gmail.com>\"','<CA+Ac+URsAJkqXVau6C0BME=Yc40=TFHcnfyV4=aT7+GrD2oYXA@mail.gmail.com>','[go-nuts] Weird behaviour of Go compiler.','2014-01-23 05:19:33',7003,'06ef0433d87d9226731e0cb01c6ac72acb2e84d0d149e6a854d20ed7277c634b','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\">I have reproduced it in the last tip for linux/arm. I have added the details here: <a href=\"https://code.google.com/p/go/issues/detail?id=6993\">https://code.google.com/p/go/issues/detail?id=6993</a><div class=\"gmail_extra\">\n</div></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','I have reproduced it in the last tip for linux/arm. I have added the details here:  https://code.google.com/p/go/issues/detail?id=6993 \n \n \n\n--  \nYou received this message because you are sub',0,'1457997085555638926','1457997085555638926',0,1),(3,3,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW-f9k=ckpro=0JHo3ZZQ7wdpnNkrYKmfpKh9A1domsyvA@mail.gmail.com>','Welcome to Gmail','2014-01-23 05:08:16',16789,'ae11defd7599cf2ff00c61fdd88b71429c21c04ad42aaf382ff73d9d957cffae','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Welcome to Gmail</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"40\"> </td>\n</tr>\n<tr>\n<td> </td>\n<td width=\"450\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                    </font>\n</b>\n</td>\n<td> </td>\n</tr>\n<tr>\n<td height=\"40\" valign=\"top\">\n</td></tr>\n<tr>\n<td width=\"111\"> </td>\n<td align=\"left\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Arial, sans-serif; font-size: 25px\">Welcome to Gmail</span></font></td>\n</tr>\n</table>\n</td>\n<td width=\"111\"> </td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"10\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"850\" width=\"64\"><img alt=\"\" height=\"850\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td align=\"left\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=inboxtabsvideo&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\"><img alt=\"\" border=\"0\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_video.png\" style=\"display:block\"/></a>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Meet the inbox</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Your inbox is organized into categories so that you can see what\'s new at a glance and decide which emails you want to read when. <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=inboxtabsvideo&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">Watch the video</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_inbox_tab.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Organized into categories</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">You choose from five optional tabs: Primary, Social, Promotions, Updates and Forums.  Primary, Social and Promotions are enabled by default. These categories make it easy to read messages of the same type all at once.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_customize.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Easy to customize</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Select the tabs you want from all five to none. And, if you see a message you want in a different tab, all you have to do is drag and drop it into the tab you choose. <a href=\"https://support.google.com/mail?hl=en&amp;p=inboxtabs\" style=\"text-decoration:none;\">More tips</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_mobile.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Get the inbox on your mobile device</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Gmail\'s inbox is available in Gmail\'s official mobile apps on <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">Android 4.0+ devices</a> as well as <a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;hl=en\" style=\"text-decoration:none;\">iPhone and iPad</a>.  Your mobile inbox and notifications show primary email.  It\'s easy to access and keep track of email in other categories.</font>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"300\">\n<tr>\n<td height=\"60\" width=\"130\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">\n<img alt=\"\" border=\"0\" height=\"41\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/google_play_en.png\" style=\"display:block;\" width=\"119\"/>\n</a>\n</td>\n<td height=\"60\" width=\"150\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;utm_campaign=apple&amp;utm_source=welcome&amp;hl=en\" style=\"text-decoration:none;\">\n<img alt=\"\" border=\"0\" height=\"42\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/apple_store_en.png\" style=\"display:block;\" width=\"140\"/>\n</a>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"500\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"60\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"850\" width=\"64\"><img alt=\"\" height=\"850\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Welcome to Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n ',0,'1457996374982313648','1457996374982313648',0,1),(4,4,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW_nRzFj7Hc77FcU=EoNDT4X2DKpzjoiDUMt-g6-8Rrr7A@mail.gmail.com>','Get Gmail for your mobile device','2014-01-23 05:08:15',9094,'5da233fac8b41b54c96d707ecb96663e625e8c2215278e9e6f601bd8e831db9e','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Get Gmail for your mobile device</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"100\" width=\"64\"><img alt=\"\" height=\"100\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"100\" width=\"64\"><img alt=\"\" height=\"100\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"430\" width=\"64\"><img alt=\"\" height=\"430\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td align=\"left\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                  </font>\n</b>\n</td>\n</tr>\n<tr>\n<td align=\"left\" rowspan=\"1\" width=\"450\">\n<span style=\"font-family:Open Sans, Arial, sans-serif; font-size: 25px\">Get Gmail for your mobile device</span>\n<p>\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Gmail is always available wherever you are, from any device - desktop, laptop, phone or tablet.  Download the app or go to <a href=\"https://www.gmail.com\">gmail.com</a> on your mobile device to get started.</font>\n</p>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"300\">\n<tr>\n<td height=\"60\" width=\"130\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=android&amp;utm_campaign=android&amp;utm_source=welcome&amp;hl=en\">\n<img alt=\"\" border=\"0\" height=\"41\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/google_play_en.png\" style=\"display:block;\" width=\"119\"/>\n</a>\n</td>\n<td height=\"60\" width=\"150\">\n<a href=\"https://mail.google.com/mail/help/redirect/index.html?r=apple&amp;utm_campaign=apple&amp;utm_source=welcome&amp;hl=en\">\n<img alt=\"\" border=\"0\" height=\"42\" src=\"https://ssl.gstatic.com/accounts/services/mail/buttons/apple_store_en.png\" style=\"display:block;\" width=\"140\"/>\n</a>\n</td>\n</tr>\n</table>\n</td>\n<td rowspan=\"1\" width=\"15\"></td>\n<td align=\"left\" width=\"150\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_nexus.png\" style=\"display:block\"/>\n</td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"540\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"62\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"430\" width=\"64\"><img alt=\"\" height=\"430\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n \n \n \n Hi Inbox\n                   \n \n \n \n \n \n Get Gmail for your mobile device \n \n Gmail is always availabl',0,'1457996374675087574','1457996374675087574',0,1),(5,5,'[\"Gmail Team\", \"mail-noreply@google.com\"]',NULL,NULL,'[[\"Inbox App\", \"testinboxapp@gmail.com\"]]','[]','[]',NULL,'<CAE25kW8hTk2m1H0Kokhwd-+W7sDEhcDFWXrwxY1=_1RnKJV=Gg@mail.gmail.com>','Tips for using Gmail','2014-01-23 05:08:15',15714,'6acb2703b3205d6d6c594467a21c8e88e4095c18c65c7776b3346cb94fe12916','{\"List-Id\": null, \"List-Post\": null, \"List-Owner\": null, \"List-Subscribe\": null, \"List-Unsubscribe\": null, \"List-Archive\": null, \"List-Help\": null}','<html xmlns=\"http://www.w3.org/1999/xhtml\"><head><meta content=\"text/html;charset=utf-8\" http-equiv=\"content-type\"/><title>Tips for using Gmail</title></head><body link=\"#1155CC\" marginheight=\"0\" marginwidth=\"0\" text=\"#444444\">\n<table bgcolor=\"#f5f5f5\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"100%\">\n<tr>\n<td> </td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-middle.png\" bgcolor=\"#f5f5f5\" height=\"51\" valign=\"bottom\" width=\"673\">\n</td>\n<td height=\"51\" width=\"64\"><img alt=\"\" height=\"51\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-top-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td colspan=\"3\"> </td>\n</tr>\n<tr>\n<td align=\"center\" colspan=\"3\" height=\"50\" valign=\"bottom\"><img alt=\"\" src=\"https://ssl.gstatic.com/drive/announcements/images/logo.gif\" style=\"display:block\"/></td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"40\"> </td>\n</tr>\n<tr>\n<td> </td>\n<td width=\"450\">\n<b>\n<font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\" style=\"line-height: 1.4em\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_small.png\" style=\"display:block;float:left;margin-top:4px;margin-right:3px;\"/>Hi Inbox\n                    </font>\n</b>\n</td>\n<td> </td>\n</tr>\n<tr>\n<td height=\"40\" valign=\"top\">\n</td></tr>\n<tr>\n<td width=\"111\"> </td>\n<td align=\"left\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif; font-size: 25px\">Tips for using Gmail</span></font></td>\n</tr>\n</table>\n</td>\n<td width=\"111\"> </td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"10\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"225\" width=\"64\"><img alt=\"\" height=\"225\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-1-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"950\" width=\"64\"><img alt=\"\" height=\"950\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td align=\"center\" bgcolor=\"#ffffff\" valign=\"top\" width=\"668\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse;\" width=\"540\">\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_hangouts.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Chat right from your inbox</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">Chat with contacts and start video chats with up to 10 people in <a href=\"http://www.google.com/+/learnmore/hangouts/?hl=en\" style=\"text-decoration:none;\">Google+ Hangouts</a>.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_contacts.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Bring your email into Gmail</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">You can import your email from other webmail to make the transition to Gmail a bit easier. <a href=\"https://support.google.com/mail/answer/164640?hl=en\" style=\"text-decoration:none;\">Learn how.</a></font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_drive.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Use Google Drive to send large files</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\"><a href=\"https://support.google.com/mail/answer/2480713?hl=en\" style=\"text-decoration:none;\">Send huge files in Gmail </a>  (up to 10GB) using <a href=\"https://drive.google.com/?hl=en\" style=\"text-decoration:none;\">Google Drive</a>. Plus files stored in Drive stay up-to-date automatically so everyone has the most recent version and can access them from anywhere.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/welcome_storage.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Save everything</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">With 10GB of space, you’ll never need to delete an email. Just keep everything and easily find it later.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n<tr>\n<td align=\"left\">\n<img alt=\"\" src=\"https://ssl.gstatic.com/mail/welcome/localized/en/welcome_search.png\" style=\"display:block\"/>\n</td>\n<td width=\"15\"></td>\n<td align=\"left\" valign=\"middle\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse:collapse;\" width=\"400\">\n<tr>\n<td align=\"left\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"+1\"><span style=\"font-family:Arial, sans-serif; font-size: 20px;\">Find emails fast</span></font>\n</td>\n</tr>\n<tr>\n<td height=\"10\"></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\">\n<font color=\"#444444\" face=\"Arial,sans-serif\" size=\"-1\" style=\"line-height:1.4em\">With the power of Google Search right in your inbox, you can quickly find the important emails you need with suggestions based on emails, past searches and contacts.</font>\n</td>\n</tr>\n</table>\n</td>\n</tr>\n<tr>\n<td colspan=\"3\" height=\"30\"> </td>\n</tr>\n</table>\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"500\">\n<tr>\n<td colspan=\"2\" height=\"40\"> </td>\n</tr>\n<tr>\n<td rowspan=\"2\" width=\"68\"><img alt=\"\" src=\"https://ssl.gstatic.com/accounts/services/mail/msa/gmail_icon_large.png\" style=\"display:block\"/></td>\n<td align=\"left\" height=\"20\" valign=\"bottom\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"-1\">Happy emailing,</font></td>\n</tr>\n<tr>\n<td align=\"left\" valign=\"top\"><font color=\"#444444\" face=\"Arial, sans-serif\" size=\"+2\"><span style=\"font-family:Open Sans, Arial, sans-serif;\">The Gmail Team</span></font></td>\n</tr>\n<tr>\n<td colspan=\"2\" height=\"60\"> </td>\n</tr>\n</table>\n</td>\n<td height=\"950\" width=\"64\"><img alt=\"\" height=\"950\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-middle-2-right.png\" style=\"display:block\" width=\"64\"/></td>\n<td> </td>\n</tr>\n<tr>\n<td> </td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-left.png\" style=\"display:block\" width=\"64\"/></td>\n<td background=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-middle.png\" height=\"102\" valign=\"top\" width=\"673\">\n<table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" style=\"border-collapse: collapse; \" width=\"100%\">\n<tr>\n<td height=\"12\"></td>\n</tr>\n<tr>\n<td valign=\"bottom\">\n<font color=\"#AAAAAA\" face=\"Arial, sans-serif\" size=\"-2\">\n                  © 2013 Google Inc. 1600 Amphitheatre Parkway, Mountain View, CA 94043\n                </font>\n</td>\n</tr>\n</table>\n</td>\n<td height=\"102\" width=\"64\"><img alt=\"\" height=\"102\" src=\"https://ssl.gstatic.com/drive/announcements/images/framework-bottom-right.png\" style=\"display:block\" width=\"68\"/></td>\n<td> </td>\n</tr>\n</table>\n</body></html>','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Tips for using Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n ',0,'1457996374149388361','1457996374149388361',0,1),(6,6,'[\"Brad Fitzpatrick\", \"bradfitz@golang.org\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"kate Fernando\", \"hasaradinu@gmail.com\"]]','[[\"golang-nuts\", \"golang-nuts@googlegroups.com\"]]','[]','\"<0c6138e7-17d2-4600-a734-3f77cae88837@googlegroups.com>\"','<CAFzRk01fxvsK29ZrV7O7d8BE5SHtSi3p8-ZnBfv-shzLE_JG6Q@mail.gmail.com>','[go-nuts] Convert the go object to a JSON string','2014-01-23 05:26:29',16145,'b6d86b6f72f8887f5376ad0f02f138127115658b69ae4cd5cc12c9d04fc493e9','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\"><div>Why don\'t you just use the encoding/json package?</div><div><br/></div><div>What\'s your actual problem?  If you just want to learn to use the reflect package, you can read encoding/json\'s source (which uses reflect itself), or read <a href=\"http://blog.golang.org/laws-of-reflection\">http://blog.golang.org/laws-of-reflection</a> etc.</div>\n<div><br/></div></div><div class=\"gmail_extra\"></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','Why don\'t you just use the encoding/json package? What\'s your actual problem?  If you just want to learn to use the reflect package, you can read encoding/json\'s source (which uses reflect it',0,'1457997521161569151','1457997521161569151',0,1),(7,7,'[\"Jesse McNelis\", \"jessta@jessta.id.au\"]','[\"\", \"golang-nuts@googlegroups.com\"]',NULL,'[[\"\", \"miolini@gmail.com\"]]','[]','[]','\"<CAF1mBFbAqgu483Ozi=PEh-6W1d0NrrNs8Xz+REgWqHE7+zqvPw@mail.gmail.com>\"','<CAAuPoqeJaTzztCCkePF2Lxw5UAQ3i8vrd7Be-Z1BcP3yiVE3TA@mail.gmail.com>','[go-nuts] Strange error with html/template','2014-01-23 05:28:03',7622,'e28380bc543ee0e9228338c5314cd81a80be713efffec0e4896016f9472e8259','{\"List-Id\": \"<golang-nuts.googlegroups.com>\", \"List-Post\": \"<http://groups.google.com/group/golang-nuts/post>, <mailto:golang-nuts@googlegroups.com>\", \"List-Owner\": null, \"List-Subscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:golang-nuts+subscribe@googlegroups.com>\", \"List-Unsubscribe\": \"<http://groups.google.com/group/golang-nuts/subscribe>, <mailto:googlegroups-manage+332403668183+unsubscribe@googlegroups.com>\", \"List-Archive\": \"<http://groups.google.com/group/golang-nuts>\", \"List-Help\": \"<http://groups.google.com/support/>, <mailto:golang-nuts+help@googlegroups.com>\"}','<html><body><div dir=\"ltr\"><div class=\"gmail_extra\">-- <br/>=====================<br/><a href=\"http://jessta.id.au\">http://jessta.id.au</a><br/><br/>\n</div></div>\n<p></p>\n\n-- <br/>\nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group.<br/>\nTo unsubscribe from this group and stop receiving emails from it, send an email to golang-nuts+unsubscribe@googlegroups.com.<br/>\nFor more options, visit <a href=\"https://groups.google.com/groups/opt_out\">https://groups.google.com/groups/opt_out</a>.<br/></body></html>','--  ===================== http://jessta.id.au \n \n \n\n--  \nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group. \nTo unsubscribe from this group and sto',0,'1457997619314912665','1457997619314912665',0,1);
 /*!40000 ALTER TABLE `message` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -323,6 +364,63 @@ LOCK TABLES `sharedfolder` WRITE;
 /*!40000 ALTER TABLE `sharedfolder` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `synchost`
+--
+
+DROP TABLE IF EXISTS `synchost`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `synchost` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `hostname` varchar(191) NOT NULL,
+  `capacity` int(11) NOT NULL,
+  `heartbeat_at` datetime NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `hostname` (`hostname`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `synchost`
+--
+
+LOCK TABLES `synchost` WRITE;
+/*!40000 ALTER TABLE `synchost` DISABLE KEYS */;
+/*!40000 ALTER TABLE `synchost` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `synclease`
+--
+
+DROP TABLE IF EXISTS `synclease`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `synclease` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `imapaccount_id` int(11) NOT NULL,
+  `host` varchar(191) DEFAULT NULL,
+  `expires_at` datetime DEFAULT NULL,
+  `renewed_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `imapaccount_id` (`imapaccount_id`),
+  KEY `ix_synclease_host` (`host`),
+  KEY `ix_synclease_expires_at` (`expires_at`),
+  CONSTRAINT `synclease_ibfk_1` FOREIGN KEY (`imapaccount_id`) REFERENCES `imapaccount` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `synclease`
+--
+
+LOCK TABLES `synclease` WRITE;
+/*!40000 ALTER TABLE `synclease` DISABLE KEYS */;
+INSERT INTO `synclease` VALUES (1,1,'precise64','2014-01-23 05:25:07',NULL);
+/*!40000 ALTER TABLE `synclease` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `thread`
 --
@@ -337,6 +435,12 @@ CREATE TABLE `thread` (
   `recentdate` datetime NOT NULL,
   `namespace_id` int(11) NOT NULL,
   `g_thrid` varchar(255) DEFAULT NULL,
+  `message_count` int(11) NOT NULL,
+  `unread_count` int(11) NOT NULL,
+  `participants` text,
+  `snippet` varchar(191) DEFAULT NULL,
+  `has_attachments` tinyint(1) NOT NULL,
+  `labels` text,
   PRIMARY KEY (`id`),
   KEY `ix_thread_namespace_id` (`namespace_id`),
   KEY `ix_thread_g_thrid` (`g_thrid`(191)),
@@ -350,7 +454,7 @@ CREATE TABLE `thread` (
 
 LOCK TABLES `thread` WRITE;
 /*!40000 ALTER TABLE `thread` DISABLE KEYS */;
-INSERT INTO `thread` VALUES (1,'[go-nuts] Strange error with html/template','2014-01-23 05:20:23','2014-01-23 05:20:23',1,'1457997137582659815'),(2,'[go-nuts] Weird behaviour of Go compiler.','2014-01-23 05:19:33','2014-01-23 05:19:33',1,'1457997085555638926'),(3,'Welcome to Gmail','2014-01-23 05:08:16','2014-01-23 05:08:16',1,'1457996374982313648'),(4,'Get Gmail for your mobile device','2014-01-23 05:08:15','2014-01-23 05:08:15',1,'1457996374675087574'),(5,'Tips for using Gmail','2014-01-23 05:08:15','2014-01-23 05:08:15',1,'1457996374149388361'),(6,'[go-nuts] Convert the go object to a JSON string','2014-01-23 05:26:29','2014-01-23 05:26:29',1,'1457997521161569151'),(7,'[go-nuts] Strange error with html/template','2014-01-23 05:28:03','2014-01-23 05:28:03',1,'1457997619314912665');
+INSERT INTO `thread` VALUES (1,'[go-nuts] Strange error with html/template','2014-01-23 05:20:23','2014-01-23 05:20:23',1,'1457997137582659815',1,1,'[[\"Ben Bitdiddle\", \"ben.bitdiddle1861@gmail.com\"], [\"\", \"testinboxapp@gmail.com\"]]','',0,'[\"[gmail]/all mail\", \"important\", \"inbox\"]'),(2,'[go-nuts] Weird behaviour of Go compiler.','2014-01-23 05:19:33','2014-01-23 05:19:33',1,'1457997085555638926',1,0,'[[\"Nacho\", \"ncc1701zzz@gmail.com\"], [\"Dave Cheney\", \"dave@cheney.net\"]]','I have reproduced it in the last tip for linux/arm. I have added the details here:  https://code.google.com/p/go/issues/detail?id=6993 \n \n \n\n--  \nYou received this message because you are sub',0,'[\"[gmail]/all mail\", \"inbox\"]'),(3,'Welcome to Gmail','2014-01-23 05:08:16','2014-01-23 05:08:16',1,'1457996374982313648',1,0,'[[\"Gmail Team\", \"mail-noreply@google.com\"], [\"Inbox App\", \"testinboxapp@gmail.com\"]]','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Welcome to Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n ',0,'[\"[gmail]/all mail\", \"inbox\"]'),(4,'Get Gmail for your mobile device','2014-01-23 05:08:15','2014-01-23 05:08:15',1,'1457996374675087574',1,1,'[[\"Gmail Team\", \"mail-noreply@google.com\"], [\"Inbox App\", \"testinboxapp@gmail.com\"]]','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n \n \n \n Hi Inbox\n                   \n \n \n \n \n \n Get Gmail for your mobile device \n \n Gmail is always availabl',0,'[\"[gmail]/all mail\", \"inbox\"]'),(5,'Tips for using Gmail','2014-01-23 05:08:15','2014-01-23 05:08:15',1,'1457996374149388361',1,1,'[[\"Gmail Team\", \"mail-noreply@google.com\"], [\"Inbox App\", \"testinboxapp@gmail.com\"]]','\n \n \n   \n \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n \n \n \n   \n \n \n   \n \n \n \n Hi Inbox\n                     \n \n \n   \n \n \n \n \n \n   \n \n \n \n Tips for using Gmail \n \n \n \n   \n \n \n   \n \n \n \n \n   \n \n \n   \n ',0,'[\"[gmail]/all mail\", \"inbox\"]'),(6,'[go-nuts] Convert the go object to a JSON string','2014-01-23 05:26:29','2014-01-23 05:26:29',1,'1457997521161569151',1,1,'[[\"Brad Fitzpatrick\", \"bradfitz@golang.org\"], [\"kate Fernando\", \"hasaradinu@gmail.com\"], [\"golang-nuts\", \"golang-nuts@googlegroups.com\"]]','Why don\'t you just use the encoding/json package? What\'s your actual problem?  If you just want to learn to use the reflect package, you can read encoding/json\'s source (which uses reflect it',0,'[\"[gmail]/all mail\", \"inbox\"]'),(7,'[go-nuts] Strange error with html/template','2014-01-23 05:28:03','2014-01-23 05:28:03',1,'1457997619314912665',1,1,'[[\"Jesse McNelis\", \"jessta@jessta.id.au\"], [\"\", \"miolini@gmail.com\"]]','--  ===================== http://jessta.id.au \n \n \n\n--  \nYou received this message because you are subscribed to the Google Groups \"golang-nuts\" group. \nTo unsubscribe from this group and sto',0,'[\"[gmail]/all mail\", \"inbox\"]');
 /*!40000 ALTER TABLE `thread` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -0,0 +1,69 @@
+from inbox.util.batch import AdaptiveBatcher
+
+MB = 1024*1024
+
+def batcher(**kwargs):
+    options = dict(initial_bytes=MB, min_bytes=MB//4, max_bytes=4*MB,
+            max_count=4)
+    options.update(kwargs)
+    return AdaptiveBatcher(**options)
+
+def test_batches_split_by_budget_and_count():
+    b = batcher()
+    sizes = dict((key, MB//2) for key in 'abcd')
+    assert list(b.batches('abcd', sizes)) == [('a', 'b'), ('c', 'd')]
+    # unknown sizes count as 0, so the count cap is all that applies
+    assert list(b.batches('abcdefghij', dict())) == \
+            [tuple('abcd'), tuple('efgh'), ('i', 'j')]
+    assert list(b.batches('', sizes)) == []
+
+def test_oversize_key_gets_a_batch_to_itself():
+    b = batcher()
+    sizes = dict(a=MB//4, b=10*MB, c=MB//4)
+    assert list(b.batches('abc', sizes)) == [('a',), ('b',), ('c',)]
+    assert list(b.batches('b', sizes)) == [('b',)]
+
+def test_grows_while_rate_holds():
+    b = batcher(max_count=400)
+    b.max_count = 100
+    b.record(10, MB, 1.0)
+    assert b.budget == 2*MB and b.max_count == 200
+    # a little slower, but within tolerance
+    b.record(10, int(0.95*MB), 1.0)
+    assert b.budget == 4*MB and b.max_count == 400
+    # capped
+    b.record(10, MB, 1.0)
+    assert b.budget == 4*MB and b.max_count == 400
+
+def test_shrinks_when_rate_drops():
+    b = batcher()
+    b.record(10, MB, 1.0)
+    assert b.budget == 2*MB
+    b.record(10, MB//2, 1.0)
+    assert b.budget == MB
+    b.record(10, MB//8, 1.0)
+    assert b.budget == MB//2
+    b.record(10, MB//16, 1.0)
+    assert b.budget == MB//4
+    # floored
+    b.record(10, MB//32, 1.0)
+    assert b.budget == MB//4
+    # batches with no measurable time don't move anything
+    b.record(10, MB, 0)
+    assert b.budget == MB//4
+    assert len(b.history) == 6
+
+def test_failed_backs_off():
+    b = batcher()
+    b.record(10, MB, 1.0)
+    b.failed()
+    assert b.budget == MB and b.max_count == 2 and b.failures == 1
+    # the rate before the failure doesn't count against the next batch
+    b.record(10, MB//100, 1.0)
+    assert b.budget == 2*MB
+    for _ in xrange(5):
+        b.failed()
+    assert b.budget == MB//4 and b.max_count == 1
+    summary = b.summary()
+    assert summary['failures'] == 6 and summary['batches'] == 2
+    assert summary['budget'] == MB//4
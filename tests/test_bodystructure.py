@@ -0,0 +1,100 @@
+from inbox.server.bodystructure import walk, decode_part
+from inbox.server.mimeparse import parse_message
+
+TEXT_PLAIN = ('TEXT', 'PLAIN', ('CHARSET', 'utf-8'), None, None, '7BIT', 10, 1,
+        None, None, None)
+TEXT_HTML = ('TEXT', 'HTML', ('CHARSET', 'utf-8'), None, None,
+        'QUOTED-PRINTABLE', 20, 1, None, None, None)
+PDF = ('APPLICATION', 'PDF', ('NAME', 'scan.pdf'), None, None, 'BASE64',
+        400000, None, ('ATTACHMENT', ('FILENAME', 'floorplan.pdf')), None)
+
+def test_walk_matches_flanker_walk_index():
+    alternative = (TEXT_PLAIN, TEXT_HTML, 'ALTERNATIVE', ('BOUNDARY', 'x'),
+            None, None)
+    mixed = (alternative, PDF, 'MIXED', ('BOUNDARY', 'y'), None, None)
+    parts = walk(mixed)
+    assert [(p.section, p.walk_index, p.content_type) for p in parts] == [
+            ('1.1', 2, 'text/plain'),
+            ('1.2', 3, 'text/html'),
+            ('2', 4, 'application/pdf')]
+    pdf = parts[2]
+    assert pdf.filename == 'floorplan.pdf'
+    assert pdf.is_lazy(100*1024)
+    assert not parts[0].is_lazy(0)
+
+def test_singlepart():
+    parts = walk(TEXT_PLAIN)
+    assert [(p.section, p.walk_index) for p in parts] == [('1', 1)]
+    assert decode_part('aGk=', 'base64') == 'hi'
+    assert decode_part('a=3Db', 'quoted-printable') == 'a=b'
+
+ENVELOPE = (None, 'orig', None, None, None, None, None, None, None, None)
+
+def attached(body):
+    return ('MESSAGE', 'RFC822', None, None, None, '7BIT', 500, ENVELOPE,
+            body, 20, None, ('ATTACHMENT', None), None)
+
+FORWARDED = '\r\n'.join([
+    'From: a@example.com',
+    'Subject: fwd',
+    'MIME-Version: 1.0',
+    'Content-Type: multipart/mixed; boundary="b1"',
+    '',
+    '--b1',
+    'Content-Type: text/plain',
+    '',
+    'see below',
+    '--b1',
+    'Content-Type: message/rfc822',
+    'Content-Disposition: attachment',
+    '',
+    'From: b@example.com',
+    'Subject: orig',
+    'MIME-Version: 1.0',
+    'Content-Type: multipart/alternative; boundary="b2"',
+    '',
+    '--b2',
+    'Content-Type: text/plain',
+    '',
+    'hi',
+    '--b2',
+    'Content-Type: text/html',
+    '',
+    '<p>hi</p>',
+    '--b2--',
+    '',
+    '--b1',
+    'Content-Type: application/pdf; name="scan.pdf"',
+    'Content-Disposition: attachment; filename="floorplan.pdf"',
+    'Content-Transfer-Encoding: base64',
+    '',
+    'AAEC',
+    '--b1--',
+    ''])
+
+def test_walk_attached_message():
+    """ flanker walks into attached messages, so we have to as well. """
+    alternative = (TEXT_PLAIN, TEXT_HTML, 'ALTERNATIVE', ('BOUNDARY', 'b2'),
+            None, None)
+    mixed = (TEXT_PLAIN, attached(alternative), PDF, 'MIXED',
+            ('BOUNDARY', 'b1'), None, None)
+    parts = walk(mixed)
+    assert [(p.section, p.walk_index, p.content_type) for p in parts] == [
+            ('1', 1, 'text/plain'),
+            ('2', 2, 'message/rfc822'),
+            ('2.1', 4, 'text/plain'),
+            ('2.2', 5, 'text/html'),
+            ('3', 6, 'application/pdf')]
+    # it's a container; there's nothing to fetch for it
+    assert parts[1].data == ''
+    assert parts[1].disposition == 'attachment'
+
+    full = parse_message(FORWARDED).parts
+    assert [(p.walk_index, p.content_type) for p in parts] == \
+            [(p['walk_index'], p['content_type']) for p in full]
+
+def test_walk_attached_singlepart_message():
+    mixed = (TEXT_PLAIN, attached(TEXT_PLAIN), TEXT_HTML, 'MIXED',
+            ('BOUNDARY', 'b1'), None, None)
+    assert [(p.section, p.walk_index) for p in walk(mixed)] == [
+            ('1', 1), ('2', 2), ('2.1', 3), ('3', 4)]
@@ -0,0 +1,90 @@
+import os
+import random
+
+from inbox.util import gmetadata
+from inbox.util.uidset import UIDSet
+
+def metadata(uids):
+    return dict((uid, dict(msgid=str(10**15 + uid),
+        thrid=str(10**14 + uid // 3))) for uid in uids)
+
+def as_dict(store):
+    return dict((uid, dict(msgid=str(msgid), thrid=str(thrid))) for \
+            uid, msgid, thrid in store.records())
+
+def test_resumable_writes(tmpdir):
+    path = str(tmpdir.join('remote_g_metadata'))
+    writer = gmetadata.GMetadataWriter(path, 42)
+    writer.append(metadata(range(1, 100)))
+    writer.close()
+    # a torn write from a crash mid-chunk
+    with open(path + '.partial', 'ab') as f:
+        f.write('garbage')
+
+    writer = gmetadata.GMetadataWriter(path, 42)
+    assert writer.count == 99 and writer.last_uid == 99
+    writer.append(metadata(range(100, 200)))
+    writer.finish()
+    store = gmetadata.load(path)
+    assert as_dict(store) == metadata(range(1, 200))
+    store.close()
+    assert not os.path.exists(path + '.partial')
+
+def test_uidvalidity_change_starts_over(tmpdir):
+    path = str(tmpdir.join('remote_g_metadata'))
+    writer = gmetadata.GMetadataWriter(path, 42)
+    writer.append(metadata(range(1, 100)))
+    writer.close()
+
+    writer = gmetadata.GMetadataWriter(path, 43)
+    assert writer.count == 0 and writer.last_uid == 0
+    writer.append(metadata([5, 7]))
+    writer.finish()
+    store = gmetadata.load(path)
+    assert as_dict(store) == metadata([5, 7])
+    store.close()
+
+    gmetadata.remove(path)
+    assert gmetadata.load(path) is None
+
+def test_lookups_match_dict(tmpdir, monkeypatch):
+    # small blocks so scans cross block boundaries
+    monkeypatch.setattr(gmetadata, 'BLOCK_SIZE', 7)
+    rand = random.Random(0)
+    uids = rand.sample(xrange(1, 5000), 500)
+    expected = metadata(uids)
+    path = str(tmpdir.join('remote_g_metadata'))
+    gmetadata.save(path, expected)
+    for store in (gmetadata.load(path), gmetadata.GMetadataDict(expected)):
+        assert len(store) == 500
+        assert store.uids() == UIDSet(uids)
+        for uid in xrange(0, 5001):
+            assert (uid in store) == (uid in expected)
+            assert store.get(uid) == expected.get(uid)
+
+        wanted = UIDSet(rand.sample(xrange(1, 5000), 300))
+        assert list(store.items_for(wanted)) == [(uid,
+            expected[uid]['msgid'], expected[uid]['thrid']) for uid in \
+                    wanted if uid in expected]
+
+        thrids = [10**14 + uid // 3 for uid in rand.sample(uids, 20)]
+        assert store.uids_in_threads(thrids) == sorted(uid for uid in uids \
+                if long(expected[uid]['thrid']) in thrids)
+        store.close()
+
+def test_update(tmpdir):
+    path = str(tmpdir.join('remote_g_metadata'))
+    gmetadata.save(path, metadata(range(1, 20)))
+    new = metadata([5, 25, 30])
+    new[5]['thrid'] = '7'
+    gmetadata.update(path, new, keep=UIDSet(range(3, 15)))
+    expected = metadata(range(3, 15))
+    expected.update(new)
+    store = gmetadata.load(path)
+    assert as_dict(store) == expected
+    store.close()
+
+def test_rejects_other_files(tmpdir):
+    path = tmpdir.join('remote_g_metadata')
+    path.write('not a g_metadata file')
+    assert gmetadata.load(str(path)) is None
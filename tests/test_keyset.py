@@ -0,0 +1,115 @@
+""" Tests for set operations against big batches of keys. """
+
+import pytest
+
+from sqlalchemy import create_engine, event, Column, String, Integer
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker
+
+from inbox.sqlalchemy import keyset
+from inbox.sqlalchemy.util import Base
+
+class Banana(Base):
+    bunch = Column(Integer, nullable=False)
+    code = Column(String(40), nullable=False)
+
+@pytest.fixture
+def db_session(request):
+    engine = create_engine('sqlite://')
+    # pysqlite commits before any DDL (like CREATE TEMPORARY TABLE) unless
+    # we handle transactions ourselves
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        connection.execute('BEGIN')
+
+    Base.metadata.create_all(engine, tables=[Banana.__table__])
+    session = sessionmaker()(bind=engine)
+    session.add_all([Banana(bunch=i % 2, code=str(i)) for i in xrange(100)])
+    session.commit()
+    request.addfinalizer(session.close)
+    return session
+
+# a small in_max sends our batches through the temporary table, or chunks
+OPTIONS = [dict(in_max=7, temp_tables=True),
+           dict(in_max=7, temp_tables=False),
+           dict(in_max=1000, temp_tables=True)]
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_present_and_missing(db_session, options):
+    query = db_session.query(Banana.code).filter_by(bunch=0)
+    keys = [str(i) for i in xrange(50, 150)]
+    even = set(str(i) for i in xrange(50, 100, 2))
+    assert keyset.present(db_session, query, Banana.code, keys,
+            **options) == even
+    assert keyset.missing(db_session, query, Banana.code, keys,
+            **options) == set(keys) - even
+
+    query = db_session.query(Banana.id).filter_by(bunch=1)
+    assert keyset.missing(db_session, query, Banana.id, range(1, 21),
+            **options) == set(range(1, 21, 2))
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_numbers_in_string_column(db_session, options):
+    """ Like X-GM-MSGIDs, which we get as numbers and store as strings. """
+    query = db_session.query(Banana.code).filter_by(bunch=0)
+    keys = range(50, 150)
+    assert keyset.missing(db_session, query, Banana.code, keys,
+            **options) == set(keys) - set(xrange(50, 100, 2))
+
+def test_key_type():
+    """ Keys are the compared column's type, short enough to index under
+        utf8mb4.
+    """
+    assert isinstance(keyset._key_type(Banana.bunch), Integer)
+    assert keyset._key_type(Banana.code).length == 40
+    long_column = Column('long', String(255))
+    assert keyset._key_type(long_column).length == keyset.MAX_KEY_LENGTH
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_delete(db_session, options):
+    query = db_session.query(Banana).filter_by(bunch=1)
+    keys = [str(i) for i in xrange(0, 200, 3)]
+    assert keyset.delete(db_session, query, Banana.code, keys,
+            **options) == len([i for i in xrange(0, 100, 3) if i % 2])
+    db_session.commit()
+    assert set(code for code, in db_session.query(Banana.code)) == \
+            set(str(i) for i in xrange(100) if i % 2 == 0 or i % 3)
+    # the temporary tables are gone
+    assert not [name for name in db_session.get_bind().table_names() \
+            if name.startswith('keyset')]
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_transaction_left_open(db_session, options):
+    """ The caller's uncommitted work survives, and can still be rolled
+        back.
+    """
+    db_session.add(Banana(bunch=2, code='new'))
+    db_session.flush()
+    query = db_session.query(Banana.code)
+    keys = ['new'] + [str(i) for i in xrange(200)]
+    assert keyset.missing(db_session, query, Banana.code, keys,
+            **options) == set(str(i) for i in xrange(100, 200))
+    assert db_session.query(Banana).filter_by(bunch=2).count() == 1
+    db_session.rollback()
+    assert db_session.query(Banana).filter_by(bunch=2).count() == 0
+
+def test_mysql_drops_temporary():
+    """ On MySQL a plain DROP TABLE would commit the transaction. """
+    class Connection(object):
+        dialect = mysql.dialect()
+        def __init__(self):
+            self.statements = []
+        def execute(self, statement):
+            self.statements.append(statement)
+    connection = Connection()
+    table = keyset.Table('keyset_test', keyset._metadata,
+            Column('key', Integer, primary_key=True))
+    try:
+        keyset._drop(connection, table)
+    finally:
+        keyset._metadata.remove(table)
+    assert connection.statements == ['DROP TEMPORARY TABLE keyset_test']
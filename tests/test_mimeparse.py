@@ -0,0 +1,68 @@
+import cPickle
+
+import gevent
+
+from inbox.server import mimeparse
+from inbox.server.mimeparse import parse_message
+from inbox.util.file import SpooledData
+
+MULTIPART = '\r\n'.join([
+    'From: Alice <alice@example.com>',
+    'To: Bob <bob@example.com>',
+    'Subject: floorplan',
+    'Message-Id: <1@example.com>',
+    'MIME-Version: 1.0',
+    'Content-Type: multipart/mixed; boundary="b1"',
+    '',
+    '--b1',
+    'Content-Type: text/plain; charset=utf-8',
+    '',
+    'see attached',
+    '--b1',
+    'Content-Type: application/octet-stream; name="floorplan.gif"',
+    'Content-Disposition: attachment; filename="floorplan.gif"',
+    'Content-Transfer-Encoding: base64',
+    '',
+    'AAEC',
+    '--b1--',
+    ''])
+
+def test_parsed_message_pickles():
+    """ ParsedMessages come back from parse workers pickled. """
+    parsed = parse_message(MULTIPART)
+    unpickled = cPickle.loads(cPickle.dumps(parsed, cPickle.HIGHEST_PROTOCOL))
+    assert unpickled.headers == parsed.headers
+    assert unpickled.parts == parsed.parts
+    assert dict(unpickled.headers)['Content-Type'] == \
+            u'multipart/mixed; boundary="b1"'
+    attachment = unpickled.parts[-1]
+    assert attachment['filename'] == 'floorplan.gif'
+    assert attachment['data'] == '\x00\x01\x02'
+    assert dict(attachment['misc_keyval'])['Content-Transfer-Encoding'] == \
+            'base64'
+
+def test_parse_many_reads_as_needed(monkeypatch):
+    """ Spooled bodies are only read once there's a worker for them. """
+    in_memory = [0]
+    most_in_memory = [0]
+
+    class Body(SpooledData):
+        def read(self):
+            in_memory[0] += 1
+            most_in_memory[0] = max(most_in_memory[0], in_memory[0])
+            return MULTIPART
+
+    class Pool(object):
+        num_workers = 2
+        def apply(self, fn, *args):
+            gevent.sleep(0.01)
+            in_memory[0] -= 1
+            return fn(*args)
+
+    monkeypatch.setattr(mimeparse, '_pool', Pool())
+    monkeypatch.setattr(mimeparse, 'parse_pool', lambda: mimeparse._pool)
+    parsed = mimeparse.parse_many([Body(None, 0, len(MULTIPART)) \
+            for _ in xrange(6)])
+    assert [p.headers for p in parsed] == \
+            [parse_message(MULTIPART).headers] * 6
+    assert most_in_memory[0] == 2
@@ -6,6 +6,7 @@ from sqlalchemy import create_engine, Column, Enum, String, Integer
 from sqlalchemy.orm import sessionmaker
 
 from inbox.sqlalchemy.revision import versioned_session, Revision, gen_rev_role
+from inbox.sqlalchemy.revision import coarse_revisions
 from inbox.sqlalchemy.util import Base
 
 class MonkeyRevision(Base, Revision):
@@ -77,4 +78,33 @@ def test_skip_rev_create(db_session, config):
             table_name='tree', record_id=tree.id).all()
     assert not tree_txns
 
+def test_batched_revisions(db_session, config):
+    """ All revisions for a flush are written at once, without making the
+        session dirty again.
+    """
+    monkeys = [Monkey(type='gorilla', name='Koko{0}'.format(i), age=i) \
+            for i in xrange(10)]
+    db_session.add_all(monkeys)
+    db_session.commit()
+    assert not db_session.new and not db_session.dirty
+    for monkey in monkeys:
+        assert len(monkey.revisions) == 1
+        assert monkey.revisions[0].delta['age'] == monkey.age
+
+def test_coarse_revisions(db_session, config):
+    """ Coarse mode logs one revision per table and command per flush. """
+    num_revisions = db_session.query(MonkeyRevision).count()
+    monkeys = [Monkey(type='rhesus', name='Bulk{0}'.format(i), age=i) \
+            for i in xrange(5)]
+    with coarse_revisions(db_session):
+        db_session.add_all(monkeys)
+        db_session.commit()
+    assert not db_session.coarse_revisions
+    assert db_session.query(MonkeyRevision).count() == num_revisions + 1
+    rev = db_session.query(MonkeyRevision).order_by(
+            MonkeyRevision.id.desc()).first()
+    assert rev.command == 'insert' and rev.table_name == 'monkey'
+    assert rev.delta == dict(record_ids=sorted(m.id for m in monkeys))
+    assert rev.record_id == min(m.id for m in monkeys)
+
 # TODO: Test updates on objects with relationships.
@@ -0,0 +1,55 @@
+from gevent import spawn, sleep
+
+from inbox.server.mailsync.scheduler import SyncScheduler, worker_limits
+
+def test_limits_and_priorities():
+    scheduler = SyncScheduler(max_initial_syncs=1, max_connections=8)
+    order = []
+
+    def work(account_id, kind):
+        with scheduler.admitted(account_id, kind):
+            order.append((account_id, kind))
+            sleep(0.01)
+
+    greenlets = [spawn(work, 1, 'initial'), spawn(work, 2, 'initial'),
+            spawn(work, 3, 'backfill'), spawn(work, 4, 'poll')]
+    sleep(0)
+    # only one initial sync at a time
+    assert scheduler.running_initial_syncs == 1
+    assert [r['account_id'] for r in \
+            scheduler.status()['queued']['initial']] == [2]
+    for greenlet in greenlets:
+        greenlet.join()
+    assert order[0] == (1, 'initial') and order[-1] == (2, 'initial')
+    assert scheduler.connections == 0 and not scheduler.running
+
+def test_weighted_fair_queueing():
+    scheduler = SyncScheduler(max_connections=1)
+    scheduler.set_weight(2, 2)
+    order = []
+
+    def work(account_id):
+        with scheduler.admitted(account_id, 'poll'):
+            order.append(account_id)
+            sleep(0)
+
+    # hold the only connection while everyone queues up
+    with scheduler.admitted(0, 'poll'):
+        greenlets = [spawn(work, account_id) for account_id in [1, 2] * 4]
+        sleep(0)
+    for greenlet in greenlets:
+        greenlet.join()
+    # account 2 weighs twice as much, so it gets served twice as often
+    # until it runs out of work
+    assert order[:6] == [2, 1, 2, 2, 1, 2]
+
+def test_worker_limits():
+    """ Sync workers split the host's limits between them. """
+    limits = dict(max_initial_syncs=10, max_connections=3,
+            max_bandwidth=None)
+    shares = [worker_limits(limits, 4, i) for i in xrange(4)]
+    assert [s['max_initial_syncs'] for s in shares] == [3, 3, 2, 2]
+    # never 0, which would mean unlimited
+    assert [s['max_connections'] for s in shares] == [1, 1, 1, 1]
+    assert all(s['max_bandwidth'] is None for s in shares)
+    assert worker_limits(limits, 1, 0) == limits
@@ -0,0 +1,20 @@
+def test_hash_ring(config):
+    from inbox.server.mailsync.supervisor import HashRing
+
+    ring = HashRing(range(4))
+    before = dict((key, ring.get(key)) for key in xrange(1000))
+    # every worker gets a fair share
+    for node in range(4):
+        assert 150 < before.values().count(node) < 350
+
+    ring.remove(2)
+    after = dict((key, ring.get(key)) for key in xrange(1000))
+    # only the removed worker's keys move
+    assert all(after[key] == node for key, node in before.iteritems() \
+            if node != 2)
+    assert 2 not in after.values()
+
+    ring.add(2)
+    assert dict((key, ring.get(key)) for key in xrange(1000)) == before
+
+    assert HashRing().get(1) is None
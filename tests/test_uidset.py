@@ -0,0 +1,26 @@
+import random
+
+from inbox.util.uidset import UIDSet
+
+def test_ranges_and_sequence_set():
+    uids = UIDSet([8, 1, 2, 3, 5, 7, 3])
+    assert len(uids) == 6
+    assert list(uids) == [1, 2, 3, 5, 7, 8]
+    assert list(reversed(uids)) == [8, 7, 5, 3, 2, 1]
+    assert str(uids) == '1:3,5,7:8'
+    assert UIDSet.from_sequence_set('7:8,5,3:1') == uids
+    assert 4 not in uids and 5 in uids and 9 not in uids
+    assert not UIDSet()
+
+def test_matches_set_operations():
+    rand = random.Random(0)
+    for _ in xrange(200):
+        a = set(rand.sample(xrange(1, 300), rand.randint(0, 200)))
+        b = set(rand.sample(xrange(1, 300), rand.randint(0, 200)))
+        uids_a, uids_b = UIDSet(a), UIDSet(b)
+        assert list(uids_a | uids_b) == sorted(a | b)
+        assert list(uids_a & uids_b) == sorted(a & b)
+        assert list(uids_a - uids_b) == sorted(a - b)
+        assert len(uids_a - uids_b) == len(a - b)
+        # plain iterables work on the right hand side too
+        assert list(uids_a - b) == sorted(a - b)
@@ -1,23 +1,31 @@
 #!/usr/bin/env python
+""" Watch an account's Inbox with IDLE, the same way the sync engine does
+    between polls.
+"""
+import sys
 
-from inbox.server import sessionmanager
+from inbox.server.config import load_config
+load_config()
 
-c = None
+from inbox.server.crispin import new_crispin
+from inbox.server.models import session_scope
+from inbox.server.models.tables import ImapAccount
 
-def refresh_crispin():
-    global c
-    c = sessionmanager.get_crispin_from_email(
-                    'christine.spang@gmail.com')
+def main():
+    if len(sys.argv) != 2:
+        print >>sys.stderr, "Usage: {0} <account_id>".format(sys.argv[0])
+        return 1
+    account_id = int(sys.argv[1])
+    with session_scope() as db_session:
+        provider = db_session.query(ImapAccount).get(account_id).provider
 
-refresh_crispin()
+    crispin_client = new_crispin(account_id, provider)
+    folder = 'INBOX'
 
-folder = 'Inbox'
-select_info = c.select_folder(folder)
+    print "Waiting for IDLE messages on {0}...".format(folder)
 
-c.imap_server.idle()
+    while True:
+        print crispin_client.idle(folder, crispin_client.IDLE_TIMEOUT)
 
-print "Waiting for IDLE messages on {0}...".format(folder)
-
-while True:
-    for msg in c.imap_server.idle_check():
-        print msg
+if __name__ == '__main__':
+    sys.exit(main())